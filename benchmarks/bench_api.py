@@ -0,0 +1,206 @@
+"""
+Latency, throughput and query-count budgets per endpoint.
+
+Budgets count every SQL statement of the request except transaction
+control, including the session and user lookups (2 queries; the legacy
+views never load the session). A budget failure usually means an N+1 or
+an unintended extra query, not a slow machine.
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from trips.models import Traveler, Trip
+from trips.workflow import transition_ids
+
+pytestmark = pytest.mark.django_db
+
+# The legacy views and admin changelists are much slower; time fewer runs.
+SLOW_ITERATIONS = 3
+
+
+def _ids(model, count, **filters):
+    ids = list(model.objects.filter(**filters).order_by("?").values_list("id", flat=True)[:count])
+    assert ids, f"no {model.__name__} rows to benchmark"
+    return ids
+
+
+def _cycle(ids):
+    return lambda i: ids[i % len(ids)]
+
+
+# -- TripViewSet -------------------------------------------------------------
+
+@pytest.mark.parametrize("name, query, budget", [
+    ("api_trip_list", "", 3),
+    ("api_trip_list_expand", "?expand=traveler", 3),
+    ("api_trip_list_fields", "?fields=id,status,start_date", 3),
+    ("api_trip_list_page_numbers", "?pagination=page&page=50", 4),
+    ("api_trip_list_search", "?q=paris", 4),
+])
+def test_trip_list(bench, name, query, budget):
+    bench.run(name, lambda i: bench.client.get(f"/api/trips/{query}"), budget)
+
+
+def test_trip_list_cursor_depth(bench):
+    """Following next links: page latency must not grow with depth."""
+    url = bench.client.get("/api/trips/").json()["next"]
+    pages = []
+
+    def request(i):
+        nonlocal url
+        response = bench.client.get(url)
+        pages.append(response.json()["next"])
+        url = pages[-1]
+        return response
+
+    bench.run("api_trip_list_cursor_pages", request, budget=3)
+
+
+def test_trip_detail(bench):
+    trip_id = _cycle(_ids(Trip, 200))
+    bench.run("api_trip_detail", lambda i: bench.client.get(f"/api/trips/{trip_id(i)}/"), budget=3)
+
+
+def test_trip_detail_cached(bench):
+    trip_id = _ids(Trip, 1)[0]
+    bench.run("api_trip_detail_cached", lambda i: bench.client.get(f"/api/trips/{trip_id}/"), budget=3)
+
+
+def test_trip_detail_not_modified(bench):
+    trip_id = _ids(Trip, 1)[0]
+    etag = bench.client.get(f"/api/trips/{trip_id}/")["ETag"]
+    bench.run(
+        "api_trip_detail_304",
+        lambda i: bench.client.get(f"/api/trips/{trip_id}/", HTTP_IF_NONE_MATCH=etag),
+        budget=3,
+        expect=304,
+    )
+
+
+def _draft_trips(traveler_id, count, spacing=3):
+    """
+    Draft trips owned by the benchmark user, ``spacing`` days apart
+    (0 puts them all on the same dates, in one spend rollup group).
+    """
+    start = date(2040, 1, 1)
+    return [
+        trip.id for trip in Trip.objects.bulk_create([
+            Trip(
+                title=f"Workflow {i}", destination="Oslo", traveler_id=traveler_id,
+                start_date=start + timedelta(days=spacing * i),
+                end_date=start + timedelta(days=spacing * i + 1),
+            )
+            for i in range(count)
+        ])
+    ]
+
+
+# Workflow writes also update the department spend rollup: one UPDATE per
+# (department, destination, month, status) group touched, plus an INSERT
+# for new groups and the cleanup DELETE.
+@pytest.mark.parametrize("transition, budget", [
+    ("submit", 11),
+    ("approve", 9),
+    ("reject", 9),
+])
+def test_workflow_action(bench, bench_user, transition, budget):
+    trip_ids = _draft_trips(bench_user.id, bench.iterations + bench.warmup)
+    if transition != "submit":
+        transition_ids(trip_ids, "submit")
+    bench.run(
+        f"api_trip_{transition}",
+        lambda i: bench.client.post(f"/api/trips/{trip_ids[i]}/{transition}/"),
+        budget,
+    )
+
+
+def test_bulk_transition(bench, bench_user):
+    # One rollup group for the whole batch, so the query count must not
+    # depend on the batch size.
+    trip_ids = _draft_trips(bench_user.id, 50 * (bench.iterations + bench.warmup), spacing=0)
+    transition_ids(trip_ids, "submit")
+
+    def request(i):
+        return bench.client.post(
+            "/api/trips/bulk_transition/",
+            {"ids": trip_ids[50 * i:50 * (i + 1)], "transition": "approve"},
+            content_type="application/json",
+        )
+
+    bench.run("api_trip_bulk_approve_50", request, budget=8)
+    assert Trip.objects.filter(pk__in=trip_ids, status="approved").count() == len(trip_ids)
+
+
+def test_search_flights(bench):
+    bench.run(
+        "api_search_flights",
+        lambda i: bench.client.get(
+            "/api/trips/search_flights/?origin=BEG&destination=BCN&date=2024-03-01"
+        ),
+        budget=2,
+    )
+
+
+# -- TravelerViewSet ---------------------------------------------------------
+
+@pytest.mark.parametrize("name, query, budget", [
+    ("api_traveler_list", "", 3),
+    ("api_traveler_list_department", "?department=finance", 3),
+    ("api_traveler_list_department_exact", "?department_exact=finance", 3),
+    ("api_traveler_list_search", "?q=horvat", 4),
+])
+def test_traveler_list(bench, name, query, budget):
+    bench.run(name, lambda i: bench.client.get(f"/api/travelers/{query}"), budget)
+
+
+def test_traveler_detail(bench):
+    traveler_id = _cycle(_ids(Traveler, 200))
+    bench.run(
+        "api_traveler_detail",
+        lambda i: bench.client.get(f"/api/travelers/{traveler_id(i)}/"),
+        budget=3,
+    )
+
+
+def test_traveler_conflicts(bench):
+    traveler_id = _cycle(_ids(Traveler, 200))
+    bench.run(
+        "api_traveler_conflicts",
+        lambda i: bench.client.get(f"/api/travelers/{traveler_id(i)}/conflicts/"),
+        budget=4,
+    )
+
+
+def test_travelers_abroad(bench):
+    bench.run(
+        "api_travelers_abroad",
+        lambda i: bench.client.get(f"/api/travelers/abroad/?date=2024-03-{1 + i % 28:02d}"),
+        budget=3,
+    )
+
+
+# -- Legacy views (trips/urls.py) --------------------------------------------
+
+@pytest.mark.parametrize("name, url, budget", [
+    ("legacy_trip_list", "/trips/", 1),
+    ("legacy_trip_list_v2", "/trips/v2/", 1),
+])
+def test_legacy_list(bench, name, url, budget):
+    bench.run(name, lambda i: bench.client.get(url), budget, iterations=SLOW_ITERATIONS, warmup=0)
+
+
+def test_legacy_detail(bench):
+    trip_id = _cycle(_ids(Trip, 200))
+    bench.run("legacy_trip_detail", lambda i: bench.client.get(f"/trips/{trip_id(i)}/"), budget=1)
+
+
+# -- Admin changelists -------------------------------------------------------
+
+@pytest.mark.parametrize("name, url, budget", [
+    ("admin_trip_changelist", "/admin/trips/trip/", 8),
+    ("admin_trip_changelist_search", "/admin/trips/trip/?q=paris", 8),
+    ("admin_traveler_changelist", "/admin/trips/traveler/", 6),
+])
+def test_admin_changelist(bench, name, url, budget):
+    bench.run(name, lambda i: bench.client.get(url), budget, iterations=SLOW_ITERATIONS, warmup=1)
@@ -0,0 +1,76 @@
+"""
+Compare two benchmark result files.
+
+Usage:
+    python benchmarks/compare.py base.json head.json [--threshold 20]
+
+Prints p50/p95 latency, throughput and query counts per endpoint with
+the relative change. Exits with status 1 if any endpoint's p95 got
+slower by more than ``--threshold`` percent or ran more queries.
+"""
+import argparse
+import json
+import sys
+
+
+def _change(base, head):
+    if not base:
+        return "n/a"
+    return f"{(head - base) / base * 100:+.1f}%"
+
+
+def compare(base, head, threshold):
+    """Return (report lines, list of regressed endpoint names)."""
+    lines = [
+        f"{'endpoint':34} {'p50 ms':>18} {'p95 ms':>18} {'req/s':>18} {'queries':>9}",
+    ]
+    regressions = []
+    for name in sorted(set(base["endpoints"]) | set(head["endpoints"])):
+        old, new = base["endpoints"].get(name), head["endpoints"].get(name)
+        if old is None or new is None:
+            lines.append(f"{name:34} {'only in ' + ('head' if old is None else 'base'):>18}")
+            continue
+        lines.append(
+            f"{name:34} "
+            f"{new['p50_ms']:>9.2f} {_change(old['p50_ms'], new['p50_ms']):>8} "
+            f"{new['p95_ms']:>9.2f} {_change(old['p95_ms'], new['p95_ms']):>8} "
+            f"{new['throughput_rps']:>9.1f} {_change(old['throughput_rps'], new['throughput_rps']):>8} "
+            f"{old['max_queries']:>4}->{new['max_queries']:<4}"
+        )
+        slower = old["p95_ms"] and (new["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 > threshold
+        if slower or new["max_queries"] > old["max_queries"]:
+            regressions.append(name)
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument(
+        "--threshold", type=float, default=20.0,
+        help="Allowed p95 slowdown in percent (default 20).",
+    )
+    args = parser.parse_args(argv)
+
+    with open(args.base) as fh:
+        base = json.load(fh)
+    with open(args.head) as fh:
+        head = json.load(fh)
+
+    for label, result in (("base", base), ("head", head)):
+        meta = result["meta"]
+        print(f"{label}: {meta.get('revision')} ({meta['trips']} trips, {meta['travelers']} travelers)")
+    if (base["meta"]["trips"], base["meta"]["travelers"]) != (head["meta"]["trips"], head["meta"]["travelers"]):
+        print("warning: the runs used different data volumes")
+
+    lines, regressions = compare(base, head, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"\nRegressed: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
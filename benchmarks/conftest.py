@@ -0,0 +1,171 @@
+"""
+Fixtures for the API benchmark suite.
+
+Run from the project root (the suite has its own pytest.ini):
+
+    pytest benchmarks
+    BENCH_TRAVELERS=1000 BENCH_TRIPS=50000 pytest benchmarks  # quick run
+
+Environment:
+    BENCH_TRAVELERS / BENCH_TRIPS: Seeded volume (default 10k / 1M)
+    BENCH_ITERATIONS: Timed requests per endpoint (default 30)
+    BENCH_SEED: Random seed for the dataset (default 1)
+    BENCH_RESULTS: Where to write the JSON results
+        (default benchmarks/results.json)
+
+The database is seeded once per session; each benchmark runs inside a
+transaction that is rolled back, so workflow benchmarks do not leak
+state into the read benchmarks.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+
+import django
+import pytest
+from django.db import connection
+
+BENCH_TRAVELERS = int(os.environ.get("BENCH_TRAVELERS", 10_000))
+BENCH_TRIPS = int(os.environ.get("BENCH_TRIPS", 1_000_000))
+BENCH_ITERATIONS = int(os.environ.get("BENCH_ITERATIONS", 30))
+BENCH_SEED = int(os.environ.get("BENCH_SEED", 1))
+BENCH_RESULTS = os.environ.get(
+    "BENCH_RESULTS", os.path.join(os.path.dirname(__file__), "results.json")
+)
+
+# Staff user with a traveler of the same id (owns the workflow benchmark trips)
+BENCH_USERNAME = "bench"
+
+_results = {}
+
+
+def seed():
+    """Insert the benchmark dataset (see trips.seeding)."""
+    from django.contrib.auth.models import User
+
+    from trips.models import Traveler
+    from trips.seeding import SeedConfig, seed as seed_trips
+
+    user = User.objects.create_superuser(BENCH_USERNAME, "bench@example.com", "bench")
+    Traveler.objects.create(
+        id=user.id, first_name="Bench", last_name="User", email="bench@example.com",
+        department="Engineering",
+    )
+    seed_trips(SeedConfig(trips=BENCH_TRIPS, travelers=BENCH_TRAVELERS, seed=BENCH_SEED))
+
+
+@pytest.fixture(scope="session")
+def django_db_setup(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        started = time.perf_counter()
+        seed()
+        _results["_meta"] = {"seed_seconds": round(time.perf_counter() - started, 2)}
+
+
+# Transaction control is not counted against query budgets
+_TRANSACTION_STATEMENTS = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE")
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(_TRANSACTION_STATEMENTS):
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Bench:
+    """
+    Times one endpoint and records its results.
+
+    ``request`` is called with the iteration number and must return a
+    response; every response must have ``expect`` status.
+    """
+
+    def __init__(self, client, iterations=BENCH_ITERATIONS, warmup=2):
+        self.client = client
+        self.iterations = iterations
+        self.warmup = warmup
+
+    def run(self, name, request, budget, iterations=None, warmup=None, expect=200):
+        iterations = iterations or self.iterations
+        warmup = self.warmup if warmup is None else warmup
+        for i in range(warmup):
+            request(i)
+
+        timings, queries = [], []
+        for i in range(warmup, warmup + iterations):
+            counter = _QueryCounter()
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                response = request(i)
+                timings.append(time.perf_counter() - started)
+            queries.append(counter.count)
+            assert response.status_code == expect, f"{name}: {response.status_code}"
+
+        result = summarize(timings, queries, budget)
+        _results[name] = result
+        assert result["max_queries"] <= budget, (
+            f"{name} ran {result['max_queries']} queries (budget {budget})"
+        )
+        return result
+
+
+def summarize(timings, queries, budget):
+    """Latency percentiles (ms), throughput and query counts."""
+    ms = sorted(t * 1000 for t in timings)
+    p95 = statistics.quantiles(ms, n=20, method="inclusive")[-1] if len(ms) > 1 else ms[0]
+    return {
+        "iterations": len(ms),
+        "p50_ms": round(statistics.median(ms), 3),
+        "p95_ms": round(p95, 3),
+        "max_ms": round(ms[-1], 3),
+        "throughput_rps": round(len(ms) / sum(timings), 2),
+        "max_queries": max(queries),
+        "query_budget": budget,
+    }
+
+
+@pytest.fixture
+def bench_user(db):
+    from django.contrib.auth.models import User
+
+    return User.objects.get(username=BENCH_USERNAME)
+
+
+@pytest.fixture
+def bench(client, bench_user):
+    client.force_login(bench_user)
+    return Bench(client)
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not any(name != "_meta" for name in _results):
+        return
+    meta = {
+        **_results.pop("_meta", {}),
+        "revision": _git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "travelers": BENCH_TRAVELERS,
+        "trips": BENCH_TRIPS,
+        "seed": BENCH_SEED,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+    }
+    with open(BENCH_RESULTS, "w") as fh:
+        json.dump({"meta": meta, "endpoints": _results}, fh, indent=2, sort_keys=True)
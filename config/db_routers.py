@@ -0,0 +1,37 @@
+"""
+Database routers for the project.
+
+ReadReplicaRouter sends ORM reads to the read-only ``replica`` alias when
+it is configured (see SQLITE_READ_REPLICA in settings), so GET-heavy
+viewsets don't queue behind writers on the default connection.
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+READ_REPLICA_ALIAS = "replica"
+
+
+class ReadReplicaRouter:
+    """
+    Route reads to the replica, writes and migrations to default.
+
+    Reads stay on default while a transaction is open there, so code
+    inside ``transaction.atomic()`` sees its own uncommitted writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        if READ_REPLICA_ALIAS not in settings.DATABASES:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return READ_REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases point at the same database file.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -47,6 +47,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so timings and metrics include the other middleware
+    # (trips/instrumentation.py, trips/metrics.py)
+    "trips.instrumentation.RequestTimingMiddleware",
+    "trips.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -86,6 +90,58 @@ DATABASES = {
     }
 }
 
+# Production SQLite mode (SQLITE_PRODUCTION=True):
+# - WAL lets readers run concurrently with the single writer
+# - synchronous=NORMAL is durable across app crashes in WAL mode
+# - busy_timeout waits for the write lock instead of failing with
+#   "database is locked"; BEGIN IMMEDIATE takes the lock up front so
+#   transactions never fail upgrading from a read lock
+# - persistent connections keep the page cache and mmap warm
+# SQLITE_READ_REPLICA=True adds a read-only "replica" alias on the same
+# file; config.db_routers sends reads there outside write transactions.
+
+SQLITE_PRODUCTION = os.environ.get("SQLITE_PRODUCTION", "False").lower() in ("true", "1", "yes")
+SQLITE_READ_REPLICA = os.environ.get("SQLITE_READ_REPLICA", "False").lower() in ("true", "1", "yes")
+
+SQLITE_READ_PRAGMAS = (
+    "PRAGMA mmap_size=268435456;"  # 256 MiB
+    "PRAGMA cache_size=-65536;"  # 64 MiB
+    "PRAGMA busy_timeout=5000;"
+    "PRAGMA temp_store=MEMORY;"
+)
+SQLITE_INIT_COMMAND = (
+    "PRAGMA journal_mode=WAL;"
+    "PRAGMA synchronous=NORMAL;"
+    + SQLITE_READ_PRAGMAS
+)
+
+if SQLITE_PRODUCTION:
+    DATABASES["default"].update({
+        "CONN_MAX_AGE": int(os.environ.get("CONN_MAX_AGE", "600")),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "init_command": SQLITE_INIT_COMMAND,
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 5,
+        },
+    })
+
+    if SQLITE_READ_REPLICA:
+        DATABASES["replica"] = {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": f"file:{DATABASES['default']['NAME']}?mode=ro",
+            "CONN_MAX_AGE": DATABASES["default"]["CONN_MAX_AGE"],
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                "uri": True,
+                "init_command": SQLITE_READ_PRAGMAS + "PRAGMA query_only=ON;",
+                "timeout": 5,
+            },
+            "TEST": {"MIRROR": "default"},
+        }
+
+DATABASE_ROUTERS = ["config.db_routers.ReadReplicaRouter"]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -148,3 +204,138 @@ SPECTACULAR_SETTINGS = {
     "VERSION": "1.0.0",
     "SERVE_INCLUDE_SCHEMA": False,
 }
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Set REDIS_URL to share caches between worker processes (requires the
+# redis package); otherwise each process uses its own memory cache.
+
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# External provider result cache (trips/cache.py)
+# BACKEND "locmem" keeps a bounded LRU per process; "django" shares entries
+# between workers through the CACHES alias below.
+
+PROVIDER_CACHE = {
+    "ENABLED": os.environ.get("PROVIDER_CACHE_ENABLED", "True").lower() in ("true", "1", "yes"),
+    "BACKEND": os.environ.get("PROVIDER_CACHE_BACKEND", "locmem"),
+    "CACHE_ALIAS": "default",
+    "MAX_ENTRIES": 1024,
+    # Seconds an entry is fresh, then how long it may be served stale
+    # while a background refresh runs.
+    "TTL": {"flights": 300, "hotels": 900},
+    "STALE_TTL": {"flights": 600, "hotels": 1800},
+}
+
+# Pooled HTTP client for provider APIs (trips/http_client.py)
+# POOL_MAXSIZE should be at least the number of threads per worker.
+
+PROVIDER_HTTP = {
+    "POOL_CONNECTIONS": 4,
+    "POOL_MAXSIZE": int(os.environ.get("PROVIDER_HTTP_POOL_MAXSIZE", "16")),
+    "POOL_BLOCK": False,
+}
+
+# Coalescing of identical concurrent provider searches (trips/concurrency.py)
+# CROSS_PROCESS adds a lock in CACHES[CACHE_ALIAS]; it only helps with a
+# cache shared between workers (and PROVIDER_CACHE BACKEND="django").
+
+PROVIDER_COALESCING = {
+    "ENABLED": True,
+    "CROSS_PROCESS": os.environ.get("PROVIDER_COALESCING_CROSS_PROCESS", "False").lower() in ("true", "1", "yes"),
+    "CACHE_ALIAS": "default",
+    "LOCK_TIMEOUT": 10,
+}
+
+# Thread pool for parallel provider calls (trips/concurrency.py)
+# QUOTE_TIMEOUT is the shared deadline, in seconds, for /api/trips/{id}/quote/.
+# BATCH_* bound /api/trips/search_flights/batch/: searches in flight per
+# request (a timed-out search holds its slot until it returns), seconds
+# per search counted from its submission to the pool, and queries per
+# request.
+
+PROVIDER_CONCURRENCY = {
+    "MAX_WORKERS": int(os.environ.get("PROVIDER_MAX_WORKERS", "16")),
+    "QUOTE_TIMEOUT": 5,
+    "BATCH_CONCURRENCY": 8,
+    "BATCH_TIMEOUT": 5,
+    "BATCH_MAX_QUERIES": 100,
+}
+
+# Cache of serialized trip detail representations (trips/representations.py)
+# Entries are keyed by version (ETag), so they are never served stale even
+# with a per-process cache; point CACHE_ALIAS at a shared backend (see
+# CACHES) so workers share hits.
+
+REPRESENTATION_CACHE = {
+    "ENABLED": os.environ.get("REPRESENTATION_CACHE_ENABLED", "True").lower() in ("true", "1", "yes"),
+    "CACHE_ALIAS": "default",
+    "TIMEOUT": 3600,
+    "VERSION": 1,
+}
+
+# Per-request SQL/serializer/provider timings (trips/instrumentation.py)
+# Sent as a Server-Timing header and, with LOG_REQUESTS, logged on
+# "trips.requests" (INFO); statements slower than SLOW_QUERY_MS go to
+# "trips.slow_queries".
+
+INSTRUMENTATION = {
+    "ENABLED": os.environ.get("INSTRUMENTATION_ENABLED", "True").lower() in ("true", "1", "yes"),
+    "SERVER_TIMING": True,
+    "LOG_REQUESTS": os.environ.get("LOG_REQUESTS", "False").lower() in ("true", "1", "yes"),
+    "SLOW_QUERY_MS": int(os.environ.get("SLOW_QUERY_MS", "100")),
+}
+
+
+# Prometheus metrics served at /metrics (trips/metrics.py)
+# With several worker processes set METRICS_DIR to a directory they all
+# share (emptied when the server starts) so every scrape sees the totals
+# of all workers; without it each process reports only its own.
+
+METRICS = {
+    "ENABLED": os.environ.get("METRICS_ENABLED", "True").lower() in ("true", "1", "yes"),
+    "DIRECTORY": os.environ.get("METRICS_DIR") or None,
+    "TOKEN": os.environ.get("METRICS_TOKEN") or None,
+}
+
+
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+# One line per request is logged on "trips.requests" when
+# INSTRUMENTATION["LOG_REQUESTS"] is set (LOG_REQUESTS=True).
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "plain": {"format": "%(asctime)s %(levelname)s %(name)s %(message)s"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "plain"},
+    },
+    "loggers": {
+        "trips.requests": {
+            "handlers": ["console"],
+            "level": os.environ.get("REQUEST_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+        "trips.slow_queries": {
+            "handlers": ["console"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+    },
+}
@@ -24,16 +24,19 @@ from drf_spectacular.views import (
 )
 from rest_framework.routers import DefaultRouter
 
-from trips.views_api import TravelerViewSet, TripViewSet
+from trips.views import metrics
+from trips.views_api import ReportViewSet, TravelerViewSet, TripViewSet
 
 router = DefaultRouter()
 router.register("trips", TripViewSet, basename="trip")
 router.register("travelers", TravelerViewSet)
+router.register("reports", ReportViewSet, basename="report")
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include(router.urls)),
     path("trips/", include("trips.urls")),
+    path("metrics", metrics, name="metrics"),
     # API Documentation
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path("api/docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
@@ -10,6 +10,8 @@ from django.contrib import admin
 from django.utils.html import format_html
 
 from .models import Traveler, Trip
+from .search import search
+from .workflow import apply_transition
 
 
 @admin.register(Traveler)
@@ -18,29 +20,28 @@ class TravelerAdmin(admin.ModelAdmin):
     Admin configuration for Traveler model.
 
     Features:
-    - Searchable by name and email
+    - Searchable by name and email (full-text index)
     - Filterable by department
-    - Displays trip count for each traveler
+    - Displays the denormalized trip count for each traveler
     """
 
-    list_display = ["full_name", "email", "department", "trip_count", "created_at"]
+    list_display = ["full_name", "email", "department", "trips_display", "created_at"]
     list_filter = ["department", "created_at"]
     search_fields = ["first_name", "last_name", "email"]
     ordering = ["last_name", "first_name"]
 
-    readonly_fields = ["created_at"]
+    readonly_fields = ["trip_count", "created_at"]
 
     fieldsets = (
         ("Personal Information", {"fields": ("first_name", "last_name", "email")}),
         ("Work Information", {"fields": ("department",)}),
-        ("Metadata", {"fields": ("created_at",), "classes": ("collapse",)}),
+        ("Metadata", {"fields": ("trip_count", "created_at"), "classes": ("collapse",)}),
     )
 
-    def trip_count(self, obj):
-        """Display the number of trips for this traveler."""
-        return obj.trips.count()
-
-    trip_count.short_description = "Trips"
+    @admin.display(description="Trips", ordering="trip_count")
+    def trips_display(self, obj):
+        """Display the denormalized trip count (no per-row query)."""
+        return obj.trip_count
 
     def full_name(self, obj):
         """Display full name as a single column."""
@@ -49,6 +50,10 @@ class TravelerAdmin(admin.ModelAdmin):
     full_name.short_description = "Name"
     full_name.admin_order_field = "last_name"
 
+    def get_search_results(self, request, queryset, search_term):
+        """Search the full-text index instead of LIKE '%term%' scans."""
+        return search(queryset, search_term), False
+
 
 @admin.register(Trip)
 class TripAdmin(admin.ModelAdmin):
@@ -58,6 +63,7 @@ class TripAdmin(admin.ModelAdmin):
     Features:
     - Color-coded status display
     - Quick filters for status and dates
+    - Full-text search over title, destination and traveler
     - Inline editing of common fields
     - Custom actions for bulk approval/rejection
     """
@@ -73,6 +79,8 @@ class TripAdmin(admin.ModelAdmin):
         "created_at",
     ]
     list_filter = ["status", "start_date", "destination"]
+    # Shows the search box; matching uses the full-text index
+    # (get_search_results).
     search_fields = ["title", "destination", "traveler__first_name", "traveler__last_name"]
     date_hierarchy = "start_date"
     ordering = ["-created_at"]
@@ -114,14 +122,18 @@ class TripAdmin(admin.ModelAdmin):
 
     duration_display.short_description = "Duration"
 
+    def get_search_results(self, request, queryset, search_term):
+        """Search the full-text index instead of LIKE '%term%' joins."""
+        return search(queryset, search_term), False
+
     @admin.action(description="Approve selected trips")
     def approve_trips(self, request, queryset):
         """Bulk approve pending trips."""
-        updated = queryset.filter(status="pending").update(status="approved")
+        updated = apply_transition(queryset, "approve")
         self.message_user(request, f"{updated} trip(s) approved.")
 
     @admin.action(description="Reject selected trips")
     def reject_trips(self, request, queryset):
         """Bulk reject pending trips."""
-        updated = queryset.filter(status="pending").update(status="rejected")
+        updated = apply_transition(queryset, "reject")
         self.message_user(request, f"{updated} trip(s) rejected.")
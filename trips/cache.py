@@ -0,0 +1,244 @@
+"""
+Result caching for external provider calls.
+
+Wraps FlightService and HotelService lookups in a TTL cache with
+stale-while-revalidate semantics:
+
+- fresh entries are returned directly
+- stale entries (past TTL but within STALE_TTL) are returned immediately
+  while a single background refresh fetches a new value
+- missing or expired entries are fetched synchronously
+
+Two storage backends are available, selected by ``PROVIDER_CACHE``:
+
+- ``locmem``: per-process, bounded LRU (default)
+- ``django``: any cache configured in ``CACHES``, shared between workers
+"""
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    "ENABLED": True,
+    "BACKEND": "locmem",
+    "CACHE_ALIAS": "default",
+    "MAX_ENTRIES": 1024,
+    "TTL": {"flights": 300, "hotels": 900},
+    "STALE_TTL": {"flights": 600, "hotels": 1800},
+}
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    fresh_until: float
+    stale_until: float
+
+
+class LocMemBackend:
+    """Thread-safe, bounded LRU store local to the current process."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def acquire_refresh(self, key: str, timeout: float) -> bool:
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def release_refresh(self, key: str) -> None:
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DjangoCacheBackend:
+    """
+    Store entries in a Django cache so all workers share them.
+
+    The refresh lock uses ``cache.add`` so only one process refreshes a
+    given stale key at a time.
+    """
+
+    def __init__(self, alias: str = "default", key_prefix: str = "provider"):
+        self.alias = alias
+        self.key_prefix = key_prefix
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _key(self, key: str) -> str:
+        return f"{self.key_prefix}:{key}"
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        raw = self.cache.get(self._key(key))
+        return CacheEntry(*raw) if raw is not None else None
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        timeout = max(1, math.ceil(entry.stale_until - time.time()))
+        self.cache.set(self._key(key), tuple(entry), timeout)
+
+    def acquire_refresh(self, key: str, timeout: float) -> bool:
+        return self.cache.add(self._key(key) + ":refresh", 1, math.ceil(timeout))
+
+    def release_refresh(self, key: str) -> None:
+        self.cache.delete(self._key(key) + ":refresh")
+
+
+def _spawn_thread(fn: Callable[[], None]) -> None:
+    threading.Thread(target=fn, daemon=True).start()
+
+
+class ResultCache:
+    """
+    TTL cache with stale-while-revalidate and hit/miss/stale counters.
+
+    ``None`` results are treated as failures and never cached.
+    Cached values are shared between callers and must not be mutated.
+    """
+
+    def __init__(
+        self,
+        backend,
+        ttl: float,
+        stale_ttl: float = 0,
+        clock: Callable[[], float] = time.time,
+        spawn: Callable[[Callable[[], None]], None] = _spawn_thread,
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.clock = clock
+        self.spawn = spawn
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "refreshes": 0, "refresh_errors": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def set(self, key: str, value: Any) -> None:
+        now = self.clock()
+        self.backend.set(key, CacheEntry(value, now + self.ttl, now + self.ttl + self.stale_ttl))
+
+    def peek(self, key: str) -> Any:
+        """Return the fresh value for ``key`` without counting or refreshing."""
+        entry = self.backend.get(key)
+        if entry is not None and self.clock() < entry.fresh_until:
+            return entry.value
+        return None
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for ``key``, computing it if needed."""
+        entry = self.backend.get(key)
+        now = self.clock()
+
+        if entry is not None and now < entry.fresh_until:
+            self._count("hits")
+            return entry.value
+
+        if entry is not None and now < entry.stale_until:
+            self._count("stale")
+            self._refresh(key, compute)
+            return entry.value
+
+        self._count("misses")
+        value = compute()
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def _refresh(self, key: str, compute: Callable[[], Any]) -> None:
+        if not self.backend.acquire_refresh(key, timeout=max(self.ttl, 1)):
+            return
+
+        def run():
+            try:
+                value = compute()
+                if value is not None:
+                    self.set(key, value)
+                self._count("refreshes")
+            except Exception:
+                self._count("refresh_errors")
+                logger.exception(f"Background refresh failed for {key}")
+            finally:
+                self.backend.release_refresh(key)
+
+        self.spawn(run)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache_settings() -> dict:
+    return {**DEFAULT_SETTINGS, **getattr(settings, "PROVIDER_CACHE", {})}
+
+
+def get_result_cache(namespace: str) -> Optional[ResultCache]:
+    """
+    Return the process-wide cache for a provider namespace.
+
+    Returns None if provider caching is disabled.
+    """
+    config = get_cache_settings()
+    if not config["ENABLED"]:
+        return None
+
+    with _caches_lock:
+        if namespace not in _caches:
+            if config["BACKEND"] == "django":
+                backend = DjangoCacheBackend(config["CACHE_ALIAS"], key_prefix=f"provider:{namespace}")
+            else:
+                backend = LocMemBackend(config["MAX_ENTRIES"])
+            _caches[namespace] = ResultCache(
+                backend,
+                ttl=config["TTL"][namespace],
+                stale_ttl=config["STALE_TTL"].get(namespace, 0),
+            )
+        return _caches[namespace]
+
+
+def reset_result_caches() -> None:
+    """Drop all process-wide caches (used by tests and settings changes)."""
+    with _caches_lock:
+        _caches.clear()
+
+
+def cache_stats() -> dict:
+    """Return hit/miss/stale counters for every active provider cache."""
+    with _caches_lock:
+        return {namespace: cache.stats() for namespace, cache in _caches.items()}
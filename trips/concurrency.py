@@ -0,0 +1,293 @@
+"""
+Concurrency helpers for provider calls.
+
+A shared thread pool (``get_provider_executor``) runs independent
+provider calls in parallel; ``run_parallel`` waits for them under one
+deadline and returns whatever finished in time, and ``iter_bounded``
+yields results as they complete with a cap on calls in flight.
+
+SingleFlight coalesces identical concurrent calls: the first caller for a
+key (the leader) runs the function, later callers for the same key wait
+and receive the leader's result or exception.
+
+With a lock cache configured, leaders in different processes also
+coordinate: only the process holding the ``cache.add`` lock calls
+upstream, while the others poll a shared lookup (normally the provider
+result cache) until the value appears.
+"""
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+EXECUTOR_DEFAULT_SETTINGS = {
+    "MAX_WORKERS": 16,
+    "QUOTE_TIMEOUT": 5,
+    "BATCH_CONCURRENCY": 8,
+    "BATCH_TIMEOUT": 5,
+    "BATCH_MAX_QUERIES": 100,
+}
+
+DEFAULT_SETTINGS = {
+    "ENABLED": True,
+    "CROSS_PROCESS": False,
+    "CACHE_ALIAS": "default",
+    "LOCK_TIMEOUT": 10,
+    "POLL_INTERVAL": 0.05,
+}
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Per-process request coalescer with an optional cross-process lock.
+
+    Args:
+        lock_cache_alias: CACHES alias used for the cross-process lock,
+            or None to coalesce within this process only
+        lock_timeout: Seconds before a held lock expires
+        poll_interval: Seconds between shared lookups while another
+            process holds the lock
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        lock_cache_alias: Optional[str] = None,
+        lock_timeout: float = 10,
+        poll_interval: float = 0.05,
+    ):
+        self.name = name
+        self.lock_cache_alias = lock_cache_alias
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "coalesced": 0, "remote_waits": 0}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "in_flight": len(self._calls)}
+
+    def do(
+        self,
+        key: str,
+        fn: Callable[[], Any],
+        lookup: Optional[Callable[[], Any]] = None,
+    ) -> Any:
+        """
+        Run ``fn`` once for all concurrent callers of ``key``.
+
+        Args:
+            key: Normalized call key
+            fn: Function performing the upstream call
+            lookup: Optional shared-store read used while another process
+                holds the cross-process lock
+
+        Returns:
+            The leader's result (its exception is re-raised to every caller)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats["leaders"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run(key, fn, lookup)
+        except Exception as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.result
+
+    def _run(self, key, fn, lookup):
+        if self.lock_cache_alias is None:
+            return fn()
+
+        cache = caches[self.lock_cache_alias]
+        lock_key = f"singleflight:{self.name}:{key}"
+        if not cache.add(lock_key, 1, self.lock_timeout):
+            with self._lock:
+                self._stats["remote_waits"] += 1
+            give_up_at = time.monotonic() + self.lock_timeout
+            while time.monotonic() < give_up_at:
+                time.sleep(self.poll_interval)
+                if lookup is not None:
+                    value = lookup()
+                    if value is not None:
+                        return value
+                if cache.get(lock_key) is None:
+                    break
+            # Remote leader finished without a shared result, or timed out.
+            return fn()
+
+        try:
+            return fn()
+        finally:
+            cache.delete(lock_key)
+
+
+_coalescers = {}
+_coalescers_lock = threading.Lock()
+
+
+def get_single_flight(name: str) -> Optional[SingleFlight]:
+    """
+    Return the process-wide coalescer for ``name``.
+
+    Returns None if coalescing is disabled in PROVIDER_COALESCING.
+    """
+    config = {**DEFAULT_SETTINGS, **getattr(settings, "PROVIDER_COALESCING", {})}
+    if not config["ENABLED"]:
+        return None
+
+    with _coalescers_lock:
+        if name not in _coalescers:
+            _coalescers[name] = SingleFlight(
+                name,
+                lock_cache_alias=config["CACHE_ALIAS"] if config["CROSS_PROCESS"] else None,
+                lock_timeout=config["LOCK_TIMEOUT"],
+                poll_interval=config["POLL_INTERVAL"],
+            )
+        return _coalescers[name]
+
+
+def single_flight_stats() -> dict:
+    with _coalescers_lock:
+        return {name: coalescer.stats() for name, coalescer in _coalescers.items()}
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_concurrency_settings() -> dict:
+    return {**EXECUTOR_DEFAULT_SETTINGS, **getattr(settings, "PROVIDER_CONCURRENCY", {})}
+
+
+def get_provider_executor() -> ThreadPoolExecutor:
+    """Return the process-wide thread pool for provider calls."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=get_concurrency_settings()["MAX_WORKERS"],
+                thread_name_prefix="provider",
+            )
+        return _executor
+
+
+def _submit(executor, fn):
+    # Run in a copy of the caller's context so request instrumentation
+    # (trips.instrumentation) also sees calls made on the pool.
+    return executor.submit(contextvars.copy_context().run, fn)
+
+
+def run_parallel(
+    calls: Dict[str, Callable[[], Any]],
+    timeout: float,
+) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    Run named calls on the provider pool and wait up to ``timeout`` seconds.
+
+    Calls still running at the deadline are left to finish in the
+    background (their results still warm the provider cache).
+
+    Returns:
+        (results, errors): results of calls that finished, and an error
+        message for each call that raised or missed the deadline
+    """
+    executor = get_provider_executor()
+    futures = {name: _submit(executor, fn) for name, fn in calls.items()}
+    wait(futures.values(), timeout=timeout)
+
+    results, errors = {}, {}
+    for name, future in futures.items():
+        if not future.done():
+            errors[name] = "timed out"
+        elif future.exception() is not None:
+            errors[name] = str(future.exception()) or type(future.exception()).__name__
+        else:
+            results[name] = future.result()
+    return results, errors
+
+
+def iter_bounded(
+    calls: Dict[str, Callable[[], Any]],
+    limit: int,
+    timeout: float,
+) -> Iterator[Tuple[str, Any, Optional[str]]]:
+    """
+    Run named calls with at most ``limit`` in flight, yielding as they finish.
+
+    A call is reported as timed out ``timeout`` seconds after it is
+    submitted to the provider pool, which includes any time spent
+    waiting there for a free thread. A running call cannot be stopped,
+    so a timed-out call keeps its slot until it actually returns: no
+    more than ``limit`` calls of this iteration ever run at once, and
+    the remaining calls start later if timed-out ones are slow to finish.
+
+    Yields:
+        (name, result, error) tuples in completion order; ``error`` is
+        None on success, otherwise a message (result is then None)
+    """
+    executor = get_provider_executor()
+    limit = max(limit, 1)
+    queued = deque(calls.items())
+    running = {}
+    abandoned = set()  # timed out, but still holding a slot
+
+    def fill():
+        while queued and len(running) + len(abandoned) < limit:
+            name, fn = queued.popleft()
+            running[_submit(executor, fn)] = (name, time.monotonic() + timeout)
+
+    fill()
+    while running or (queued and abandoned):
+        if running:
+            nearest = min(deadline for _, deadline in running.values())
+            remaining = max(nearest - time.monotonic(), 0)
+        else:
+            remaining = None  # only waiting for a slot to free up
+        wait(set(running) | abandoned, timeout=remaining, return_when=FIRST_COMPLETED)
+        abandoned = {future for future in abandoned if not future.done()}
+        now = time.monotonic()
+        for future, (name, deadline) in list(running.items()):
+            if future.done():
+                del running[future]
+                error = future.exception()
+                if error is not None:
+                    yield name, None, str(error) or type(error).__name__
+                else:
+                    yield name, future.result(), None
+            elif now >= deadline:
+                del running[future]
+                # Only drops the call if it has not started yet
+                if not future.cancel():
+                    abandoned.add(future)
+                yield name, None, "timed out"
+        fill()
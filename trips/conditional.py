@@ -0,0 +1,139 @@
+"""
+Conditional GET (ETag / Last-Modified) for the API viewsets.
+
+Validators are derived from ``updated_at`` before anything is serialized:
+
+- detail: the object's ``updated_at``, plus its traveler's when the
+  representation includes traveler fields
+- list: the id and ``updated_at`` (and the traveler's when joined) of
+  each row on the page, plus the pagination links and total count, so
+  the cost is one page read however many rows match
+
+Ids catch inserts and deletes that shift the page, ``updated_at``
+catches every other change. The ETag also hashes the full request path,
+so each page, ``?fields=``, ``?expand=`` and ``?q=`` variant gets its own
+tag. A matching ``If-None-Match`` or ``If-Modified-Since`` returns 304
+without serializing anything.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .instrumentation import timed
+from .representations import get_representation_cache
+
+
+def make_etag(request, *parts):
+    """Strong ETag over the request path and the given validator parts."""
+    key = "|".join([request.get_full_path(), *map(str, parts)])
+    return f'"{hashlib.sha256(key.encode()).hexdigest()[:32]}"'
+
+
+def _last_modified(values):
+    """Latest of ``values`` as a POSIX timestamp (None if all are None)."""
+    values = [value for value in values if value is not None]
+    return int(max(values).timestamp()) if values else None
+
+
+def _get_path(item, path):
+    """Read ``a__b`` from a model instance or a named values_list row."""
+    if isinstance(item, tuple):
+        return getattr(item, path)
+    for attr in path.split("__"):
+        item = getattr(item, attr)
+    return item
+
+
+def _joins_traveler(queryset):
+    select_related = queryset.query.select_related
+    return isinstance(select_related, dict) and "traveler" in select_related
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag and Last-Modified to ``list`` and ``retrieve``.
+
+    The model needs an ``updated_at`` field. When the queryset joins the
+    traveler (``select_related('traveler')``), the traveler's
+    ``updated_at`` is part of the validators too.
+
+    Set ``representation_cache_name`` to cache detail representations
+    under their ETag (trips.representations).
+    """
+
+    representation_cache_name = None
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        modified = [instance.updated_at]
+        if getattr(instance, "traveler_id", None) and _joins_traveler(self.get_queryset()):
+            modified.append(instance.traveler.updated_at)
+
+        etag = make_etag(request, instance.pk, *modified)
+        last_modified = _last_modified(modified)
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        cache = self.get_representation_cache()
+        data = cache.get(etag) if cache is not None else None
+        if data is None:
+            with timed("serialize"):
+                data = self.get_serializer(instance).data
+            if cache is not None:
+                cache.set(etag, data)
+        return self.add_validators(Response(data), etag, last_modified)
+
+    def get_representation_cache(self):
+        if self.representation_cache_name is None:
+            return None
+        return get_representation_cache(self.representation_cache_name)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        paths = self.list_validator_paths(queryset)
+        items = self.get_list_items(queryset, paths)
+        page = self.paginate_queryset(items)
+        if page is not None:
+            items = page
+
+        validators = [tuple(_get_path(item, path) for path in paths) for item in items]
+        pagination = self.paginator.get_etag_parts() if page is not None else []
+        etag = make_etag(request, *validators, *pagination)
+        last_modified = _last_modified([value for row in validators for value in row[1:]])
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        with timed("serialize"):
+            data = self.render_items(items)
+        if page is not None:
+            response = self.get_paginated_response(data)
+        else:
+            response = Response(data)
+        return self.add_validators(response, etag, last_modified)
+
+    def list_validator_paths(self, queryset):
+        """Paths read from every listed row: pk first, then timestamps."""
+        paths = [queryset.model._meta.pk.attname, "updated_at"]
+        if _joins_traveler(queryset):
+            paths.append("traveler__updated_at")
+        return paths
+
+    def get_list_items(self, queryset, validator_paths):
+        """What the list paginates (trips.rendering reads value rows)."""
+        return queryset
+
+    def render_items(self, items):
+        return self.get_serializer(items, many=True).data
+
+    @staticmethod
+    def add_validators(response, etag, last_modified):
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        # Clients may store the response but must revalidate every time.
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
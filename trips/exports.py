@@ -0,0 +1,110 @@
+"""
+Streaming trip exports.
+
+Rows are read with ``values_list().iterator()`` so the database cursor is
+consumed in chunks and no model instances are built. Each row is encoded
+and sent as soon as it is read, so worker memory stays flat regardless of
+how many trips match.
+"""
+import csv
+import json
+
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from .models import Trip
+
+EXPORT_FIELDS = [
+    ("id", "id"),
+    ("title", "title"),
+    ("destination", "destination"),
+    ("start_date", "start_date"),
+    ("end_date", "end_date"),
+    ("status", "status"),
+    ("estimated_cost", "estimated_cost"),
+    ("traveler_id", "traveler_id"),
+    ("traveler_email", "traveler__email"),
+    ("traveler_department", "traveler__department"),
+    ("created_at", "created_at"),
+    ("updated_at", "updated_at"),
+]
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+CHUNK_SIZE = 2000
+
+
+def filter_export_queryset(queryset, params):
+    """
+    Apply export filters from query parameters.
+
+    Supported parameters:
+        status: One status or a comma-separated list
+        start_from / start_to: Inclusive bounds on start_date (YYYY-MM-DD)
+        department: Exact traveler department
+
+    Raises:
+        ValidationError: If a date or status is invalid
+    """
+    statuses = [s for s in params.get("status", "").split(",") if s]
+    if statuses:
+        valid = {choice for choice, _ in Trip.STATUS_CHOICES}
+        unknown = set(statuses) - valid
+        if unknown:
+            raise ValidationError({"status": f"Unknown status: {', '.join(sorted(unknown))}"})
+        queryset = queryset.filter(status__in=statuses)
+
+    for param, lookup in (("start_from", "start_date__gte"), ("start_to", "start_date__lte")):
+        value = params.get(param)
+        if value:
+            parsed = parse_date(value)
+            if parsed is None:
+                raise ValidationError({param: "Use YYYY-MM-DD."})
+            queryset = queryset.filter(**{lookup: parsed})
+
+    department = params.get("department")
+    if department:
+        queryset = queryset.filter(traveler__department=department)
+
+    return queryset
+
+
+def export_rows(queryset):
+    """Yield export rows as tuples, reading the cursor in chunks."""
+    columns = [source for _, source in EXPORT_FIELDS]
+    return queryset.order_by("id").values_list(*columns).iterator(chunk_size=CHUNK_SIZE)
+
+
+def _to_text(value):
+    if value is None:
+        return None
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if isinstance(value, (int, str)):
+        return value
+    return str(value)
+
+
+def iter_ndjson(rows):
+    """Encode rows as newline-delimited JSON objects."""
+    names = [name for name, _ in EXPORT_FIELDS]
+    for row in rows:
+        yield json.dumps(dict(zip(names, map(_to_text, row)))) + "\n"
+
+
+class _Echo:
+    """File-like object whose write() returns the value instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    """Encode rows as CSV with a header line."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in EXPORT_FIELDS])
+    for row in rows:
+        yield writer.writerow(["" if v is None else _to_text(v) for v in row])
@@ -0,0 +1,121 @@
+"""
+Shared HTTP client for external provider APIs.
+
+One ``requests.Session`` per process keeps TCP+TLS connections to each
+provider host alive between calls, so only the first request to a host
+pays for the handshake. Pool sizes come from ``PROVIDER_HTTP``.
+
+The session is safe to share between worker threads: the urllib3 pool is
+thread-safe and cookie persistence is disabled, so no per-request state
+lives on the session. A new session is created after ``fork()`` so
+pre-forked gunicorn workers never share sockets with the master.
+"""
+import os
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Callable, Optional
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+DEFAULT_SETTINGS = {
+    "POOL_CONNECTIONS": 4,
+    "POOL_MAXSIZE": 16,
+    "POOL_BLOCK": False,
+}
+
+
+class ProviderHTTPClient:
+    """
+    Lazily-built, fork-aware pooled session with response hooks.
+
+    Args:
+        pool_connections: Number of host pools to keep
+        pool_maxsize: Keep-alive connections per host (match worker threads)
+        pool_block: Block instead of opening extra, unpooled connections
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 4,
+        pool_maxsize: int = 16,
+        pool_block: bool = False,
+    ):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self._hooks = []
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def add_response_hook(self, hook: Callable) -> None:
+        """Register a ``requests`` response hook on every session."""
+        with self._lock:
+            self._hooks.append(hook)
+            if self._session is not None:
+                self._session.hooks["response"].append(hook)
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    self._session = self._build_session()
+                    self._pid = os.getpid()
+        return self._session
+
+    def _build_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+        # Stateless session: nothing leaks between threads or users.
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        session.hooks["response"].extend(self._hooks)
+        return session
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        params: Optional[dict] = None,
+        json: Optional[dict] = None,
+        timeout: float = 10,
+    ) -> requests.Response:
+        """Send a request on the pooled session (gzip is decoded transparently)."""
+        return self.session.request(method, url, params=params, json=json, timeout=timeout)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> ProviderHTTPClient:
+    """Return the process-wide provider HTTP client."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            config = {**DEFAULT_SETTINGS, **getattr(settings, "PROVIDER_HTTP", {})}
+            _client = ProviderHTTPClient(
+                pool_connections=config["POOL_CONNECTIONS"],
+                pool_maxsize=config["POOL_MAXSIZE"],
+                pool_block=config["POOL_BLOCK"],
+            )
+        return _client
@@ -0,0 +1,233 @@
+"""
+Bulk trip import from CSV or NDJSON.
+
+The file is parsed as a stream and processed in chunks. For each chunk:
+
+1. every row is validated with TripImportSerializer (the TripSerializer
+   rules, without a per-row traveler query)
+2. travelers referenced by id or email are resolved in one query
+3. pending and approved rows are checked for overlaps (trips.scheduling)
+   with the traveler's existing blocking trips, in one interval query,
+   and with earlier rows of the file
+4. valid rows are written with bulk_create inside a transaction, together
+   with the Traveler.trip_count and department spend updates that signals
+   would normally do
+
+Invalid rows are skipped and reported with their line number.
+"""
+import csv
+import io
+import json
+from collections import Counter, defaultdict
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from rest_framework.exceptions import ValidationError
+
+from .models import Traveler, Trip
+from .reporting import SpendDeltas, apply_spend_deltas
+from .scheduling import BLOCKING_STATUSES, lock_travelers, overlapping
+from .serializers import TripImportSerializer
+from .signals import adjust_trip_counts
+
+IMPORT_FORMATS = ("csv", "ndjson")
+MAX_REPORTED_ERRORS = 1000
+
+
+def detect_format(filename, default="csv"):
+    """Guess the import format from a file name."""
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if name.endswith(".csv"):
+        return "csv"
+    return default
+
+
+def parse_rows(stream, fmt):
+    """
+    Yield (line_number, row) pairs from a binary or text stream.
+
+    Rows that cannot be parsed are yielded as (line_number, ValidationError).
+    Empty CSV cells are dropped so the field default applies.
+    """
+    if isinstance(stream, io.TextIOBase):
+        text = stream
+    else:
+        text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, {k: v for k, v in row.items() if k and v not in ("", None)}
+    else:
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                yield line_number, ValidationError({"non_field_errors": [f"Invalid JSON: {exc}"]})
+                continue
+            if not isinstance(row, dict):
+                yield line_number, ValidationError({"non_field_errors": ["Expected a JSON object."]})
+                continue
+            yield line_number, row
+
+
+class TripImporter:
+    """
+    Validates and writes parsed rows chunk by chunk.
+
+    Args:
+        chunk_size: Rows per validation batch, traveler lookup and transaction
+        dry_run: Validate and resolve travelers without writing anything
+    """
+
+    def __init__(self, chunk_size=1000, dry_run=False):
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        # A dry run writes nothing, so blocking rows accepted in earlier
+        # chunks are kept here for the overlap check:
+        # traveler_id -> [(label, start_date, end_date)]
+        self._unwritten = defaultdict(list)
+
+    def _error(self, line_number, detail):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": line_number, "errors": detail})
+
+    def run(self, rows):
+        """
+        Import (line_number, row) pairs.
+
+        Returns:
+            Report dict with created/failed counts and per-row errors
+            (the first MAX_REPORTED_ERRORS are listed)
+        """
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self.import_chunk(chunk)
+
+        return {
+            "created": self.created,
+            "failed": self.failed,
+            "dry_run": self.dry_run,
+            "errors": self.errors,
+        }
+
+    def import_chunk(self, chunk):
+        serializer = TripImportSerializer()
+        valid = []
+        for line_number, row in chunk:
+            if isinstance(row, ValidationError):
+                self._error(line_number, row.detail)
+                continue
+            try:
+                valid.append((line_number, serializer.run_validation(row)))
+            except ValidationError as exc:
+                self._error(line_number, exc.detail)
+
+        travelers = self._resolve_travelers(data for _, data in valid)
+
+        trips = []
+        for line_number, data in valid:
+            email = data.pop("traveler_email", None)
+            traveler_id = data.pop("traveler", None)
+            if traveler_id:
+                resolved = travelers["ids"].get(traveler_id)
+            else:
+                resolved = travelers["emails"].get(email.strip().lower())
+            if resolved is None:
+                self._error(line_number, {"traveler": ["Traveler not found."]})
+                continue
+            trips.append((line_number, Trip(traveler_id=resolved, **data)))
+
+        if self.dry_run:
+            trips = self._without_overlaps(trips)
+        elif trips:
+            with transaction.atomic():
+                trips = self._without_overlaps(trips)
+                spend = SpendDeltas()
+                for trip in trips:
+                    spend.add_trip(trip, travelers["departments"][trip.traveler_id])
+                Trip.objects.bulk_create(trips, batch_size=self.chunk_size)
+                adjust_trip_counts(Counter(trip.traveler_id for trip in trips))
+                apply_spend_deltas(spend)
+        self.created += len(trips)
+
+    def _without_overlaps(self, rows):
+        """
+        Drop (and report) pending/approved rows overlapping a blocking trip
+        of the same traveler, or an earlier row of the file.
+
+        Existing trips are read with one query over the chunk's date range;
+        their travelers stay locked until the chunk is written.
+
+        Returns:
+            The Trip instances of the rows kept
+        """
+        blocking = [trip for _, trip in rows if trip.status in BLOCKING_STATUSES]
+        taken = defaultdict(list)
+        if blocking:
+            traveler_ids = {trip.traveler_id for trip in blocking}
+            lock_travelers(list(traveler_ids))
+            existing = overlapping(
+                Trip.objects.filter(traveler_id__in=traveler_ids, status__in=BLOCKING_STATUSES),
+                min(trip.start_date for trip in blocking),
+                max(trip.end_date for trip in blocking),
+            ).order_by().values_list("pk", "traveler_id", "start_date", "end_date")
+            for pk, traveler_id, start_date, end_date in existing:
+                taken[traveler_id].append((str(pk), start_date, end_date))
+
+        kept = []
+        for line_number, trip in rows:
+            if trip.status in BLOCKING_STATUSES:
+                others = taken[trip.traveler_id] + self._unwritten[trip.traveler_id]
+                conflicts = [
+                    label for label, start_date, end_date in others
+                    if start_date <= trip.end_date and end_date >= trip.start_date
+                ]
+                if conflicts:
+                    self._error(line_number, {"non_field_errors": [
+                        "Dates overlap the traveler's pending or approved "
+                        f"trip(s): {', '.join(conflicts[:10])}."
+                    ]})
+                    continue
+                interval = (f"row {line_number}", trip.start_date, trip.end_date)
+                (self._unwritten if self.dry_run else taken)[trip.traveler_id].append(interval)
+            kept.append(trip)
+        return kept
+
+    @staticmethod
+    def _resolve_travelers(rows):
+        """
+        Look up all traveler ids and emails of a chunk in one query.
+
+        Emails match case-insensitively (through the lower(email) index).
+        """
+        ids, emails = set(), set()
+        for data in rows:
+            if data.get("traveler"):
+                ids.add(data["traveler"])
+            elif data.get("traveler_email"):
+                emails.add(data["traveler_email"].strip().lower())
+
+        found = {"ids": {}, "emails": {}, "departments": {}}
+        if ids or emails:
+            matches = Traveler.objects.alias(email_lower=Lower("email")).filter(
+                Q(pk__in=ids) | Q(email_lower__in=emails)
+            ).order_by().values_list("pk", "email", "department")
+            for pk, email, department in matches:
+                found["ids"][pk] = pk
+                found["emails"][email.lower()] = pk
+                found["departments"][pk] = department
+        return found
@@ -0,0 +1,217 @@
+"""
+Per-request instrumentation: SQL, serializer and provider timings.
+
+``RequestTimingMiddleware`` records, for every request:
+
+- the number of SQL statements and the time spent running them, through
+  an execute wrapper on every database connection
+- time spent serializing list and detail responses (trips.conditional)
+- time spent in provider services per namespace (``flights``,
+  ``hotels``), including calls run on the provider thread pool
+
+The totals are sent back in a ``Server-Timing`` header (shown by browser
+dev tools) and, with ``LOG_REQUESTS`` (off by default: one line per
+request is a lot of output), logged as one key=value line on the
+``trips.requests`` logger; the same fields are attached to the record as
+``request_metrics`` for JSON formatters. Statements slower than
+``SLOW_QUERY_MS`` are logged on ``trips.slow_queries`` with their
+normalized SQL and the view that ran them.
+
+Recording costs two ``perf_counter()`` calls and a few additions per
+statement or section, so it can stay on in production. Statements run
+while a streaming response is being consumed are not counted.
+"""
+import logging
+import re
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger("trips.requests")
+slow_query_logger = logging.getLogger("trips.slow_queries")
+
+DEFAULT_SETTINGS = {
+    "ENABLED": True,
+    "SERVER_TIMING": True,
+    "LOG_REQUESTS": False,
+    # Milliseconds; None disables the slow-query log
+    "SLOW_QUERY_MS": 100,
+}
+
+_current: ContextVar[Optional["RequestMetrics"]] = ContextVar("request_metrics", default=None)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def get_instrumentation_settings() -> dict:
+    return {**DEFAULT_SETTINGS, **getattr(settings, "INSTRUMENTATION", {})}
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Collapse a statement to its shape for grouping in logs.
+
+    Literals and placeholders become ``?`` and lists of them (``IN``
+    lists, multi-row ``VALUES``) become ``(...)``.
+    """
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def view_name(request, view_func) -> str:
+    """
+    ``ViewSet.action`` for DRF viewsets, ``View.method`` for other
+    class-based views, otherwise the view's dotted name.
+    """
+    cls = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+    if cls is not None:
+        method = request.method.lower()
+        action = (getattr(view_func, "actions", None) or {}).get(method, method)
+        return f"{cls.__name__}.{action}"
+    return f"{view_func.__module__}.{getattr(view_func, '__qualname__', view_func.__name__)}"
+
+
+class RequestMetrics:
+    """Counters for one request; also the database execute wrapper."""
+
+    def __init__(self, slow_query_seconds: Optional[float] = None):
+        self.slow_query_seconds = slow_query_seconds
+        self.view = None
+        self.queries = 0
+        self.db_time = 0.0
+        # section -> [seconds, calls]
+        self.sections = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.db_time += elapsed
+            if self.slow_query_seconds is not None and elapsed >= self.slow_query_seconds:
+                self._log_slow_query(sql, elapsed, context)
+
+    def _log_slow_query(self, sql, elapsed, context):
+        normalized = normalize_sql(sql)
+        slow_query_logger.warning(
+            f"slow_query duration_ms={elapsed * 1000:.2f} view={self.view} "
+            f"database={context['connection'].alias} sql={normalized}",
+            extra={"slow_query": {
+                "duration_ms": round(elapsed * 1000, 2),
+                "view": self.view,
+                "database": context["connection"].alias,
+                "sql": normalized,
+            }},
+        )
+
+    def add(self, section: str, seconds: float) -> None:
+        # Provider sections may be recorded from pool threads
+        with self._lock:
+            entry = self.sections.setdefault(section, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def server_timing(self, total: float) -> str:
+        metrics = [f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries"']
+        for section, (seconds, calls) in sorted(self.sections.items()):
+            metrics.append(f'{section};dur={seconds * 1000:.2f};desc="{calls} call(s)"')
+        metrics.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(metrics)
+
+    def as_dict(self, total: float) -> dict:
+        fields = {
+            "total_ms": round(total * 1000, 2),
+            "db_queries": self.queries,
+            "db_ms": round(self.db_time * 1000, 2),
+        }
+        for section, (seconds, _) in sorted(self.sections.items()):
+            fields[f"{section}_ms"] = round(seconds * 1000, 2)
+        return fields
+
+
+def current_metrics() -> Optional[RequestMetrics]:
+    """Metrics of the request being handled in this context, if any."""
+    return _current.get()
+
+
+@contextmanager
+def timed(section: str):
+    """Add the time spent in the block to ``section`` of the current request."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add(section, time.perf_counter() - started)
+
+
+class RequestTimingMiddleware:
+    """
+    Records RequestMetrics for each request (see module docstring).
+
+    Put it first in MIDDLEWARE so the total and the query count include
+    the other middleware (sessions, authentication).
+    """
+
+    def __init__(self, get_response):
+        config = get_instrumentation_settings()
+        if not config["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.server_timing = config["SERVER_TIMING"]
+        self.log_requests = config["LOG_REQUESTS"]
+        slow_query_ms = config["SLOW_QUERY_MS"]
+        self.slow_query_seconds = slow_query_ms / 1000 if slow_query_ms is not None else None
+
+    def __call__(self, request):
+        metrics = RequestMetrics(self.slow_query_seconds)
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - started
+
+        if self.server_timing:
+            response["Server-Timing"] = metrics.server_timing(total)
+        if self.log_requests and logger.isEnabledFor(logging.INFO):
+            fields = {
+                "method": request.method,
+                "path": request.path,
+                "view": metrics.view,
+                "status": response.status_code,
+                **metrics.as_dict(total),
+            }
+            logger.info(
+                " ".join(f"{name}={value}" for name, value in fields.items()),
+                extra={"request_metrics": fields},
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.view = view_name(request, view_func)
+        return None
@@ -0,0 +1,57 @@
+"""
+Bulk import trips from a CSV or NDJSON file.
+
+Usage:
+    python manage.py import_trips trips.csv [--format csv|ndjson]
+        [--chunk-size 1000] [--dry-run] [--errors-file errors.ndjson]
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from trips.imports import IMPORT_FORMATS, TripImporter, detect_format, parse_rows
+
+
+class Command(BaseCommand):
+    help = "Import trips in chunks with batched validation and bulk_create."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or NDJSON file to import.")
+        parser.add_argument(
+            "--format",
+            choices=IMPORT_FORMATS,
+            help="File format (default: guessed from the extension, else csv).",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate rows and resolve travelers without writing.",
+        )
+        parser.add_argument(
+            "--errors-file",
+            help="Write the per-row error report to this file as NDJSON.",
+        )
+
+    def handle(self, *args, **options):
+        fmt = options["format"] or detect_format(options["path"])
+        importer = TripImporter(chunk_size=options["chunk_size"], dry_run=options["dry_run"])
+
+        try:
+            with open(options["path"], "rb") as stream:
+                report = importer.run(parse_rows(stream, fmt))
+        except OSError as exc:
+            raise CommandError(f"Cannot read {options['path']}: {exc}")
+
+        if options["errors_file"]:
+            with open(options["errors_file"], "w") as out:
+                for error in report["errors"]:
+                    out.write(json.dumps(error, default=str) + "\n")
+        else:
+            for error in report["errors"][:20]:
+                self.stderr.write(f"row {error['row']}: {error['errors']}")
+
+        verb = "Would create" if options["dry_run"] else "Created"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {report['created']} trip(s); {report['failed']} row(s) failed."
+        ))
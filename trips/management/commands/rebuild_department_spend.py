@@ -0,0 +1,17 @@
+"""
+Recompute the DepartmentSpend rollup table from the trips table.
+
+Usage:
+    python manage.py rebuild_department_spend
+"""
+from django.core.management.base import BaseCommand
+
+from trips.reporting import rebuild_department_spend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the department spend rollup from scratch."
+
+    def handle(self, *args, **options):
+        rows = rebuild_department_spend()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt department spend rollup ({rows} row(s))."))
@@ -0,0 +1,31 @@
+"""
+Recompute the denormalized Traveler.trip_count column.
+
+Usage:
+    python manage.py repair_trip_counts [--dry-run]
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from trips.signals import repair_trip_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute Traveler.trip_count from the trips table and fix any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report drifted travelers without writing any changes.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        with transaction.atomic():
+            drifted = repair_trip_counts(dry_run=dry_run)
+
+        if dry_run:
+            self.stdout.write(f"{drifted} traveler(s) have a drifted trip count.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Repaired trip count for {drifted} traveler(s)."))
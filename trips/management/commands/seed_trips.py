@@ -0,0 +1,121 @@
+"""
+Generate a large synthetic dataset of travelers and trips.
+
+Usage:
+    python manage.py seed_trips [--trips 1000000] [--travelers 10000]
+        [--seed 1] [--departments "Engineering:3,Sales:2"]
+        [--destinations "London:5,Paris"] [--statuses "approved:7,draft:3"]
+        [--length 1-14] [--cost 150-6000] [--cost-missing 0.05]
+        [--start 2020-01-01] [--span-days 2190] [--chunk-size 50000]
+        [--keep-indexes]
+
+Distributions are "value:weight" lists; the same seed and options always
+generate the same rows.
+"""
+import argparse
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from trips.models import Trip
+from trips.seeding import SeedConfig, parse_range, parse_weights, seed, trip_slot_days
+
+
+def _weights(value):
+    try:
+        return parse_weights(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc))
+
+
+def _range(value):
+    try:
+        return parse_range(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc))
+
+
+def _date(value):
+    parsed = parse_date(value)
+    if parsed is None:
+        raise argparse.ArgumentTypeError("Use YYYY-MM-DD.")
+    return parsed
+
+
+class Command(BaseCommand):
+    help = "Insert synthetic travelers and trips with bulk inserts (for local load testing)."
+
+    def add_arguments(self, parser):
+        defaults = SeedConfig()
+        parser.add_argument("--trips", type=int, default=defaults.trips)
+        parser.add_argument("--travelers", type=int, default=defaults.travelers)
+        parser.add_argument("--seed", type=int, default=defaults.seed, help="Random seed.")
+        parser.add_argument("--departments", type=_weights, help="Department weights.")
+        parser.add_argument("--destinations", type=_weights, help="Destination weights.")
+        parser.add_argument("--statuses", type=_weights, help="Status weights.")
+        parser.add_argument(
+            "--length", type=_range, default=defaults.length_days,
+            help="Trip length range in days, e.g. 1-14.",
+        )
+        parser.add_argument(
+            "--cost", type=_range, default=defaults.cost,
+            help="Estimated cost range, e.g. 150-6000.",
+        )
+        parser.add_argument(
+            "--cost-missing", type=float, default=defaults.cost_missing,
+            help="Share of trips without an estimated cost (0-1).",
+        )
+        parser.add_argument(
+            "--start", type=_date, default=defaults.start_from,
+            help="Earliest start date (YYYY-MM-DD).",
+        )
+        parser.add_argument(
+            "--span-days", type=int, default=defaults.span_days,
+            help="Start dates are spread over this many days.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=defaults.chunk_size)
+        parser.add_argument(
+            "--keep-indexes",
+            action="store_true",
+            help="Maintain the trip indexes during the insert instead of rebuilding them.",
+        )
+
+    def handle(self, *args, **options):
+        defaults = SeedConfig()
+        statuses = options["statuses"] or defaults.statuses
+        valid = {choice for choice, _ in Trip.STATUS_CHOICES}
+        unknown = set(statuses) - valid
+        if unknown:
+            raise CommandError(f"Unknown status: {', '.join(sorted(unknown))}")
+        if options["travelers"] < 1 and options["trips"]:
+            raise CommandError("Trips need at least one traveler.")
+        if options["length"][1] > Trip.MAX_DURATION_DAYS:
+            raise CommandError(f"Trips can last at most {Trip.MAX_DURATION_DAYS} days.")
+
+        config = SeedConfig(
+            trips=options["trips"],
+            travelers=options["travelers"],
+            seed=options["seed"],
+            departments=options["departments"] or defaults.departments,
+            destinations=options["destinations"] or defaults.destinations,
+            statuses=statuses,
+            length_days=tuple(int(days) for days in options["length"]),
+            cost=options["cost"],
+            cost_missing=options["cost_missing"],
+            start_from=options["start"],
+            span_days=options["span_days"],
+            chunk_size=options["chunk_size"],
+            defer_indexes=not options["keep_indexes"],
+        )
+        try:
+            trip_slot_days(config)
+        except ValueError as exc:
+            raise CommandError(f"{exc}; use more travelers, a longer span or shorter trips.")
+
+        log = self.stdout.write if options["verbosity"] > 1 else None
+        result = seed(config, log=log)
+
+        timings = ", ".join(f"{name} {seconds}s" for name, seconds in result["seconds"].items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {result['travelers']} traveler(s) and {result['trips']} trip(s) ({timings})."
+        ))
@@ -0,0 +1,409 @@
+"""
+Prometheus metrics shared between worker processes.
+
+Counters and histograms are recorded into shards that each have a single
+writing thread, so the hot path takes no lock. A thread takes a shard the
+first time it records and hands it back when it exits; the next new
+thread reuses it, so a process holds as many shards as it ever had
+recording threads at once, not one per thread it started.
+``render_metrics`` sums every shard into the Prometheus text format
+served at ``/metrics``.
+
+Shards live in one of two places, selected by ``METRICS["DIRECTORY"]``:
+
+- a directory: each shard is a memory-mapped file
+  (``<pid>-<random>.db``, never opened over an existing file), so a
+  scrape answered by any worker sees the totals of all of them. Empty
+  the directory when the server starts; files of exited workers are
+  kept so counters never go backwards while the server runs.
+- None: shards are dicts in this process (runserver, tests)
+
+Shard file layout: an 8-byte header holding the number of bytes in use,
+then entries of (uint32 key length, JSON key padded to 8 bytes, float64
+value). A writer fills in a new entry before moving the header, so
+readers never see a partial one.
+
+Histogram buckets are stored per bucket and made cumulative when
+rendered, so an observation is three increments whatever the bucket
+count.
+"""
+import glob
+import itertools
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+from django.conf import settings
+
+from .instrumentation import current_metrics, view_name
+
+DEFAULT_SETTINGS = {
+    "ENABLED": True,
+    "DIRECTORY": None,
+    # When set, /metrics requires "Authorization: Bearer <TOKEN>"
+    "TOKEN": None,
+}
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_HEADER = struct.Struct("<I4x")
+_KEY_LENGTH = struct.Struct("<I")
+_VALUE = struct.Struct("<d")
+
+Key = Tuple[str, Tuple[str, ...]]
+
+
+def get_metrics_settings() -> dict:
+    return {**DEFAULT_SETTINGS, **getattr(settings, "METRICS", {})}
+
+
+class _MemoryShard:
+    """Values of one writing thread at a time, kept in this process."""
+
+    def __init__(self):
+        self.values = {}
+
+    def inc(self, key: Key, amount: float) -> None:
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def items(self):
+        return list(self.values.items())
+
+
+class _FileShard:
+    """Values of one writing thread at a time in a memory-mapped file."""
+
+    INITIAL_SIZE = 64 * 1024
+
+    def __init__(self, path: str):
+        # "x": a file left by an exited worker whose pid was reused keeps
+        # its counts instead of being truncated
+        self._file = open(path, "x+b")
+        self._size = self.INITIAL_SIZE
+        self._file.truncate(self._size)
+        self._map = mmap.mmap(self._file.fileno(), self._size)
+        self._used = _HEADER.size
+        _HEADER.pack_into(self._map, 0, self._used)
+        self._offsets = {}
+
+    def inc(self, key: Key, amount: float) -> None:
+        offset = self._offsets.get(key)
+        if offset is None:
+            offset = self._append(key)
+        _VALUE.pack_into(self._map, offset, _VALUE.unpack_from(self._map, offset)[0] + amount)
+
+    def _append(self, key: Key) -> int:
+        encoded = json.dumps([key[0], list(key[1])]).encode()
+        # Pad so the value that follows is 8-byte aligned
+        encoded += b" " * (-(_KEY_LENGTH.size + len(encoded)) % 8)
+        needed = _KEY_LENGTH.size + len(encoded) + _VALUE.size
+        if self._used + needed > self._size:
+            self._grow(self._used + needed)
+
+        start = self._used
+        _KEY_LENGTH.pack_into(self._map, start, len(encoded))
+        self._map[start + _KEY_LENGTH.size:start + _KEY_LENGTH.size + len(encoded)] = encoded
+        offset = start + _KEY_LENGTH.size + len(encoded)
+        _VALUE.pack_into(self._map, offset, 0.0)
+        self._used += needed
+        _HEADER.pack_into(self._map, 0, self._used)
+        self._offsets[key] = offset
+        return offset
+
+    def _grow(self, needed: int) -> None:
+        while self._size < needed:
+            self._size *= 2
+        self._map.close()
+        self._file.truncate(self._size)
+        self._map = mmap.mmap(self._file.fileno(), self._size)
+
+
+def _read_shard_file(path: str) -> Iterator[Tuple[Key, float]]:
+    with open(path, "rb") as fh:
+        data = fh.read()
+    if len(data) < _HEADER.size:
+        return
+    used = _HEADER.unpack_from(data, 0)[0]
+    position = _HEADER.size
+    while position < used:
+        (length,) = _KEY_LENGTH.unpack_from(data, position)
+        position += _KEY_LENGTH.size
+        sample, labels = json.loads(data[position:position + length])
+        position += length
+        yield (sample, tuple(labels)), _VALUE.unpack_from(data, position)[0]
+        position += _VALUE.size
+
+
+class _Lease:
+    """
+    A thread's claim on a shard, held in a thread-local.
+
+    Dropped with the thread's locals when it exits, which puts the shard
+    back on the free list. The free list is a deque (atomic append and
+    popleft), so this needs no lock even if the thread is collected while
+    another holds MetricsStorage._lock.
+    """
+
+    def __init__(self, shard, free: deque, pid: int):
+        self.shard = shard
+        self.free = free
+        self.pid = pid
+
+    def __del__(self):
+        # A forked child's copy of the parent's lease returns nothing
+        if self.pid == os.getpid():
+            self.free.append(self.shard)
+
+
+class MetricsStorage:
+    """Shards leased to recording threads, plus the code to sum them."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+        self._free = deque()
+        self._pid = os.getpid()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def shard(self):
+        lease = getattr(self._local, "lease", None)
+        if lease is None or lease.pid != os.getpid():
+            lease = self._local.lease = self._acquire()
+        return lease.shard
+
+    def _acquire(self) -> _Lease:
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked worker: the parent's shards are not ours to write
+                self._pid = os.getpid()
+                self._shards = []
+                self._free = deque()
+            try:
+                shard = self._free.popleft()
+            except IndexError:
+                shard = self._new_shard()
+                self._shards.append(shard)
+            return _Lease(shard, self._free, self._pid)
+
+    def _new_shard(self):
+        if not self.directory:
+            return _MemoryShard()
+        path = os.path.join(self.directory, f"{self._pid}-{os.urandom(6).hex()}.db")
+        return _FileShard(path)
+
+    def collect(self) -> Dict[Key, float]:
+        """Sum of every shard (of every process, with a directory)."""
+        totals = {}
+        if self.directory:
+            items = itertools.chain.from_iterable(
+                _read_shard_file(path)
+                for path in glob.glob(os.path.join(self.directory, "*.db"))
+            )
+        else:
+            with self._lock:
+                shards = list(self._shards)
+            items = itertools.chain.from_iterable(shard.items() for shard in shards)
+        for key, value in items:
+            totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> Optional[MetricsStorage]:
+    """Return the process-wide storage, or None if METRICS is disabled."""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                config = get_metrics_settings()
+                _storage = MetricsStorage(config["DIRECTORY"]) if config["ENABLED"] else False
+    return _storage or None
+
+
+def reset_metrics() -> None:
+    """Forget recorded values and re-read METRICS (used by tests)."""
+    global _storage
+    with _storage_lock:
+        _storage = None
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_sample(sample: str, names, values, value: float) -> str:
+    labels = ",".join(f'{name}="{_escape(str(label))}"' for name, label in zip(names, values))
+    return f"{sample}{{{labels}}} {value!r}" if labels else f"{sample} {value!r}"
+
+
+class Counter:
+    """Monotonic counter; ``name`` should end in ``_total``."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry.append(self)
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        storage = get_storage()
+        if storage is not None:
+            storage.shard().inc((self.name, labels), amount)
+
+    def samples(self, values: Dict[str, list]):
+        for labels, value in sorted(values.get(self.name, ())):
+            yield _format_sample(self.name, self.labelnames, labels, value)
+
+
+class Histogram:
+    """Distribution of observations over fixed upper ``buckets``."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._bounds = [repr(float(bound)) for bound in self.buckets] + ["+Inf"]
+        _registry.append(self)
+
+    def observe(self, value: float, *labels: str) -> None:
+        storage = get_storage()
+        if storage is None:
+            return
+        shard = storage.shard()
+        bound = self._bounds[bisect_left(self.buckets, value)]
+        shard.inc((self.name + "_bucket", labels + (bound,)), 1.0)
+        shard.inc((self.name + "_sum", labels), value)
+        shard.inc((self.name + "_count", labels), 1.0)
+
+    @contextmanager
+    def time(self, *labels: str):
+        """Observe the duration of the block in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def samples(self, values: Dict[str, list]):
+        buckets = {}
+        for labels, value in values.get(self.name + "_bucket", ()):
+            buckets.setdefault(labels[:-1], {})[labels[-1]] = value
+        sums = dict(values.get(self.name + "_sum", ()))
+        counts = dict(values.get(self.name + "_count", ()))
+        names = self.labelnames + ("le",)
+        for labels in sorted(counts):
+            cumulative = 0.0
+            for bound in self._bounds:
+                cumulative += buckets.get(labels, {}).get(bound, 0.0)
+                yield _format_sample(self.name + "_bucket", names, labels + (bound,), cumulative)
+            yield _format_sample(self.name + "_sum", self.labelnames, labels, sums.get(labels, 0.0))
+            yield _format_sample(self.name + "_count", self.labelnames, labels, counts[labels])
+
+
+_registry = []
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUESTS = Counter(
+    "trips_http_requests_total", "HTTP requests by view, method and status code.",
+    ["view", "method", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "trips_http_request_duration_seconds", "Time to produce a response, by view and method.",
+    ["view", "method"], LATENCY_BUCKETS,
+)
+DB_QUERIES = Counter(
+    "trips_db_queries_total", "SQL statements run while handling requests, by view.",
+    ["view"],
+)
+DB_TIME = Counter(
+    "trips_db_query_seconds_total", "Time spent in SQL statements, by view.",
+    ["view"],
+)
+PROVIDER_ATTEMPTS = Counter(
+    "trips_provider_attempts_total", "Upstream provider HTTP attempts.",
+    ["service"],
+)
+PROVIDER_RETRIES = Counter(
+    "trips_provider_retries_total", "Provider attempts that were retried after a failure.",
+    ["service"],
+)
+PROVIDER_TIMEOUTS = Counter(
+    "trips_provider_timeouts_total", "Provider attempts that timed out.",
+    ["service"],
+)
+PROVIDER_FAILURES = Counter(
+    "trips_provider_failures_total",
+    "Failed provider attempts, and calls given up before an attempt, by reason.",
+    ["service", "reason"],
+)
+PROVIDER_LATENCY = Histogram(
+    "trips_provider_request_duration_seconds", "Upstream latency per provider attempt.",
+    ["service"], LATENCY_BUCKETS,
+)
+
+
+def render_metrics() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    storage = get_storage()
+    values = {}
+    for (sample, labels), value in (storage.collect() if storage is not None else {}).items():
+        values.setdefault(sample, []).append((labels, value))
+
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.samples(values))
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    Records request counts, latency and SQL statements per view.
+
+    Place it right after trips.instrumentation.RequestTimingMiddleware,
+    whose per-request counters supply the SQL numbers. Requests that do
+    not resolve to a view are labelled ``unmatched``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+        if get_storage() is None:
+            return response
+
+        view = getattr(request, "metrics_view", "unmatched")
+        REQUESTS.inc(view, request.method, str(response.status_code))
+        REQUEST_LATENCY.observe(elapsed, view, request.method)
+        request_metrics = current_metrics()
+        if request_metrics is not None:
+            DB_QUERIES.inc(view, amount=request_metrics.queries)
+            DB_TIME.inc(view, amount=request_metrics.db_time)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_view = view_name(request, view_func)
+        return None
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:06
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_trip_count(apps, schema_editor):
+    Traveler = apps.get_model('trips', 'Traveler')
+    Trip = apps.get_model('trips', 'Trip')
+    counts = (
+        Trip.objects.filter(traveler=OuterRef('pk'))
+        .order_by()
+        .values('traveler')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Traveler.objects.update(trip_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0002_alter_traveler_options_alter_trip_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='traveler',
+            name='trip_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_trip_count, migrations.RunPython.noop),
+    ]
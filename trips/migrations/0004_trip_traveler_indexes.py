@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:19
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0003_traveler_trip_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='traveler',
+            index=models.Index(fields=['last_name', 'first_name', 'id'], name='traveler_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='traveler',
+            index=models.Index(django.db.models.functions.text.Lower('department'), name='traveler_department_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['-created_at', '-id'], name='trip_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='trip_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['traveler', 'start_date'], name='trip_traveler_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['destination'], name='trip_destination_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['start_date'], name='trip_start_date_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:24
+
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+
+
+def populate_department_spend(apps, schema_editor):
+    Trip = apps.get_model('trips', 'Trip')
+    DepartmentSpend = apps.get_model('trips', 'DepartmentSpend')
+    groups = (
+        Trip.objects.order_by()
+        .values('destination', 'status', department=F('traveler__department'), month=TruncMonth('start_date'))
+        .annotate(trips=Count('pk'), cost=Sum('estimated_cost'))
+    )
+    DepartmentSpend.objects.bulk_create(
+        [
+            DepartmentSpend(
+                department=row['department'],
+                destination=row['destination'],
+                month=row['month'],
+                status=row['status'],
+                trip_count=row['trips'],
+                total_cost=row['cost'] or 0,
+            )
+            for row in groups
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0004_trip_traveler_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DepartmentSpend',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('department', models.CharField(max_length=100)),
+                ('destination', models.CharField(max_length=100)),
+                ('month', models.DateField()),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('pending', 'Pending Approval'), ('approved', 'Approved'), ('rejected', 'Rejected')], max_length=20)),
+                ('trip_count', models.IntegerField(default=0)),
+                ('total_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'ordering': ['month', 'department', 'destination', 'status'],
+                'indexes': [models.Index(fields=['month', 'department'], name='department_spend_month_idx')],
+                'constraints': [models.UniqueConstraint(fields=('department', 'destination', 'month', 'status'), name='department_spend_unique')],
+            },
+        ),
+        migrations.RunPython(populate_department_spend, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0005_department_spend'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='trip',
+            name='trip_traveler_start_idx',
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['traveler', 'start_date', 'end_date'], name='trip_traveler_dates_idx'),
+        ),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:48
+
+from django.db import migrations
+
+# FTS5 tables and the triggers that keep them in sync (SQLite only; see
+# trips.search for the fallback on other databases).
+FORWARD_SQL = [
+    """
+    CREATE VIRTUAL TABLE trips_trip_fts USING fts5(
+        title, destination, traveler, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE trips_traveler_fts USING fts5(
+        name, email, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    # Trips
+    """
+    CREATE TRIGGER trips_trip_fts_insert AFTER INSERT ON trips_trip BEGIN
+        INSERT INTO trips_trip_fts (rowid, title, destination, traveler)
+        SELECT new.id, new.title, new.destination,
+               t.first_name || ' ' || t.last_name || ' ' || t.email
+        FROM trips_traveler t WHERE t.id = new.traveler_id;
+    END
+    """,
+    """
+    CREATE TRIGGER trips_trip_fts_update AFTER UPDATE OF title, destination, traveler_id ON trips_trip BEGIN
+        DELETE FROM trips_trip_fts WHERE rowid = old.id;
+        INSERT INTO trips_trip_fts (rowid, title, destination, traveler)
+        SELECT new.id, new.title, new.destination,
+               t.first_name || ' ' || t.last_name || ' ' || t.email
+        FROM trips_traveler t WHERE t.id = new.traveler_id;
+    END
+    """,
+    """
+    CREATE TRIGGER trips_trip_fts_delete AFTER DELETE ON trips_trip BEGIN
+        DELETE FROM trips_trip_fts WHERE rowid = old.id;
+    END
+    """,
+    # Travelers (a name or email change is copied to all their trips)
+    """
+    CREATE TRIGGER trips_traveler_fts_insert AFTER INSERT ON trips_traveler BEGIN
+        INSERT INTO trips_traveler_fts (rowid, name, email)
+        VALUES (new.id, new.first_name || ' ' || new.last_name, new.email);
+    END
+    """,
+    """
+    CREATE TRIGGER trips_traveler_fts_update AFTER UPDATE OF first_name, last_name, email ON trips_traveler BEGIN
+        DELETE FROM trips_traveler_fts WHERE rowid = old.id;
+        INSERT INTO trips_traveler_fts (rowid, name, email)
+        VALUES (new.id, new.first_name || ' ' || new.last_name, new.email);
+        UPDATE trips_trip_fts
+        SET traveler = new.first_name || ' ' || new.last_name || ' ' || new.email
+        WHERE rowid IN (SELECT id FROM trips_trip WHERE traveler_id = new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER trips_traveler_fts_delete AFTER DELETE ON trips_traveler BEGIN
+        DELETE FROM trips_traveler_fts WHERE rowid = old.id;
+    END
+    """,
+    # Backfill
+    """
+    INSERT INTO trips_traveler_fts (rowid, name, email)
+    SELECT id, first_name || ' ' || last_name, email FROM trips_traveler
+    """,
+    """
+    INSERT INTO trips_trip_fts (rowid, title, destination, traveler)
+    SELECT trip.id, trip.title, trip.destination,
+           t.first_name || ' ' || t.last_name || ' ' || t.email
+    FROM trips_trip trip JOIN trips_traveler t ON t.id = trip.traveler_id
+    """,
+]
+
+REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS trips_trip_fts_insert",
+    "DROP TRIGGER IF EXISTS trips_trip_fts_update",
+    "DROP TRIGGER IF EXISTS trips_trip_fts_delete",
+    "DROP TRIGGER IF EXISTS trips_traveler_fts_insert",
+    "DROP TRIGGER IF EXISTS trips_traveler_fts_update",
+    "DROP TRIGGER IF EXISTS trips_traveler_fts_delete",
+    "DROP TABLE IF EXISTS trips_trip_fts",
+    "DROP TABLE IF EXISTS trips_traveler_fts",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0006_trip_traveler_dates_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(FORWARD_SQL), _run(REVERSE_SQL)),
+    ]
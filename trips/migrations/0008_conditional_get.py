@@ -0,0 +1,91 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+# SQLite cannot rebuild trips_traveler while the FTS triggers from 0007
+# reference it, so they are dropped around the AddField and recreated
+# as they were in 0007 (copied here so later changes to trips.search
+# don't alter this migration).
+CREATE_TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER trips_trip_fts_insert AFTER INSERT ON trips_trip BEGIN
+        INSERT INTO trips_trip_fts (rowid, title, destination, traveler)
+        SELECT new.id, new.title, new.destination,
+               t.first_name || ' ' || t.last_name || ' ' || t.email
+        FROM trips_traveler t WHERE t.id = new.traveler_id;
+    END
+    """,
+    """
+    CREATE TRIGGER trips_trip_fts_update AFTER UPDATE OF title, destination, traveler_id ON trips_trip BEGIN
+        DELETE FROM trips_trip_fts WHERE rowid = old.id;
+        INSERT INTO trips_trip_fts (rowid, title, destination, traveler)
+        SELECT new.id, new.title, new.destination,
+               t.first_name || ' ' || t.last_name || ' ' || t.email
+        FROM trips_traveler t WHERE t.id = new.traveler_id;
+    END
+    """,
+    """
+    CREATE TRIGGER trips_trip_fts_delete AFTER DELETE ON trips_trip BEGIN
+        DELETE FROM trips_trip_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER trips_traveler_fts_insert AFTER INSERT ON trips_traveler BEGIN
+        INSERT INTO trips_traveler_fts (rowid, name, email)
+        VALUES (new.id, new.first_name || ' ' || new.last_name, new.email);
+    END
+    """,
+    """
+    CREATE TRIGGER trips_traveler_fts_update AFTER UPDATE OF first_name, last_name, email ON trips_traveler BEGIN
+        DELETE FROM trips_traveler_fts WHERE rowid = old.id;
+        INSERT INTO trips_traveler_fts (rowid, name, email)
+        VALUES (new.id, new.first_name || ' ' || new.last_name, new.email);
+        UPDATE trips_trip_fts
+        SET traveler = new.first_name || ' ' || new.last_name || ' ' || new.email
+        WHERE rowid IN (SELECT id FROM trips_trip WHERE traveler_id = new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER trips_traveler_fts_delete AFTER DELETE ON trips_traveler BEGIN
+        DELETE FROM trips_traveler_fts WHERE rowid = old.id;
+    END
+    """,
+]
+
+DROP_TRIGGERS_SQL = [
+    "DROP TRIGGER IF EXISTS trips_trip_fts_insert",
+    "DROP TRIGGER IF EXISTS trips_trip_fts_update",
+    "DROP TRIGGER IF EXISTS trips_trip_fts_delete",
+    "DROP TRIGGER IF EXISTS trips_traveler_fts_insert",
+    "DROP TRIGGER IF EXISTS trips_traveler_fts_update",
+    "DROP TRIGGER IF EXISTS trips_traveler_fts_delete",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0007_search_fts'),
+    ]
+
+    operations = [
+        # SQLite rebuilds trips_traveler to add the column.
+        migrations.RunPython(_run(DROP_TRIGGERS_SQL), _run(CREATE_TRIGGERS_SQL)),
+        migrations.AddField(
+            model_name='traveler',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(_run(CREATE_TRIGGERS_SQL), _run(DROP_TRIGGERS_SQL)),
+    ]
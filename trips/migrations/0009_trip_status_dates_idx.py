@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 09:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0008_conditional_get'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['status', 'start_date', 'end_date', 'traveler'], name='trip_status_dates_idx'),
+        ),
+    ]
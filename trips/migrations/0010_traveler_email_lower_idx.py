@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 09:05
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0009_trip_status_dates_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='traveler',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='traveler_email_lower_idx'),
+        ),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models.functions import Lower
 
 
 class Traveler(models.Model):
@@ -9,14 +11,41 @@ class Traveler(models.Model):
     last_name = models.CharField(max_length=50)
     email = models.EmailField(unique=True)
     department = models.CharField(max_length=100)
+    # Denormalized count of trips, maintained by trips.signals.
+    # Run `manage.py repair_trip_counts` to fix any drift.
+    trip_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Also bumped by adjust_trip_counts, so it changes whenever the API
+    # representation (which includes trip_count) does.
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['last_name', 'first_name']
+        indexes = [
+            # Name ordering used by the admin and cursor pagination
+            models.Index(fields=['last_name', 'first_name', 'id'], name='traveler_name_idx'),
+            # Case-insensitive department filter (TravelerViewSet)
+            models.Index(Lower('department'), name='traveler_department_idx'),
+            # Case-insensitive email lookup (trips.imports)
+            models.Index(Lower('email'), name='traveler_email_lower_idx'),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
+    def save(self, *args, **kwargs):
+        # trip_count is only changed with F() updates; never write back a
+        # possibly stale in-memory value when updating an existing row.
+        if not self._state.adding and kwargs.get('update_fields') is None and not args:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'trip_count'
+            ]
+        # Atomic so a department change moves the spend rollups
+        # (post_save handler) together with the traveler row.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
@@ -32,6 +61,10 @@ class Trip(models.Model):
         ("approved", "Approved"),
         ("rejected", "Rejected"),
     ]
+    EDITABLE_STATUSES = ("draft", "rejected")
+    # Longest allowed end_date - start_date. Overlap queries
+    # (trips.scheduling) rely on it to bound start_date from below.
+    MAX_DURATION_DAYS = 90
 
     title = models.CharField(max_length=200)
     traveler = models.ForeignKey(
@@ -58,10 +91,40 @@ class Trip(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Default list ordering and cursor pagination
+            models.Index(fields=['-created_at', '-id'], name='trip_created_idx'),
+            # Status filter (admin, API) with newest-first ordering
+            models.Index(fields=['status', '-created_at', '-id'], name='trip_status_created_idx'),
+            # A traveler's trips by date, and date overlap checks
+            # (trips.scheduling) answered from the index entries
+            models.Index(fields=['traveler', 'start_date', 'end_date'], name='trip_traveler_dates_idx'),
+            # Who is travelling in a date range (trips.scheduling),
+            # answered from the index entries
+            models.Index(
+                fields=['status', 'start_date', 'end_date', 'traveler'], name='trip_status_dates_idx'
+            ),
+            models.Index(fields=['destination'], name='trip_destination_idx'),
+            # Admin date hierarchy and export date ranges
+            models.Index(fields=['start_date'], name='trip_start_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.destination}"
 
+    def clean(self):
+        super().clean()
+        if self.start_date and self.end_date and self.duration_days > self.MAX_DURATION_DAYS:
+            raise ValidationError({
+                'end_date': f'Trips can last at most {self.MAX_DURATION_DAYS} days.'
+            })
+
+    def save(self, *args, **kwargs):
+        # Atomic so the traveler trip_count update made by the
+        # post_save handler commits together with the trip row.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
     @property
     def duration_days(self):
         """Calculate trip duration in days."""
@@ -70,4 +133,38 @@ class Trip(models.Model):
     @property
     def is_editable(self):
         """Trip can only be edited if not yet approved."""
-        return self.status in ('draft', 'rejected')
+        return self.status in self.EDITABLE_STATUSES
+
+
+class DepartmentSpend(models.Model):
+    """
+    Trip count and estimated cost per department, destination, month
+    and status.
+
+    Rollup of the trips table maintained incrementally by trips.signals
+    (see trips.reporting). Run `manage.py rebuild_department_spend` to
+    recompute it from scratch.
+    """
+    department = models.CharField(max_length=100)
+    destination = models.CharField(max_length=100)
+    # First day of the trip's start month
+    month = models.DateField()
+    status = models.CharField(max_length=20, choices=Trip.STATUS_CHOICES)
+    trip_count = models.IntegerField(default=0)
+    total_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['month', 'department', 'destination', 'status']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['department', 'destination', 'month', 'status'],
+                name='department_spend_unique',
+            ),
+        ]
+        indexes = [
+            # Dashboard month ranges
+            models.Index(fields=['month', 'department'], name='department_spend_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.department} / {self.destination} / {self.month:%Y-%m} ({self.status})"
@@ -0,0 +1,109 @@
+"""
+Pagination classes for the trips API.
+
+List endpoints default to keyset (cursor) pagination so that page latency
+does not grow with page depth: every page is a single indexed range scan
+with no COUNT(*) and no OFFSET. Clients that still rely on numbered pages
+can opt back in with ``?pagination=page`` (or by sending ``?page=N``).
+
+Search results (``?q=``) are ordered by relevance, which has no stable
+keyset, so they always use page numbers.
+"""
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+from .search import search_terms
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination with an opt-in page-number fallback.
+
+    Subclasses must define a stable, unique ``ordering`` (the last field
+    should be the primary key so ties never reorder between pages).
+    The next/previous links carry an opaque, base64-encoded cursor.
+    """
+
+    mode_query_param = 'pagination'
+    page_number_mode = 'page'
+    search_query_param = 'q'
+    fallback_class = PageNumberPagination
+
+    def __init__(self):
+        self.fallback = None
+
+    def use_page_numbers(self, request):
+        """Return True if the client asked for the legacy page-number mode."""
+        params = request.query_params
+        if params.get(self.mode_query_param) == self.page_number_mode:
+            return True
+        return self.fallback_class.page_query_param in params
+
+    def is_search(self, request):
+        """Return True for a ranked search, which keeps its own ordering."""
+        return bool(search_terms(request.query_params.get(self.search_query_param)))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_search(request):
+            self.fallback = self.fallback_class()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        if self.use_page_numbers(request):
+            self.fallback = self.fallback_class()
+            queryset = queryset.order_by(*self.ordering)
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.fallback = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_etag_parts(self):
+        """Pagination state shown in the response besides the items."""
+        if self.fallback is not None:
+            return [
+                self.fallback.page.paginator.count,
+                self.fallback.get_next_link(),
+                self.fallback.get_previous_link(),
+            ]
+        return [self.get_next_link(), self.get_previous_link()]
+
+    def get_html_context(self):
+        if self.fallback is not None:
+            return self.fallback.get_html_context()
+        return super().get_html_context()
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append({
+            'name': self.mode_query_param,
+            'required': False,
+            'in': 'query',
+            'description': (
+                'Set to "page" to use legacy page-number pagination '
+                '(adds a total count, slower on deep pages).'
+            ),
+            'schema': {'type': 'string', 'enum': [self.page_number_mode]},
+        })
+        parameters.append({
+            'name': self.fallback_class.page_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Page number (legacy page-number mode only).',
+            'schema': {'type': 'integer'},
+        })
+        return parameters
+
+
+class TripPagination(KeysetPagination):
+    """Newest trips first, ties broken by id."""
+
+    ordering = ('-created_at', '-id')
+
+
+class TravelerPagination(KeysetPagination):
+    """Alphabetical by name, ties broken by id."""
+
+    ordering = ('last_name', 'first_name', 'id')
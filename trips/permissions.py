@@ -41,12 +41,13 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
             return True
 
         # Write permissions only for the trip's traveler
-        # Using getattr for safety in case traveler is None
-        traveler = getattr(obj, 'traveler', None)
-        if traveler is None:
+        # Compare the FK column so no traveler query is needed;
+        # getattr for safety in case traveler is None
+        traveler_id = getattr(obj, 'traveler_id', None)
+        if traveler_id is None:
             return False
 
-        return traveler.id == request.user.id
+        return traveler_id == request.user.id
 
 
 class IsManagerOrReadOnly(permissions.BasePermission):
@@ -0,0 +1,248 @@
+"""
+Fast read path: serializer output rendered from ``values_list()`` rows.
+
+Rendering a list through a ModelSerializer builds a model instance per
+row and then walks every field with ``get_attribute``/``to_representation``.
+For read-only list responses most of that work is not needed.
+``RowRenderer`` looks at a serializer's fields once (after ``?fields=``
+and ``?expand=`` have been applied) and compiles them into per-column
+getters, so each row becomes a dict built straight from a database tuple:
+
+- model fields read their column, then go through the field's own
+  ``to_representation`` so dates, decimals and choices are formatted
+  exactly as the serializer would
+- properties listed in ``COMPUTED_FIELDS`` (``duration_days``,
+  ``is_editable``, ``full_name``) are computed from their columns
+- nested serializers on a foreign key (``traveler_detail``) read the
+  related columns from the same joined row
+
+Serializers with fields that cannot be compiled (method fields, reverse
+relations, ``source='*'``...) get no renderer; callers fall back to the
+serializer. The equivalence tests in trips/tests.py compare both paths.
+"""
+from functools import partial
+from operator import itemgetter
+from typing import Callable, List, Optional
+
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from .models import Traveler, Trip
+
+# (model, attribute) -> (columns it reads, function of those column values).
+# These mirror the model properties of the same name.
+COMPUTED_FIELDS = {
+    (Trip, "duration_days"): (
+        ("start_date", "end_date"),
+        lambda start_date, end_date: (end_date - start_date).days,
+    ),
+    (Trip, "is_editable"): (
+        ("status",),
+        lambda status: status in Trip.EDITABLE_STATUSES,
+    ),
+    (Traveler, "full_name"): (
+        ("first_name", "last_name"),
+        lambda first_name, last_name: f"{first_name} {last_name}",
+    ),
+}
+
+# Fields whose to_representation is exactly this builtin (exact types only;
+# subclasses may override it).
+_BUILTIN_CONVERTERS = {
+    serializers.CharField: str,
+    serializers.EmailField: str,
+    serializers.IntegerField: int,
+    serializers.ReadOnlyField: None,
+}
+
+
+class Unsupported(Exception):
+    """A serializer field that the fast path cannot render."""
+
+
+def _datetime_iso(field_timezone, fallback, value):
+    if value.tzinfo is None:
+        return fallback(value)
+    value = value.astimezone(field_timezone).isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def _converter(field):
+    """The cheapest callable equivalent to ``field.to_representation``."""
+    field_type = type(field)
+    if field_type in _BUILTIN_CONVERTERS:
+        return _BUILTIN_CONVERTERS[field_type]
+    if field_type is serializers.DateField:
+        output_format = getattr(field, "format", api_settings.DATE_FORMAT)
+        if output_format is not None and output_format.lower() == ISO_8601:
+            return lambda value: value.isoformat()
+    if field_type is serializers.DateTimeField:
+        output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+        field_timezone = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+        if output_format is not None and output_format.lower() == ISO_8601 and field_timezone is not None:
+            # Resolve the timezone once instead of per value
+            return partial(_datetime_iso, field_timezone, field.to_representation)
+    if field_type is serializers.ChoiceField and all(
+        isinstance(key, str) and key == value
+        for key, value in field.choice_strings_to_values.items()
+    ):
+        # String choices map to themselves
+        return None
+    return field.to_representation
+
+
+def _with_converter(read, convert):
+    if convert is None:
+        return read
+
+    def get(row):
+        value = read(row)
+        return None if value is None else convert(value)
+    return get
+
+
+class RowRenderer:
+    """
+    Compiled read representation of one serializer.
+
+    Build with ``RowRenderer.for_serializer(serializer)``; the queryset
+    must then be read with ``values_list(*renderer.columns, named=True)``
+    (extra columns may be appended, e.g. pagination ordering).
+    """
+
+    def __init__(self):
+        self.columns = []
+        self._getters = []
+
+    @classmethod
+    def for_serializer(cls, serializer) -> Optional["RowRenderer"]:
+        """Return a renderer, or None if some field is unsupported."""
+        renderer = cls()
+        try:
+            renderer._getters = renderer._compile(serializer, serializer.Meta.model, "")
+        except Unsupported:
+            return None
+        return renderer
+
+    def _column(self, path: str) -> int:
+        if path not in self.columns:
+            self.columns.append(path)
+        return self.columns.index(path)
+
+    def _compile(self, serializer, model, prefix):
+        getters = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            getters.append((name, self._compile_field(field, model, prefix)))
+        return getters
+
+    def _resolve(self, field, model, prefix):
+        """Follow a dotted source through foreign keys to its last attribute."""
+        if field.source == "*":
+            raise Unsupported(field.field_name)
+        *relations, attr = field.source_attrs
+        for relation in relations:
+            try:
+                model_field = model._meta.get_field(relation)
+            except Exception:
+                raise Unsupported(field.field_name)
+            if not (model_field.many_to_one or model_field.one_to_one) or not model_field.concrete:
+                raise Unsupported(field.field_name)
+            model = model_field.related_model
+            prefix = f"{prefix}{relation}__"
+        return model, prefix, attr
+
+    def _compile_field(self, field, model, prefix) -> Callable:
+        if isinstance(field, serializers.BaseSerializer):
+            return self._compile_nested(field, model, prefix)
+        if isinstance(field, (serializers.RelatedField, serializers.SerializerMethodField)):
+            raise Unsupported(field.field_name)
+
+        model, prefix, attr = self._resolve(field, model, prefix)
+        if (model, attr) in COMPUTED_FIELDS:
+            paths, compute = COMPUTED_FIELDS[(model, attr)]
+            read_args = itemgetter(*(self._column(prefix + path) for path in paths))
+            if len(paths) == 1:
+                read = lambda row: compute(read_args(row))  # noqa: E731
+            else:
+                read = lambda row: compute(*read_args(row))  # noqa: E731
+            return _with_converter(read, _converter(field))
+
+        try:
+            model_field = model._meta.get_field(attr)
+        except Exception:
+            raise Unsupported(field.field_name)
+        if not model_field.concrete or model_field.is_relation:
+            raise Unsupported(field.field_name)
+        return _with_converter(itemgetter(self._column(prefix + attr)), _converter(field))
+
+    def _compile_nested(self, field, model, prefix) -> Callable:
+        if isinstance(field, serializers.ListSerializer):
+            raise Unsupported(field.field_name)
+        related_model, related_prefix, attr = self._resolve(field, model, prefix)
+        try:
+            model_field = related_model._meta.get_field(attr)
+        except Exception:
+            raise Unsupported(field.field_name)
+        if not (model_field.many_to_one or model_field.one_to_one) or not model_field.concrete:
+            raise Unsupported(field.field_name)
+        nested_prefix = f"{related_prefix}{attr}__"
+        getters = self._compile(field, model_field.related_model, nested_prefix)
+        # A null foreign key renders as None, like the serializer does.
+        read_pk = itemgetter(self._column(f"{related_prefix}{model_field.attname}"))
+
+        def get(row):
+            if read_pk(row) is None:
+                return None
+            return {name: getter(row) for name, getter in getters}
+        return get
+
+    def render(self, row) -> dict:
+        return {name: getter(row) for name, getter in self._getters}
+
+    def render_many(self, rows) -> List[dict]:
+        getters = self._getters
+        return [{name: getter(row) for name, getter in getters} for row in rows]
+
+
+def render_queryset(serializer, queryset) -> Optional[List[dict]]:
+    """
+    Render ``queryset`` as ``serializer`` would, without model instances.
+
+    Returns None if the serializer cannot use the fast path.
+    """
+    renderer = RowRenderer.for_serializer(serializer)
+    if renderer is None:
+        return None
+    return renderer.render_many(queryset.values_list(*renderer.columns, named=True))
+
+
+class FastListMixin:
+    """
+    Renders ``list`` responses through RowRenderer instead of the serializer.
+
+    The page is read with ``values_list(named=True)`` so keyset pagination
+    and the conditional GET validators (trips.conditional) can still read
+    their fields from each row. Falls back to the serializer when its
+    fields are not supported.
+    """
+
+    def get_list_items(self, queryset, validator_paths):
+        self.row_renderer = RowRenderer.for_serializer(self.get_serializer())
+        if self.row_renderer is None:
+            return super().get_list_items(queryset, validator_paths)
+
+        columns = list(self.row_renderer.columns)
+        ordering = getattr(self.paginator, "ordering", None) or ()
+        for path in [*validator_paths, *(path.lstrip("-") for path in ordering)]:
+            if path not in columns:
+                columns.append(path)
+        return queryset.values_list(*columns, named=True)
+
+    def render_items(self, items):
+        if self.row_renderer is None:
+            return super().render_items(items)
+        return self.row_renderer.render_many(items)
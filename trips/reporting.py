@@ -0,0 +1,206 @@
+"""
+Department spend reporting.
+
+Spend is read from the DepartmentSpend rollup table instead of
+aggregating the trips table on every request. The rollup holds one row per
+(department, destination, month, status) with the trip count and summed
+``estimated_cost``, so a dashboard query reads a few hundred rows.
+
+The rollup is kept current incrementally:
+
+- trip saves, deletes and traveler department changes (trips.signals)
+- status transitions, including the admin actions (``trip_status_changed``)
+- bulk imports (TripImporter)
+
+``rebuild_department_spend`` recomputes it from scratch.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from .models import DepartmentSpend, Trip
+
+DIMENSIONS = ("department", "destination", "month", "status")
+DEFAULT_GROUP_BY = ("department", "month")
+
+
+def rollup_key(department, destination, start_date, status):
+    """Return the DepartmentSpend key a trip contributes to."""
+    return (department, destination, start_date.replace(day=1), status)
+
+
+class SpendDeltas(defaultdict):
+    """Mapping of rollup key to a [trip count, cost] change."""
+
+    def __init__(self):
+        super().__init__(lambda: [0, Decimal("0")])
+
+    def add(self, key, count, cost):
+        delta = self[key]
+        delta[0] += count
+        delta[1] += cost or 0
+
+    def add_trip(self, trip, department, sign=1):
+        """Add (sign=1) or remove (sign=-1) one trip."""
+        key = rollup_key(department, trip.destination, trip.start_date, trip.status)
+        self.add(key, sign, sign * Decimal(str(trip.estimated_cost or 0)))
+
+
+def spend_groups(queryset):
+    """
+    Aggregate trips by rollup dimensions in one query.
+
+    Returns:
+        Rows with department, destination, month, status, trips and cost
+    """
+    return (
+        queryset.order_by()
+        .values(
+            "destination",
+            "status",
+            department=F("traveler__department"),
+            month=TruncMonth("start_date"),
+        )
+        .annotate(trips=Count("pk"), cost=Sum("estimated_cost"))
+    )
+
+
+def apply_spend_deltas(deltas):
+    """
+    Apply rollup changes with ``UPDATE ... SET x = x + n``.
+
+    Keys without a row yet are inserted; rows that drop to zero trips are
+    deleted. Must run in the transaction that changed the trips.
+    """
+    emptied = False
+    for key, (count, cost) in deltas.items():
+        if not count and not cost:
+            continue
+        fields = dict(zip(DIMENSIONS, key))
+        updated = DepartmentSpend.objects.filter(**fields).update(
+            trip_count=F("trip_count") + count,
+            total_cost=F("total_cost") + cost,
+        )
+        if not updated:
+            try:
+                with transaction.atomic():
+                    DepartmentSpend.objects.create(**fields, trip_count=count, total_cost=cost)
+            except IntegrityError:
+                # Another writer inserted the row first.
+                DepartmentSpend.objects.filter(**fields).update(
+                    trip_count=F("trip_count") + count,
+                    total_cost=F("total_cost") + cost,
+                )
+        emptied = emptied or count < 0
+    if emptied:
+        DepartmentSpend.objects.filter(trip_count__lte=0).delete()
+
+
+def move_status(trip_ids, source, target):
+    """Move the rollup of freshly transitioned trips from source to target."""
+    deltas = SpendDeltas()
+    for row in spend_groups(Trip.objects.filter(pk__in=trip_ids)):
+        for status, sign in ((source, -1), (target, 1)):
+            key = (row["department"], row["destination"], row["month"], status)
+            deltas.add(key, sign * row["trips"], sign * (row["cost"] or 0))
+    apply_spend_deltas(deltas)
+
+
+def move_department(traveler_id, old_department, new_department):
+    """Move the rollup of a traveler's trips to their new department."""
+    deltas = SpendDeltas()
+    for row in spend_groups(Trip.objects.filter(traveler_id=traveler_id)):
+        for department, sign in ((old_department, -1), (new_department, 1)):
+            key = (department, row["destination"], row["month"], row["status"])
+            deltas.add(key, sign * row["trips"], sign * (row["cost"] or 0))
+    apply_spend_deltas(deltas)
+
+
+def rebuild_department_spend():
+    """
+    Recompute the whole rollup from the trips table.
+
+    Returns:
+        Number of rollup rows written
+    """
+    rows = [
+        DepartmentSpend(
+            department=row["department"],
+            destination=row["destination"],
+            month=row["month"],
+            status=row["status"],
+            trip_count=row["trips"],
+            total_cost=row["cost"] or 0,
+        )
+        for row in spend_groups(Trip.objects.all())
+    ]
+    with transaction.atomic():
+        DepartmentSpend.objects.all().delete()
+        DepartmentSpend.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def _parse_month(param, value):
+    parsed = parse_date(f"{value}-01") if len(value) == 7 else parse_date(value)
+    if parsed is None:
+        raise ValidationError({param: "Use YYYY-MM."})
+    return parsed.replace(day=1)
+
+
+def spend_report(params):
+    """
+    Aggregate the rollup for the reporting API.
+
+    Supported parameters:
+        group_by: Comma-separated dimensions (default department,month)
+        status / department / destination: One value or a comma-separated list
+        month_from / month_to: Inclusive month bounds (YYYY-MM)
+
+    Returns:
+        Dict with group_by, results and totals
+
+    Raises:
+        ValidationError: If a parameter is invalid
+    """
+    group_by = [d for d in params.get("group_by", "").split(",") if d] or list(DEFAULT_GROUP_BY)
+    unknown = set(group_by) - set(DIMENSIONS)
+    if unknown:
+        raise ValidationError({"group_by": f"Unknown dimension: {', '.join(sorted(unknown))}"})
+
+    queryset = DepartmentSpend.objects.all()
+    for param in ("status", "department", "destination"):
+        values = [v for v in params.get(param, "").split(",") if v]
+        if values:
+            queryset = queryset.filter(**{f"{param}__in": values})
+    for param, lookup in (("month_from", "month__gte"), ("month_to", "month__lte")):
+        value = params.get(param)
+        if value:
+            queryset = queryset.filter(**{lookup: _parse_month(param, value)})
+
+    rows = (
+        queryset.values(*group_by)
+        .annotate(trips=Sum("trip_count"), cost=Sum("total_cost"))
+        .order_by(*group_by)
+    )
+    results = []
+    total_trips, total_cost = 0, Decimal("0")
+    for row in rows:
+        item = {dim: row[dim] for dim in group_by}
+        if "month" in item:
+            item["month"] = item["month"].strftime("%Y-%m")
+        item["trip_count"] = row["trips"]
+        item["total_cost"] = f"{row['cost']:.2f}"
+        total_trips += row["trips"]
+        total_cost += row["cost"]
+        results.append(item)
+
+    return {
+        "group_by": group_by,
+        "results": results,
+        "totals": {"trip_count": total_trips, "total_cost": f"{total_cost:.2f}"},
+    }
@@ -0,0 +1,97 @@
+"""
+Cache of serialized API representations.
+
+Detail responses are stored in a Django cache under the object's
+conditional-GET ETag (trips.conditional). The ETag hashes the request
+path, so each ``?fields=``/``?expand=`` variant gets its own entry, and
+the ``updated_at`` of the object and of its traveler. Every write moves
+one of those timestamps:
+
+- trip saves (``auto_now``) and status transitions (trips.workflow)
+- traveler edits (``auto_now``) and trip count changes (adjust_trip_counts)
+
+so the next read looks up a new key and never sees the old entry. This
+holds in every worker process at once, without broadcasting deletes;
+with a shared CACHES backend (e.g. Redis) workers also share the hits.
+Entries left behind by writes or deletes expire after ``TIMEOUT``.
+"""
+import threading
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+DEFAULT_SETTINGS = {
+    "ENABLED": True,
+    "CACHE_ALIAS": "default",
+    "TIMEOUT": 3600,
+    # Bump when serializer output changes so old entries are ignored.
+    "VERSION": 1,
+}
+
+
+class RepresentationCache:
+    """Serialized representations of one resource type, keyed by ETag."""
+
+    def __init__(self, name: str, alias: str = "default", timeout: float = 3600, version: int = 1):
+        self.name = name
+        self.alias = alias
+        self.timeout = timeout
+        self.version = version
+        self._stats = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    def _key(self, etag: str) -> str:
+        return "repr:{}:v{}:{}".format(self.name, self.version, etag.strip('"'))
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, etag: str) -> Optional[Any]:
+        data = caches[self.alias].get(self._key(etag))
+        self._count("misses" if data is None else "hits")
+        return data
+
+    def set(self, etag: str, data: Any) -> None:
+        caches[self.alias].set(self._key(etag), data, self.timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_representation_cache(name: str) -> Optional[RepresentationCache]:
+    """
+    Return the process-wide representation cache for ``name``.
+
+    Returns None if REPRESENTATION_CACHE is disabled.
+    """
+    config = {**DEFAULT_SETTINGS, **getattr(settings, "REPRESENTATION_CACHE", {})}
+    if not config["ENABLED"]:
+        return None
+
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = RepresentationCache(
+                name,
+                alias=config["CACHE_ALIAS"],
+                timeout=config["TIMEOUT"],
+                version=config["VERSION"],
+            )
+        return _caches[name]
+
+
+def reset_representation_caches() -> None:
+    """Drop the process-wide cache objects (used by tests and settings changes)."""
+    with _caches_lock:
+        _caches.clear()
+
+
+def representation_cache_stats() -> dict:
+    with _caches_lock:
+        return {name: cache.stats() for name, cache in _caches.items()}
@@ -0,0 +1,127 @@
+"""
+Trip date overlap queries.
+
+Two trips overlap when ``a.start_date <= b.end_date`` and
+``a.end_date >= b.start_date``. No trip lasts longer than
+Trip.MAX_DURATION_DAYS, so an overlapping trip also starts on or after
+``b.start_date - MAX_DURATION_DAYS``. That gives start_date a bound on
+both sides: for one traveler the query is a short range scan on the
+(traveler, start_date, end_date) index with end_date checked from the
+index entry, and across travelers a range scan on the start_date index,
+so the cost does not grow with the trip history.
+
+Only trips that hold the traveler's time (BLOCKING_STATUSES) cause
+conflicts; drafts and rejected trips never block another trip.
+"""
+from datetime import timedelta
+
+from django.db.models import DateField, Exists, ExpressionWrapper, OuterRef
+
+from .models import Traveler, Trip
+
+BLOCKING_STATUSES = ("pending", "approved")
+
+
+MAX_DURATION = timedelta(days=Trip.MAX_DURATION_DAYS)
+
+
+def overlapping(queryset, start_date, end_date):
+    """Filter ``queryset`` to trips overlapping [start_date, end_date]."""
+    return queryset.filter(
+        start_date__gte=start_date - MAX_DURATION,
+        start_date__lte=end_date,
+        end_date__gte=start_date,
+    )
+
+
+def lock_travelers(traveler_ids):
+    """
+    Lock the travelers' rows until the end of the transaction, so
+    concurrent overlap checks for the same traveler run one at a time.
+
+    ``traveler_ids`` may be a list or a values() subquery.
+    """
+    list(
+        Traveler.objects.select_for_update()
+        .filter(pk__in=traveler_ids)
+        .values_list("pk", flat=True)
+    )
+
+
+def find_conflicts(traveler_id, start_date, end_date, exclude_id=None):
+    """
+    Return the traveler's blocking trips overlapping the given dates.
+
+    Args:
+        exclude_id: Trip to leave out (the trip being checked)
+    """
+    queryset = overlapping(
+        Trip.objects.filter(traveler_id=traveler_id, status__in=BLOCKING_STATUSES),
+        start_date,
+        end_date,
+    )
+    if exclude_id is not None:
+        queryset = queryset.exclude(pk=exclude_id)
+    # Index order, so no sort step
+    return queryset.order_by("start_date", "end_date", "id")
+
+
+def has_conflict():
+    """
+    Exists() expression, for annotating Trip querysets, that is true when
+    another blocking trip of the same traveler overlaps the outer trip.
+    """
+    return Exists(
+        Trip.objects.filter(
+            traveler_id=OuterRef("traveler_id"),
+            status__in=BLOCKING_STATUSES,
+            start_date__gte=ExpressionWrapper(
+                OuterRef("start_date") - MAX_DURATION, output_field=DateField()
+            ),
+            start_date__lte=OuterRef("end_date"),
+            end_date__gte=OuterRef("start_date"),
+        ).exclude(pk=OuterRef("pk"))
+    )
+
+
+def traveler_conflicts(traveler_id):
+    """
+    List a traveler's blocking trips that overlap each other.
+
+    Conflicting trips are found with one correlated, index-backed query;
+    only those (normally very few) are paired up in Python.
+
+    Returns:
+        List of (trip, [ids of the trips it overlaps]) ordered by start_date
+    """
+    trips = list(
+        Trip.objects.filter(traveler_id=traveler_id, status__in=BLOCKING_STATUSES)
+        .alias(conflicting=has_conflict())
+        .filter(conflicting=True)
+        .order_by("start_date", "id")
+    )
+    return [
+        (
+            trip,
+            [
+                other.id for other in trips
+                if other.id != trip.id
+                and other.start_date <= trip.end_date
+                and other.end_date >= trip.start_date
+            ],
+        )
+        for trip in trips
+    ]
+
+
+def travelers_abroad(start_date, end_date=None):
+    """
+    Travelers with an approved trip overlapping [start_date, end_date].
+
+    ``end_date`` defaults to ``start_date`` (who is travelling on that day).
+    Driven from the trips in the date range rather than probed per
+    traveler.
+    """
+    end_date = end_date or start_date
+    trips = overlapping(Trip.objects.filter(status="approved"), start_date, end_date)
+    return Traveler.objects.filter(pk__in=trips.values("traveler"))
@@ -0,0 +1,182 @@
+"""
+Full-text search over trips and travelers.
+
+On SQLite two FTS5 tables, kept in sync by triggers (migration 0007),
+index the searchable text:
+
+- ``trips_trip_fts``: trip title, destination and the traveler's name
+  and email (rowid = trip id)
+- ``trips_traveler_fts``: traveler name and email (rowid = traveler id)
+
+Because the triggers live in the database, every write path (ORM saves,
+``bulk_create``, ``.update()``, raw SQL) keeps the index current.
+
+A search joins the FTS table on rowid, so SQLite looks up matches in the
+index instead of running ``LIKE '%x%'`` over every row, and exposes the
+bm25 rank as ``search_rank`` (lower is better). Other databases fall back
+to ``icontains`` filters with a constant ``search_rank``.
+"""
+import re
+
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+
+# model label -> (FTS table, icontains fallback fields)
+SEARCH_INDEXES = {
+    "trips.trip": (
+        "trips_trip_fts",
+        ["title", "destination", "traveler__first_name", "traveler__last_name", "traveler__email"],
+    ),
+    "trips.traveler": (
+        "trips_traveler_fts",
+        ["first_name", "last_name", "email"],
+    ),
+}
+
+# Triggers that keep the FTS tables in sync. SQLite cannot rebuild
+# trips_trip or trips_traveler (Django's ALTER TABLE emulation) while
+# these exist, so migrations that alter those tables must drop and
+# recreate them around the change, with a frozen copy of this SQL (see
+# migration 0008) rather than an import of this module.
+FTS_TRIGGERS_SQL = [
+    # Trips
+    """
+    CREATE TRIGGER trips_trip_fts_insert AFTER INSERT ON trips_trip BEGIN
+        INSERT INTO trips_trip_fts (rowid, title, destination, traveler)
+        SELECT new.id, new.title, new.destination,
+               t.first_name || ' ' || t.last_name || ' ' || t.email
+        FROM trips_traveler t WHERE t.id = new.traveler_id;
+    END
+    """,
+    """
+    CREATE TRIGGER trips_trip_fts_update AFTER UPDATE OF title, destination, traveler_id ON trips_trip BEGIN
+        DELETE FROM trips_trip_fts WHERE rowid = old.id;
+        INSERT INTO trips_trip_fts (rowid, title, destination, traveler)
+        SELECT new.id, new.title, new.destination,
+               t.first_name || ' ' || t.last_name || ' ' || t.email
+        FROM trips_traveler t WHERE t.id = new.traveler_id;
+    END
+    """,
+    """
+    CREATE TRIGGER trips_trip_fts_delete AFTER DELETE ON trips_trip BEGIN
+        DELETE FROM trips_trip_fts WHERE rowid = old.id;
+    END
+    """,
+    # Travelers (a name or email change is copied to all their trips)
+    """
+    CREATE TRIGGER trips_traveler_fts_insert AFTER INSERT ON trips_traveler BEGIN
+        INSERT INTO trips_traveler_fts (rowid, name, email)
+        VALUES (new.id, new.first_name || ' ' || new.last_name, new.email);
+    END
+    """,
+    """
+    CREATE TRIGGER trips_traveler_fts_update AFTER UPDATE OF first_name, last_name, email ON trips_traveler BEGIN
+        DELETE FROM trips_traveler_fts WHERE rowid = old.id;
+        INSERT INTO trips_traveler_fts (rowid, name, email)
+        VALUES (new.id, new.first_name || ' ' || new.last_name, new.email);
+        UPDATE trips_trip_fts
+        SET traveler = new.first_name || ' ' || new.last_name || ' ' || new.email
+        WHERE rowid IN (SELECT id FROM trips_trip WHERE traveler_id = new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER trips_traveler_fts_delete AFTER DELETE ON trips_traveler BEGIN
+        DELETE FROM trips_traveler_fts WHERE rowid = old.id;
+    END
+    """,
+]
+
+FTS_TRIGGER_NAMES = [
+    "trips_trip_fts_insert",
+    "trips_trip_fts_update",
+    "trips_trip_fts_delete",
+    "trips_traveler_fts_insert",
+    "trips_traveler_fts_update",
+    "trips_traveler_fts_delete",
+]
+
+FTS_REBUILD_SQL = [
+    "DELETE FROM trips_traveler_fts",
+    "DELETE FROM trips_trip_fts",
+    """
+    INSERT INTO trips_traveler_fts (rowid, name, email)
+    SELECT id, first_name || ' ' || last_name, email FROM trips_traveler
+    """,
+    """
+    INSERT INTO trips_trip_fts (rowid, title, destination, traveler)
+    SELECT trip.id, trip.title, trip.destination,
+           t.first_name || ' ' || t.last_name || ' ' || t.email
+    FROM trips_trip trip JOIN trips_traveler t ON t.id = trip.traveler_id
+    """,
+]
+
+
+def create_fts_triggers(cursor):
+    for statement in FTS_TRIGGERS_SQL:
+        cursor.execute(statement)
+
+
+def drop_fts_triggers(cursor):
+    for name in FTS_TRIGGER_NAMES:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def rebuild_fts_index(cursor):
+    """Repopulate both FTS tables from the source tables."""
+    for statement in FTS_REBUILD_SQL:
+        cursor.execute(statement)
+
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def search_terms(text):
+    """Split user input into search tokens."""
+    return _TOKEN_RE.findall(text or "")
+
+
+def fts_query(terms):
+    """
+    Build an FTS5 MATCH expression: every term must match as a prefix.
+
+    Terms are quoted, so FTS5 operators in user input are searched as
+    plain words.
+    """
+    return " AND ".join(f'"{term}"*' for term in terms)
+
+
+def search(queryset, text):
+    """
+    Filter ``queryset`` to rows matching ``text``.
+
+    The result carries a ``search_rank`` column (bm25 on SQLite, lower is
+    more relevant); order by it for relevance.
+
+    Returns:
+        The filtered queryset, or ``queryset`` unchanged if ``text`` has
+        no searchable terms
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset
+
+    model = queryset.model
+    table, fallback_fields = SEARCH_INDEXES[model._meta.label_lower]
+    if connections[queryset.db].vendor != "sqlite":
+        return _icontains(queryset, terms, fallback_fields)
+
+    return queryset.extra(
+        tables=[table],
+        where=[f"{table}.rowid = {model._meta.db_table}.id", f"{table} MATCH %s"],
+        params=[fts_query(terms)],
+        select={"search_rank": f"{table}.rank"},
+    )
+
+
+def _icontains(queryset, terms, fields):
+    for term in terms:
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f"{field}__icontains": term})
+        queryset = queryset.filter(condition)
+    return queryset.distinct().annotate(search_rank=Value(0.0, output_field=FloatField()))
@@ -0,0 +1,284 @@
+"""
+Synthetic dataset generator (``manage.py seed_trips``).
+
+Builds production-sized Traveler and Trip tables quickly and
+reproducibly: the same seed and distributions always produce the same
+rows.
+
+- rows are generated a chunk at a time with ``random.choices`` and
+  written with one ``executemany`` per chunk, all in one transaction
+- a traveler's trips never overlap (as trips.scheduling requires of
+  pending and approved trips): trips are dealt to travelers round-robin
+  and each traveler's n-th trip falls in the n-th of equal slots of the
+  date span, at a random offset
+- column values are adapted once per distinct value (dates, months)
+  instead of once per row
+- the trip table's secondary indexes and FTS triggers are dropped
+  during the insert and rebuilt once at the end, which is much cheaper
+  than maintaining them row by row
+- derived data (trip counts, FTS index, department spend rollup) is
+  rebuilt afterwards in bulk
+
+Signals do not fire for seeded rows; everything they maintain is rebuilt
+by ``seed()`` itself.
+"""
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, time as dt_time, timedelta, timezone as dt_timezone
+from typing import Dict, Tuple
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Traveler, Trip
+from .reporting import rebuild_department_spend
+from .search import create_fts_triggers, drop_fts_triggers, rebuild_fts_index
+from .signals import repair_trip_counts
+
+DEFAULT_DEPARTMENTS = {
+    "Engineering": 30, "Sales": 20, "Operations": 15, "Marketing": 10,
+    "Finance": 10, "HR": 5, "Legal": 5, "Executive": 5,
+}
+DEFAULT_DESTINATIONS = {
+    "London": 12, "Berlin": 10, "Paris": 10, "New York": 8, "Amsterdam": 7,
+    "Madrid": 6, "Vienna": 6, "Munich": 6, "Zurich": 5, "Warsaw": 5,
+    "Prague": 5, "Lisbon": 4, "Stockholm": 4, "Dubai": 4, "Singapore": 3,
+    "Tokyo": 3, "San Francisco": 2,
+}
+DEFAULT_STATUSES = {"draft": 10, "pending": 15, "approved": 65, "rejected": 10}
+
+FIRST_NAMES = [
+    "Ana", "Marko", "Lena", "Ivan", "Sara", "Luka", "Mia", "Nikola", "Eva",
+    "Petar", "Nina", "Filip", "Maja", "David", "Iva", "Stefan", "Lara",
+    "Milan", "Tea", "Jan", "Emma", "Noah", "Olivia", "Liam", "Sofia",
+]
+LAST_NAMES = [
+    "Horvat", "Kovac", "Novak", "Petrovic", "Jovanovic", "Babic", "Maric",
+    "Schmidt", "Muller", "Fischer", "Weber", "Rossi", "Bianchi", "Garcia",
+    "Martin", "Dubois", "Smith", "Jones", "Brown", "Nowak", "Svoboda",
+]
+
+
+def parse_weights(value: str) -> Dict[str, float]:
+    """
+    Parse ``"name:weight,name:weight"`` (a bare name has weight 1).
+
+    Raises:
+        ValueError: If a weight is not a positive number
+    """
+    weights = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, _, weight = item.partition(":")
+        weight = float(weight) if weight.strip() else 1.0
+        if weight <= 0:
+            raise ValueError(f"Weight for {name.strip()!r} must be positive")
+        weights[name.strip()] = weight
+    if not weights:
+        raise ValueError("At least one value is required")
+    return weights
+
+
+def parse_range(value: str) -> Tuple[float, float]:
+    """Parse ``"min-max"`` (or a single number) into a (min, max) pair."""
+    low, _, high = value.partition("-")
+    low, high = float(low), float(high or low)
+    if low < 0 or high < low:
+        raise ValueError(f"Invalid range {value!r}")
+    return low, high
+
+
+@dataclass
+class SeedConfig:
+    """What to generate; the defaults give a realistic mid-size company."""
+    trips: int = 100_000
+    travelers: int = 2_000
+    seed: int = 1
+    departments: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_DEPARTMENTS))
+    destinations: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_DESTINATIONS))
+    statuses: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_STATUSES))
+    # Inclusive trip length in days (end_date - start_date)
+    length_days: Tuple[int, int] = (1, 14)
+    # Inclusive estimated cost range; cost_missing is the share left empty
+    cost: Tuple[float, float] = (150.0, 6000.0)
+    cost_missing: float = 0.05
+    # Trips start between start_from and start_from + span_days
+    start_from: date = date(2020, 1, 1)
+    span_days: int = 365 * 6
+    chunk_size: int = 50_000
+    defer_indexes: bool = True
+
+
+def _insert_travelers(config, rng, cursor, now):
+    """Insert travelers; returns their ids."""
+    first_id = (Traveler.objects.order_by("-id").values_list("id", flat=True).first() or 0) + 1
+    departments = list(config.departments)
+    department_weights = list(config.departments.values())
+    now_value = connection.ops.adapt_datetimefield_value(now)
+    rows = []
+    for offset, department in enumerate(
+        rng.choices(departments, department_weights, k=config.travelers)
+    ):
+        traveler_id = first_id + offset
+        first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        rows.append((
+            traveler_id, first_name, last_name,
+            f"{first_name}.{last_name}.{traveler_id}@example.com".lower(),
+            department, 0, now_value, now_value,
+        ))
+    cursor.executemany(
+        f"INSERT INTO {Traveler._meta.db_table} "
+        "(id, first_name, last_name, email, department, trip_count, created_at, updated_at) "
+        "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+        rows,
+    )
+    # Explicit ids do not advance sequences (no-op on SQLite)
+    for statement in connection.ops.sequence_reset_sql(no_style(), [Traveler]):
+        cursor.execute(statement)
+    return list(range(first_id, first_id + config.travelers))
+
+
+def trip_slot_days(config: SeedConfig) -> int:
+    """
+    Days of the span given to each traveler's n-th trip.
+
+    Raises:
+        ValueError: If the travelers' trips cannot fit in the span
+            without overlapping
+    """
+    rounds = -(-config.trips // max(config.travelers, 1))
+    slot = (config.span_days + 1) // max(rounds, 1)
+    if slot < config.length_days[1] + 1:
+        raise ValueError(
+            f"{rounds} trips per traveler of up to {config.length_days[1]} days "
+            f"do not fit in {config.span_days} days without overlapping"
+        )
+    return slot
+
+
+def _trip_chunks(config, rng, traveler_ids, now):
+    """Yield lists of trip rows, ``config.chunk_size`` at a time."""
+    ops = connection.ops
+    destinations = list(config.destinations)
+    destination_weights = list(config.destinations.values())
+    statuses = list(config.statuses)
+    status_weights = list(config.statuses.values())
+    min_length, max_length = config.length_days
+    min_cents, max_cents = int(config.cost[0] * 100), int(config.cost[1] * 100)
+
+    # Adapted column values, computed once per day instead of per row
+    days = [
+        ops.adapt_datefield_value(config.start_from + timedelta(days=offset))
+        for offset in range(config.span_days + max_length + 1)
+    ]
+    # Trips are created up to 60 days before they start
+    midnight = datetime.combine(config.start_from, dt_time(), tzinfo=dt_timezone.utc)
+    created = [
+        ops.adapt_datetimefield_value(min(midnight + timedelta(days=offset - 60, hours=9), now))
+        for offset in range(config.span_days + 1)
+    ]
+    now_value = ops.adapt_datetimefield_value(now)
+
+    slot = trip_slot_days(config)
+    travelers = list(traveler_ids)
+    rng.shuffle(travelers)
+
+    made = 0
+    while made < config.trips:
+        count = min(config.chunk_size, config.trips - made)
+        rows = []
+        for number, destination, status, length, cents, missing in zip(
+            range(made, made + count),
+            rng.choices(destinations, destination_weights, k=count),
+            rng.choices(statuses, status_weights, k=count),
+            (rng.randint(min_length, max_length) for _ in range(count)),
+            (rng.randint(min_cents, max_cents) for _ in range(count)),
+            (rng.random() < config.cost_missing for _ in range(count)),
+        ):
+            # Round n of the deal: each traveler's n-th trip, in slot n
+            round_number, position = divmod(number, len(travelers))
+            traveler_id = travelers[position]
+            start = round_number * slot + rng.randrange(slot - length)
+            rows.append((
+                f"{destination} trip {number + 1}", traveler_id, destination,
+                days[start], days[start + length], status,
+                None if missing else f"{cents // 100}.{cents % 100:02d}",
+                created[start], now_value,
+            ))
+        yield rows
+        made += count
+
+
+def seed(config: SeedConfig, log=None) -> dict:
+    """
+    Insert ``config.travelers`` travelers and ``config.trips`` trips.
+
+    Args:
+        log: Optional callable receiving progress messages
+
+    Returns:
+        Counts and timings of each phase
+    """
+    log = log or (lambda message: None)
+    rng = random.Random(config.seed)
+    now = timezone.now()
+    timings = {}
+    sqlite = connection.vendor == "sqlite"
+    indexes = list(Trip._meta.indexes) if config.defer_indexes else []
+    # Only used to generate index DDL; SQLite does not allow entering a
+    # schema editor inside the transaction.
+    editor = connection.SchemaEditorClass(connection)
+
+    started = time.perf_counter()
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            if sqlite:
+                drop_fts_triggers(cursor)
+            for index in indexes:
+                cursor.execute(editor.sql_delete_index % {
+                    "table": editor.quote_name(Trip._meta.db_table),
+                    "name": editor.quote_name(index.name),
+                })
+
+            traveler_ids = _insert_travelers(config, rng, cursor, now)
+            log(f"Inserted {len(traveler_ids)} traveler(s)")
+
+            insert_trip = (
+                f"INSERT INTO {Trip._meta.db_table} "
+                "(title, traveler_id, destination, start_date, end_date, status, "
+                "estimated_cost, created_at, updated_at) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)"
+            )
+            inserted = 0
+            for rows in _trip_chunks(config, rng, traveler_ids, now):
+                cursor.executemany(insert_trip, rows)
+                inserted += len(rows)
+                log(f"Inserted {inserted}/{config.trips} trip(s)")
+            timings["insert"] = time.perf_counter() - started
+
+            phase = time.perf_counter()
+            for index in indexes:
+                cursor.execute(str(index.create_sql(Trip, editor)))
+            timings["indexes"] = time.perf_counter() - phase
+
+            phase = time.perf_counter()
+            if sqlite:
+                rebuild_fts_index(cursor)
+                create_fts_triggers(cursor)
+            timings["search_index"] = time.perf_counter() - phase
+
+        phase = time.perf_counter()
+        repair_trip_counts()
+        rebuild_department_spend()
+        timings["aggregates"] = time.perf_counter() - phase
+
+    timings["total"] = time.perf_counter() - started
+    return {
+        "travelers": len(traveler_ids),
+        "trips": config.trips,
+        "seconds": {name: round(value, 2) for name, value in timings.items()},
+    }
+
@@ -6,19 +6,102 @@ to JSON and validating incoming data.
 """
 from datetime import date
 
+from django.core.exceptions import FieldDoesNotExist
 from rest_framework import serializers
 
 from .models import Traveler, Trip
+from .scheduling import find_conflicts
+from .workflow import TRANSITIONS
+
+
+def _parse_list_param(request, name):
+    """Split a comma-separated query parameter into a set of names."""
+    query_params = getattr(request, 'query_params', None) or {}
+    value = query_params.get(name, '')
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+class SparseFieldsetMixin:
+    """
+    Lets read requests shape a ModelSerializer's output.
+
+    - ``?fields=id,status`` keeps only the listed fields
+    - ``?expand=traveler`` adds the nested fields named in
+      ``expandable_fields``
+
+    ``get_queryset_fields()`` turns the resulting field set into model
+    paths for ``QuerySet.only()`` so the database fetches the same
+    columns the response will contain.
+
+    Subclasses declare:
+        expandable_fields: expand name -> (field name, field factory)
+        field_dependencies: serializer field -> model paths it reads
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+    expandable_fields = {}
+    field_dependencies = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return fields
+
+        expand = _parse_list_param(request, self.expand_query_param)
+        expanded = set()
+        for name, (field_name, factory) in self.expandable_fields.items():
+            if name in expand:
+                expanded.add(field_name)
+                if field_name not in fields:
+                    fields[field_name] = factory()
+
+        requested = _parse_list_param(request, self.fields_query_param)
+        if requested:
+            keep = requested | expanded
+            for field_name in list(fields):
+                if field_name not in keep:
+                    fields.pop(field_name)
+        return fields
+
+    def get_queryset_fields(self):
+        """
+        Return the model paths needed to render the current fields.
+
+        Returns None if some field's source cannot be resolved, in which
+        case the caller should not restrict the columns.
+        """
+        model = self.Meta.model
+        paths = set()
+        for name, field in self.fields.items():
+            if field.write_only:
+                continue
+            if name in self.field_dependencies:
+                paths.update(self.field_dependencies[name])
+                continue
+            if isinstance(field, serializers.BaseSerializer):
+                related_model = field.Meta.model
+                paths.update(
+                    f'{field.source}__{f.name}'
+                    for f in related_model._meta.concrete_fields
+                )
+                continue
+            try:
+                model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                return None
+            paths.add(field.source)
+        return paths
 
 
 class TravelerSerializer(serializers.ModelSerializer):
     """
     Serializer for Traveler model.
 
-    Includes computed full_name field and trip count.
+    Includes computed full_name field and the denormalized trip count.
     """
     full_name = serializers.CharField(read_only=True)
-    trip_count = serializers.SerializerMethodField()
+    trip_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Traveler
@@ -28,16 +111,19 @@ class TravelerSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_at']
 
-    def get_trip_count(self, obj):
-        """Return the number of trips for this traveler."""
-        return obj.trips.count()
-
     def validate_email(self, value):
         """Ensure email is lowercase and properly formatted."""
         return value.lower().strip()
 
 
-class TripSerializer(serializers.ModelSerializer):
+TRIP_FIELD_DEPENDENCIES = {
+    'duration_days': ('start_date', 'end_date'),
+    'is_editable': ('status',),
+    'traveler_name': ('traveler__first_name', 'traveler__last_name'),
+}
+
+
+class TripSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for Trip model.
 
@@ -46,6 +132,7 @@ class TripSerializer(serializers.ModelSerializer):
     - Date validation (end_date must be after start_date)
     - Computed duration_days field
     - Status transition validation
+    - Sparse fieldsets via ?fields=
     """
     traveler_detail = TravelerSerializer(source='traveler', read_only=True)
     traveler = serializers.PrimaryKeyRelatedField(
@@ -66,13 +153,23 @@ class TripSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_at', 'updated_at']
 
+    field_dependencies = TRIP_FIELD_DEPENDENCIES
+
+    # Historic imports may create trips that started in the past.
+    allow_past_start_date = False
+    # Reject dates overlapping the traveler's pending/approved trips.
+    check_overlaps = True
+
     def validate(self, data):
         """
         Cross-field validation.
 
         Ensures:
-        - end_date is after start_date
-        - start_date is not in the past for new trips
+        - end_date is after start_date, by at most Trip.MAX_DURATION_DAYS
+        - start_date is not in the past for new trips (unless
+          allow_past_start_date is set)
+        - the dates don't overlap another pending or approved trip of
+          the traveler (unless check_overlaps is unset)
         """
         start_date = data.get('start_date')
         end_date = data.get('end_date')
@@ -82,16 +179,47 @@ class TripSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError({
                     'end_date': 'End date must be after start date.'
                 })
+            if (end_date - start_date).days > Trip.MAX_DURATION_DAYS:
+                raise serializers.ValidationError({
+                    'end_date': f'Trips can last at most {Trip.MAX_DURATION_DAYS} days.'
+                })
 
         # For new trips, don't allow past start dates
-        if self.instance is None and start_date:
+        if self.instance is None and start_date and not self.allow_past_start_date:
             if start_date < date.today():
                 raise serializers.ValidationError({
                     'start_date': 'Start date cannot be in the past.'
                 })
 
+        if self.check_overlaps:
+            self.validate_no_overlap(data)
+
         return data
 
+    def validate_no_overlap(self, data):
+        """Reject dates that overlap another blocking trip of the traveler."""
+        instance = self.instance
+        if instance is not None and not {'traveler', 'start_date', 'end_date'} & data.keys():
+            return
+        traveler = data.get('traveler') or getattr(instance, 'traveler', None)
+        start_date = data.get('start_date') or getattr(instance, 'start_date', None)
+        end_date = data.get('end_date') or getattr(instance, 'end_date', None)
+        if traveler is None or start_date is None or end_date is None:
+            return
+        conflicts = list(
+            find_conflicts(
+                traveler.pk, start_date, end_date,
+                exclude_id=getattr(instance, 'pk', None),
+            ).values_list('id', flat=True)[:10]
+        )
+        if conflicts:
+            raise serializers.ValidationError({
+                'non_field_errors': [
+                    'Dates overlap the traveler\'s pending or approved '
+                    f'trip(s): {", ".join(map(str, conflicts))}.'
+                ]
+            })
+
     def validate_estimated_cost(self, value):
         """Ensure estimated cost is positive."""
         if value is not None and value < 0:
@@ -101,11 +229,45 @@ class TripSerializer(serializers.ModelSerializer):
         return value
 
 
-class TripListSerializer(serializers.ModelSerializer):
+class TripImportSerializer(TripSerializer):
+    """
+    Validates one row of a bulk trip import.
+
+    Applies the TripSerializer rules, but identifies the traveler by id
+    or email without a per-row database lookup: the importer resolves
+    travelers for a whole chunk in one query.
+    """
+    traveler = serializers.IntegerField(required=False, min_value=1)
+    traveler_email = serializers.EmailField(required=False)
+
+    allow_past_start_date = True
+    # A per-row overlap query would defeat chunked validation; the
+    # importer checks overlaps for a whole chunk at once.
+    check_overlaps = False
+
+    class Meta:
+        model = Trip
+        fields = [
+            'title', 'destination', 'start_date', 'end_date',
+            'status', 'estimated_cost', 'traveler', 'traveler_email',
+        ]
+
+    def validate(self, data):
+        if not data.get('traveler') and not data.get('traveler_email'):
+            raise serializers.ValidationError({
+                'traveler': 'Provide a traveler id or traveler_email.'
+            })
+        if data.get('traveler_email'):
+            data['traveler_email'] = data['traveler_email'].lower().strip()
+        return super().validate(data)
+
+
+class TripListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Lightweight serializer for trip listings.
 
-    Used for list views to reduce payload size.
+    Used for list views to reduce payload size. Supports ?fields= and
+    ?expand=traveler for the full nested traveler record.
     """
     traveler_name = serializers.CharField(
         source='traveler.full_name',
@@ -119,3 +281,47 @@ class TripListSerializer(serializers.ModelSerializer):
             'start_date', 'end_date', 'status',
             'traveler_name'
         ]
+
+    expandable_fields = {
+        'traveler': (
+            'traveler_detail',
+            lambda: TravelerSerializer(source='traveler', read_only=True),
+        ),
+    }
+    field_dependencies = TRIP_FIELD_DEPENDENCIES
+
+
+class FlightQuerySerializer(serializers.Serializer):
+    """One leg of a batch flight search."""
+    origin = serializers.CharField(max_length=3)
+    destination = serializers.CharField(max_length=3)
+    date = serializers.DateField()
+
+
+class FlightSearchBatchSerializer(serializers.Serializer):
+    """
+    Request body for a batch flight search.
+
+    max_queries bounds the list size; pass it via context to override the
+    configured default.
+    """
+    queries = FlightQuerySerializer(many=True, allow_empty=False)
+    timeout = serializers.FloatField(required=False, min_value=0.1, max_value=30)
+
+    def validate_queries(self, value):
+        max_queries = self.context.get('max_queries')
+        if max_queries is not None and len(value) > max_queries:
+            raise serializers.ValidationError(
+                f'At most {max_queries} queries per batch.'
+            )
+        return value
+
+
+class BulkTransitionSerializer(serializers.Serializer):
+    """Request body for a bulk workflow transition."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=1000,
+    )
+    transition = serializers.ChoiceField(choices=sorted(TRANSITIONS))
@@ -6,15 +6,191 @@ and hotel APIs. In production, these would connect to real providers like
 Amadeus GDS or Booking.com.
 """
 import logging
+import random
 import time
-from typing import Optional
+from typing import Callable, Iterator, List, Optional, Tuple
 
 import requests
 
+from .cache import ResultCache, get_result_cache
+from .concurrency import (
+    SingleFlight,
+    get_concurrency_settings,
+    get_single_flight,
+    iter_bounded,
+    run_parallel,
+)
+from .http_client import ProviderHTTPClient, get_http_client
+from .instrumentation import timed
+from .metrics import (
+    PROVIDER_ATTEMPTS,
+    PROVIDER_FAILURES,
+    PROVIDER_LATENCY,
+    PROVIDER_RETRIES,
+    PROVIDER_TIMEOUTS,
+)
+from .resilience import get_circuit_breaker
+
 logger = logging.getLogger(__name__)
 
 
-class FlightService:
+class ProviderService:
+    """
+    Base class for external provider integrations.
+
+    Provides the shared pooled HTTP client (see trips.http_client), a
+    per-provider circuit breaker (see trips.resilience), the retry
+    wrapper used for every upstream call, and ``_lookup`` which puts the
+    result cache (trips.cache) and request coalescing
+    (trips.concurrency) in front of a fetch.
+    """
+
+    NAMESPACE = None  # cache/coalescing namespace, set by subclasses
+
+    MAX_RETRIES = 3
+    INITIAL_BACKOFF = 1  # seconds
+    REQUEST_TIMEOUT = 10  # seconds, per attempt
+    TOTAL_DEADLINE = 8  # seconds, all attempts and backoff together
+    BREAKER_FAILURE_THRESHOLD = 5
+    BREAKER_RECOVERY_TIMEOUT = 30  # seconds
+
+    def __init__(
+        self,
+        cache: Optional[ResultCache] = None,
+        http: Optional[ProviderHTTPClient] = None,
+        coalescer: Optional[SingleFlight] = None,
+    ):
+        self.cache = cache if cache is not None else get_result_cache(self.NAMESPACE)
+        self.coalescer = coalescer if coalescer is not None else get_single_flight(self.NAMESPACE)
+        self.http = http if http is not None else get_http_client()
+        self.breaker = get_circuit_breaker(
+            type(self).__name__,
+            failure_threshold=self.BREAKER_FAILURE_THRESHOLD,
+            recovery_timeout=self.BREAKER_RECOVERY_TIMEOUT,
+        )
+
+    def _lookup(self, key: str, fetch: Callable[[], Optional[dict]]) -> Optional[dict]:
+        """
+        Return a cached result for ``key`` or fetch it upstream.
+
+        On a cache miss, identical concurrent fetches are coalesced so only
+        one upstream call is in flight per key. The time spent is recorded
+        under NAMESPACE in the request's Server-Timing (trips.instrumentation).
+        """
+        compute = fetch
+        if self.coalescer is not None:
+            lookup = (lambda: self.cache.peek(key)) if self.cache is not None else None
+            compute = lambda: self.coalescer.do(key, fetch, lookup=lookup)  # noqa: E731
+
+        with timed(self.NAMESPACE):
+            if self.cache is None:
+                return compute()
+            return self.cache.get_or_compute(key, compute)
+
+    def _call_api_with_retry(
+        self,
+        url: str,
+        params: dict,
+        method: str = "GET",
+        deadline: Optional[float] = None,
+    ) -> Optional[dict]:
+        """
+        Make API call with jittered exponential backoff retry logic.
+
+        Implements retry pattern for handling transient failures:
+        - Timeout errors: Retry with backoff
+        - 5xx errors: Retry with backoff
+        - 4xx errors: Do not retry (client error)
+        - Open circuit breaker: Fail immediately
+
+        Every attempt timeout and backoff sleep is capped by the time left
+        before the deadline, so a call never blocks longer than
+        TOTAL_DEADLINE seconds.
+
+        Attempts, retries, timeouts, per-attempt latency and failures by
+        reason are recorded in trips.metrics, labelled with the service.
+
+        Args:
+            url: Full API endpoint URL
+            params: Query parameters or request body
+            method: HTTP method (GET or POST)
+            deadline: Absolute time.monotonic() deadline shared with the
+                caller; defaults to now + TOTAL_DEADLINE
+
+        Returns:
+            JSON response as dict, or None if all retries fail
+        """
+        if deadline is None:
+            deadline = time.monotonic() + self.TOTAL_DEADLINE
+        backoff = self.INITIAL_BACKOFF
+        service = type(self).__name__
+
+        for attempt in range(self.MAX_RETRIES):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.error(f"Deadline exceeded before attempt {attempt + 1} for {url}")
+                PROVIDER_FAILURES.inc(service, "deadline_exceeded")
+                return None
+            if not self.breaker.allow_request():
+                logger.warning(f"Circuit breaker {self.breaker.name} is open, skipping {url}")
+                PROVIDER_FAILURES.inc(service, "circuit_open")
+                return None
+
+            timeout = min(self.REQUEST_TIMEOUT, remaining)
+            PROVIDER_ATTEMPTS.inc(service)
+            try:
+                with PROVIDER_LATENCY.time(service):
+                    if method == "GET":
+                        response = self.http.request("GET", url, params=params, timeout=timeout)
+                    else:
+                        response = self.http.request("POST", url, json=params, timeout=timeout)
+
+                response.raise_for_status()
+                self.breaker.record_success()
+                return response.json()
+
+            except requests.exceptions.Timeout:
+                self.breaker.record_failure()
+                PROVIDER_TIMEOUTS.inc(service)
+                PROVIDER_FAILURES.inc(service, "timeout")
+                logger.warning(
+                    f"Timeout on attempt {attempt + 1}/{self.MAX_RETRIES} "
+                    f"for {url}"
+                )
+            except requests.exceptions.HTTPError as e:
+                if response.status_code >= 500:
+                    self.breaker.record_failure()
+                    PROVIDER_FAILURES.inc(service, "server_error")
+                    logger.warning(
+                        f"Server error {response.status_code} on attempt "
+                        f"{attempt + 1}/{self.MAX_RETRIES}"
+                    )
+                else:
+                    # Client error - provider is up, don't retry
+                    self.breaker.record_success()
+                    PROVIDER_FAILURES.inc(service, "client_error")
+                    logger.error(f"Client error: {e}")
+                    return None
+            except requests.exceptions.RequestException as e:
+                self.breaker.record_failure()
+                PROVIDER_FAILURES.inc(service, "request_error")
+                logger.error(f"Request failed: {e}")
+
+            # Jittered exponential backoff before retry, within the deadline
+            if attempt < self.MAX_RETRIES - 1:
+                delay = random.uniform(0, backoff)
+                if time.monotonic() + delay >= deadline:
+                    break
+                logger.info(f"Retrying in {delay:.2f} seconds...")
+                PROVIDER_RETRIES.inc(service)
+                time.sleep(delay)
+                backoff *= 2  # Exponential backoff
+
+        logger.error(f"All retry attempts failed for {url}")
+        return None
+
+
+class FlightService(ProviderService):
     """
     Service for searching and booking flights.
 
@@ -22,32 +198,101 @@ class FlightService:
     For demo: Returns mock data
 
     Features:
-    - Retry logic with exponential backoff
-    - Request timeout handling
+    - Retry logic with jittered exponential backoff
+    - Request timeout handling with a total deadline
+    - Circuit breaker that fails fast during provider outages
+    - Pooled keep-alive connections
     - Structured error logging
+    - TTL result cache with stale-while-revalidate (see trips.cache)
+    - Coalescing of identical concurrent searches
     """
 
     BASE_URL = "https://api.amadeus.com/v2"
-    MAX_RETRIES = 3
-    INITIAL_BACKOFF = 1  # seconds
+    NAMESPACE = "flights"
+
+    @staticmethod
+    def cache_key(origin: str, destination: str, date: str) -> str:
+        """Normalized cache key for a flight search."""
+        return f"{origin.strip().upper()}:{destination.strip().upper()}:{date.strip()}"
 
     def search_flights(
         self,
         origin: str,
         destination: str,
-        date: str
+        date: str,
+        deadline: Optional[float] = None,
     ) -> Optional[dict]:
         """
         Search for available flights.
 
+        Results are served from the provider cache when possible, and
+        identical concurrent searches share one upstream call.
+        The returned dict may be shared with other callers; don't mutate it.
+
         Args:
             origin: IATA airport code (e.g., 'BEG')
             destination: IATA airport code (e.g., 'BCN')
             date: Travel date in YYYY-MM-DD format
+            deadline: Absolute time.monotonic() deadline for the upstream
+                call (see _call_api_with_retry)
 
         Returns:
             Dict containing flight results or None if unavailable
         """
+        return self._lookup(
+            self.cache_key(origin, destination, date),
+            lambda: self._search_flights(origin, destination, date, deadline=deadline),
+        )
+
+    def search_flights_batch(
+        self,
+        queries: List[dict],
+        concurrency: int,
+        timeout: float,
+    ) -> Iterator[Tuple[List[int], Optional[dict], Optional[str]]]:
+        """
+        Search several routes in parallel.
+
+        Identical legs (after key normalization) are searched once.
+
+        Args:
+            queries: Dicts with origin, destination and date (YYYY-MM-DD)
+            concurrency: Maximum searches in flight at once
+            timeout: Seconds allowed per search
+
+        Yields:
+            (indexes, result, error) as each unique leg completes, where
+            indexes are the positions in ``queries`` sharing that leg
+        """
+        legs = {}
+        for index, query in enumerate(queries):
+            key = self.cache_key(query["origin"], query["destination"], query["date"])
+            legs.setdefault(key, (query, []))[1].append(index)
+
+        # Each leg's upstream call stops when its wait does
+        calls = {
+            key: (lambda q=query: self.search_flights(
+                q["origin"], q["destination"], q["date"], deadline=time.monotonic() + timeout,
+            ))
+            for key, (query, _) in legs.items()
+        }
+        for key, result, error in iter_bounded(calls, limit=concurrency, timeout=timeout):
+            if result is None and error is None:
+                error = "unavailable"
+            yield legs[key][1], result, error
+
+    def _search_flights(
+        self,
+        origin: str,
+        destination: str,
+        date: str,
+        deadline: Optional[float] = None,
+    ) -> Optional[dict]:
+        """
+        Fetch flights from the provider, bypassing the cache.
+
+        The real call goes through _call_api_with_retry(..., deadline=deadline).
+        """
         # Mock data for demo - in production would call real API
         return {
             "flights": [
@@ -88,69 +333,8 @@ class FlightService:
             "currency": "EUR",
         }
 
-    def _call_api_with_retry(
-        self,
-        url: str,
-        params: dict,
-        method: str = "GET"
-    ) -> Optional[dict]:
-        """
-        Make API call with exponential backoff retry logic.
-
-        Implements retry pattern for handling transient failures:
-        - Timeout errors: Retry with backoff
-        - 5xx errors: Retry with backoff
-        - 4xx errors: Do not retry (client error)
-
-        Args:
-            url: Full API endpoint URL
-            params: Query parameters or request body
-            method: HTTP method (GET or POST)
-
-        Returns:
-            JSON response as dict, or None if all retries fail
-        """
-        backoff = self.INITIAL_BACKOFF
-
-        for attempt in range(self.MAX_RETRIES):
-            try:
-                if method == "GET":
-                    response = requests.get(url, params=params, timeout=10)
-                else:
-                    response = requests.post(url, json=params, timeout=10)
-
-                response.raise_for_status()
-                return response.json()
-
-            except requests.exceptions.Timeout:
-                logger.warning(
-                    f"Timeout on attempt {attempt + 1}/{self.MAX_RETRIES} "
-                    f"for {url}"
-                )
-            except requests.exceptions.HTTPError as e:
-                if response.status_code >= 500:
-                    logger.warning(
-                        f"Server error {response.status_code} on attempt "
-                        f"{attempt + 1}/{self.MAX_RETRIES}"
-                    )
-                else:
-                    # Client error - don't retry
-                    logger.error(f"Client error: {e}")
-                    return None
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Request failed: {e}")
-
-            # Exponential backoff before retry
-            if attempt < self.MAX_RETRIES - 1:
-                logger.info(f"Retrying in {backoff} seconds...")
-                time.sleep(backoff)
-                backoff *= 2  # Exponential backoff
-
-        logger.error(f"All {self.MAX_RETRIES} retry attempts failed for {url}")
-        return None
-
 
-class HotelService:
+class HotelService(ProviderService):
     """
     Service for searching and booking hotels.
 
@@ -158,23 +342,53 @@ class HotelService:
     For demo: Returns mock data
     """
 
+    NAMESPACE = "hotels"
+
+    @staticmethod
+    def cache_key(city: str, check_in: str, check_out: str) -> str:
+        """Normalized cache key for a hotel search."""
+        return f"{city.strip().lower()}:{check_in.strip()}:{check_out.strip()}"
+
     def search_hotels(
         self,
         city: str,
         check_in: str,
-        check_out: str
+        check_out: str,
+        deadline: Optional[float] = None,
     ) -> Optional[dict]:
         """
         Search for available hotels.
 
+        Results are served from the provider cache when possible, and
+        identical concurrent searches share one upstream call.
+
         Args:
             city: City name or code
             check_in: Check-in date (YYYY-MM-DD)
             check_out: Check-out date (YYYY-MM-DD)
+            deadline: Absolute time.monotonic() deadline for the upstream
+                call (see _call_api_with_retry)
 
         Returns:
             Dict containing hotel results
         """
+        return self._lookup(
+            self.cache_key(city, check_in, check_out),
+            lambda: self._search_hotels(city, check_in, check_out, deadline=deadline),
+        )
+
+    def _search_hotels(
+        self,
+        city: str,
+        check_in: str,
+        check_out: str,
+        deadline: Optional[float] = None,
+    ) -> Optional[dict]:
+        """
+        Fetch hotels from the provider, bypassing the cache.
+
+        The real call goes through _call_api_with_retry(..., deadline=deadline).
+        """
         return {
             "hotels": [
                 {
@@ -198,3 +412,87 @@ class HotelService:
             "check_in": check_in,
             "check_out": check_out,
         }
+
+
+class TripQuoteService:
+    """
+    Builds a combined flight + hotel quote for a trip.
+
+    Both provider searches run concurrently under one deadline, so the
+    quote takes about as long as the slower search. The deadline is also
+    passed to the provider calls, which give up instead of holding a pool
+    thread after the quote has stopped waiting. A provider that fails or
+    misses the deadline is reported in ``unavailable`` and the quote is
+    returned with the offers that did arrive.
+    """
+
+    def __init__(
+        self,
+        flight_service: Optional[FlightService] = None,
+        hotel_service: Optional[HotelService] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.flight_service = flight_service or FlightService()
+        self.hotel_service = hotel_service or HotelService()
+        self.timeout = timeout if timeout is not None else get_concurrency_settings()["QUOTE_TIMEOUT"]
+
+    def quote(self, trip, origin: str) -> Optional[dict]:
+        """
+        Quote a trip.
+
+        Args:
+            trip: Trip instance (destination and dates are used)
+            origin: IATA code of the departure airport
+
+        Returns:
+            Quote dict, or None if neither provider answered
+        """
+        start, end = trip.start_date.isoformat(), trip.end_date.isoformat()
+        deadline = time.monotonic() + self.timeout
+        results, errors = run_parallel(
+            {
+                "flights": lambda: self.flight_service.search_flights(
+                    origin, trip.destination, start, deadline=deadline,
+                ),
+                "hotels": lambda: self.hotel_service.search_hotels(
+                    trip.destination, start, end, deadline=deadline,
+                ),
+            },
+            timeout=self.timeout,
+        )
+        for name in ("flights", "hotels"):
+            if results.get(name) is None:
+                results.pop(name, None)
+                errors.setdefault(name, "unavailable")
+
+        if not results:
+            return None
+
+        nights = max(trip.duration_days, 1)
+        return {
+            "trip_id": trip.id,
+            "origin": origin,
+            "destination": trip.destination,
+            "start_date": start,
+            "end_date": end,
+            "flights": results.get("flights"),
+            "hotels": results.get("hotels"),
+            "estimate": self.estimate(results.get("flights"), results.get("hotels"), nights),
+            "partial": bool(errors),
+            "unavailable": errors,
+        }
+
+    @staticmethod
+    def estimate(flights: Optional[dict], hotels: Optional[dict], nights: int) -> dict:
+        """Cheapest flight plus cheapest hotel for the trip's nights."""
+        flight_price = min((f["price"] for f in (flights or {}).get("flights", [])), default=None)
+        night_price = min((h["price_per_night"] for h in (hotels or {}).get("hotels", [])), default=None)
+        hotel_price = night_price * nights if night_price is not None else None
+        total = sum(price for price in (flight_price, hotel_price) if price is not None)
+        return {
+            "flight": flight_price,
+            "hotel": hotel_price,
+            "nights": nights,
+            "total": round(total, 2),
+            "currency": (flights or hotels or {}).get("currency", "EUR"),
+        }
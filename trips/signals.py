@@ -0,0 +1,189 @@
+"""
+Signal handlers for the trips application.
+
+Keeps the denormalized ``Traveler.trip_count`` column and the
+DepartmentSpend rollup (trips.reporting) in step with trip creates,
+updates, deletes, traveler reassignments, department changes and status
+transitions. Handlers run inside the
+transaction that writes the trip (``Trip.save`` is atomic and
+``QuerySet.delete`` sends ``post_delete`` inside its own transaction), so
+the counter and the trip row commit or roll back together.
+
+Code paths that skip signals (``bulk_create``, raw SQL) must call
+``adjust_trip_counts`` and ``reporting.apply_spend_deltas`` themselves.
+
+``trip_status_changed`` is sent by trips.workflow after a status
+transition UPDATE, which bypasses the model save signals.
+"""
+from collections import Counter
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from . import reporting
+from .models import Traveler, Trip
+
+# Sent inside the transaction with trip_ids, source and target statuses.
+trip_status_changed = Signal()
+
+
+def adjust_trip_counts(deltas):
+    """
+    Apply per-traveler trip count changes.
+
+    Args:
+        deltas: Mapping of traveler id to the signed change in trip count
+
+    Uses one ``UPDATE ... SET trip_count = trip_count + n`` per distinct
+    delta, so concurrent writers never lose increments. ``updated_at`` is
+    bumped too, since trip_count is part of the traveler representation.
+    """
+    by_delta = {}
+    for traveler_id, delta in deltas.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(traveler_id)
+
+    now = timezone.now()
+    for delta, traveler_ids in by_delta.items():
+        Traveler.objects.filter(pk__in=traveler_ids).update(
+            trip_count=F('trip_count') + delta, updated_at=now
+        )
+
+
+def repair_trip_counts(dry_run=False):
+    """
+    Recompute ``trip_count`` from the trips table.
+
+    Returns:
+        Number of travelers whose stored count had drifted
+    """
+    actual = (
+        Trip.objects.filter(traveler=OuterRef('pk'))
+        .order_by()
+        .values('traveler')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    drifted = (
+        Traveler.objects.annotate(actual_count=Coalesce(Subquery(actual), 0))
+        .exclude(trip_count=F('actual_count'))
+    )
+    count = drifted.count()
+    if count and not dry_run:
+        Traveler.objects.filter(
+            pk__in=drifted.values('pk')
+        ).update(trip_count=Coalesce(Subquery(actual), 0), updated_at=timezone.now())
+    return count
+
+
+# Trip fields that place a trip in the spend rollup
+ROLLUP_FIELDS = {'traveler', 'destination', 'start_date', 'status', 'estimated_cost'}
+
+
+def _department(trip):
+    """Department of the trip's traveler, without a query if it is loaded."""
+    if Trip.traveler.is_cached(trip):
+        return trip.traveler.department
+    return (
+        Traveler.objects.filter(pk=trip.traveler_id)
+        .values_list('department', flat=True)
+        .first()
+    )
+
+
+@receiver(pre_save, sender=Trip)
+def remember_previous_trip(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Record the traveler and rollup key a trip had before this save."""
+    instance._previous_traveler_id = None
+    instance._previous_rollup = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not ROLLUP_FIELDS.intersection(update_fields):
+        return
+    previous = (
+        Trip.objects.filter(pk=instance.pk)
+        .values(
+            'traveler_id', 'traveler__department', 'destination',
+            'start_date', 'status', 'estimated_cost',
+        )
+        .first()
+    )
+    if previous is None:
+        return
+    instance._previous_traveler_id = previous['traveler_id']
+    instance._previous_rollup = (
+        reporting.rollup_key(
+            previous['traveler__department'], previous['destination'],
+            previous['start_date'], previous['status'],
+        ),
+        previous['estimated_cost'],
+        previous['traveler__department'],
+    )
+
+
+@receiver(post_save, sender=Trip)
+def update_aggregates_on_save(sender, instance, created, raw=False, **kwargs):
+    """Count new trips, move counts on reassignment and update spend."""
+    if raw:
+        return
+    deltas = Counter()
+    spend = reporting.SpendDeltas()
+    if created:
+        deltas[instance.traveler_id] += 1
+        spend.add_trip(instance, _department(instance))
+    else:
+        previous = getattr(instance, '_previous_traveler_id', None)
+        if previous is not None and previous != instance.traveler_id:
+            deltas[previous] -= 1
+            deltas[instance.traveler_id] += 1
+        rollup = getattr(instance, '_previous_rollup', None)
+        if rollup is not None:
+            key, cost, department = rollup
+            if previous != instance.traveler_id:
+                department = _department(instance)
+            spend.add(key, -1, -(cost or 0))
+            spend.add_trip(instance, department)
+    adjust_trip_counts(deltas)
+    reporting.apply_spend_deltas(spend)
+
+
+@receiver(post_delete, sender=Trip)
+def update_aggregates_on_delete(sender, instance, **kwargs):
+    """Uncount deleted trips and remove their spend."""
+    adjust_trip_counts({instance.traveler_id: -1})
+    spend = reporting.SpendDeltas()
+    spend.add_trip(instance, _department(instance), sign=-1)
+    reporting.apply_spend_deltas(spend)
+
+
+@receiver(pre_save, sender=Traveler)
+def remember_previous_department(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Record the department a traveler had before this save."""
+    instance._previous_department = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and 'department' not in update_fields:
+        return
+    instance._previous_department = (
+        Traveler.objects.filter(pk=instance.pk)
+        .values_list('department', flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Traveler)
+def move_spend_on_department_change(sender, instance, created, raw=False, **kwargs):
+    """Move a traveler's spend to their new department."""
+    previous = getattr(instance, '_previous_department', None)
+    if raw or created or previous is None or previous == instance.department:
+        return
+    reporting.move_department(instance.pk, previous, instance.department)
+
+
+@receiver(trip_status_changed)
+def move_spend_on_status_change(sender, trip_ids, source, target, **kwargs):
+    """Move transitioned trips' spend to the target status."""
+    reporting.move_status(trip_ids, source, target)
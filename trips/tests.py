@@ -1,11 +1,55 @@
-from datetime import date
+import gzip
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest import mock, skipUnless
 
+import requests
+from django.contrib.admin.sites import AdminSite
 from django.contrib.auth.models import User
-from django.test import TestCase
-from rest_framework import status
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.utils import ConnectionHandler
+from django.db.models import Sum
+from django.db.models.functions import Lower
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers, status
+from rest_framework.request import Request
 from rest_framework.test import APITestCase
 
-from .models import Traveler, Trip
+from config.db_routers import ReadReplicaRouter
+from config.settings import SQLITE_INIT_COMMAND, SQLITE_READ_PRAGMAS
+
+from .admin import TripAdmin
+from .cache import DjangoCacheBackend, LocMemBackend, ResultCache, reset_result_caches
+from .concurrency import SingleFlight, iter_bounded
+from .http_client import ProviderHTTPClient
+from .imports import TripImporter
+from .instrumentation import normalize_sql
+from .metrics import REQUESTS, get_metrics_settings, render_metrics, reset_metrics
+from .models import DepartmentSpend, Traveler, Trip
+from .pagination import TripPagination
+from .rendering import RowRenderer, render_queryset
+from .representations import get_representation_cache, reset_representation_caches
+from .reporting import rebuild_department_spend
+from .resilience import CircuitBreaker
+from .scheduling import find_conflicts, travelers_abroad
+from .search import search
+from .serializers import TripListSerializer, TripSerializer
+from .services import FlightService, HotelService, TripQuoteService
+from .signals import trip_status_changed
+from .workflow import bulk_transition, transition_trip
 
 
 class TravelerTestCase(TestCase):
@@ -70,3 +114,1875 @@ class TripTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.trip.refresh_from_db()
         self.assertEqual(self.trip.status, "rejected")
+
+
+class PaginationTestCase(APITestCase):
+    """Test cursor pagination and the page-number fallback"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="pager", password="testpass123")
+        self.client.force_authenticate(user=self.user)
+
+        self.traveler = Traveler.objects.create(
+            first_name="Ana", last_name="Smith", email="ana@example.com", department="IT"
+        )
+        for i in range(25):
+            Trip.objects.create(
+                title=f"Trip {i}",
+                destination="Rome",
+                start_date=date(2025, 1, 1),
+                end_date=date(2025, 1, 3),
+                traveler=self.traveler,
+            )
+
+    def test_cursor_pages_cover_all_trips_once(self):
+        response = self.client.get("/api/trips/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", response.data)
+        self.assertIsNone(response.data["previous"])
+
+        seen = [trip["id"] for trip in response.data["results"]]
+        next_url = response.data["next"]
+        self.assertIn("cursor=", next_url)
+
+        response = self.client.get(next_url)
+        seen += [trip["id"] for trip in response.data["results"]]
+        self.assertIsNone(response.data["next"])
+
+        expected = list(Trip.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_page_number_mode(self):
+        response = self.client.get("/api/trips/?pagination=page")
+        self.assertEqual(response.data["count"], 25)
+        self.assertEqual(len(response.data["results"]), 20)
+
+        response = self.client.get("/api/trips/?page=2")
+        self.assertEqual(response.data["count"], 25)
+        self.assertEqual(len(response.data["results"]), 5)
+
+    def test_travelers_ordered_by_name(self):
+        Traveler.objects.create(first_name="Bob", last_name="Adams", email="bob@example.com", department="HR")
+        response = self.client.get("/api/travelers/")
+        names = [t["last_name"] for t in response.data["results"]]
+        self.assertEqual(names, ["Adams", "Smith"])
+
+    def test_department_filter_matches_part_of_name(self):
+        Traveler.objects.create(first_name="Bob", last_name="Adams", email="bob@example.com", department="HR")
+        Traveler.objects.create(first_name="Eve", last_name="Brown", email="eve@example.com", department="IT Ops")
+        response = self.client.get("/api/travelers/?department=it")
+        self.assertEqual([t["last_name"] for t in response.data["results"]], ["Brown", "Smith"])
+
+    def test_department_exact_filter_is_case_insensitive(self):
+        Traveler.objects.create(first_name="Eve", last_name="Brown", email="eve@example.com", department="IT Ops")
+        response = self.client.get("/api/travelers/?department_exact=it")
+        self.assertEqual([t["last_name"] for t in response.data["results"]], ["Smith"])
+
+
+class TripCountTestCase(APITestCase):
+    """Test the denormalized Traveler.trip_count counter"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="counter", password="testpass123")
+        self.client.force_authenticate(user=self.user)
+
+        self.alice = Traveler.objects.create(
+            first_name="Alice", last_name="Brown", email="alice@example.com", department="IT"
+        )
+        self.bob = Traveler.objects.create(
+            first_name="Bob", last_name="Green", email="bob@example.com", department="HR"
+        )
+
+    def _create_trip(self, traveler, **kwargs):
+        return Trip.objects.create(
+            title="Offsite",
+            destination="Lisbon",
+            start_date=date(2025, 5, 1),
+            end_date=date(2025, 5, 3),
+            traveler=traveler,
+            **kwargs,
+        )
+
+    def test_counter_follows_create_reassign_delete(self):
+        trip = self._create_trip(self.alice)
+        self._create_trip(self.alice)
+        self.alice.refresh_from_db()
+        self.assertEqual(self.alice.trip_count, 2)
+
+        trip.traveler = self.bob
+        trip.save()
+        self.alice.refresh_from_db()
+        self.bob.refresh_from_db()
+        self.assertEqual((self.alice.trip_count, self.bob.trip_count), (1, 1))
+
+        Trip.objects.filter(traveler=self.alice).delete()
+        trip.delete()
+        self.alice.refresh_from_db()
+        self.bob.refresh_from_db()
+        self.assertEqual((self.alice.trip_count, self.bob.trip_count), (0, 0))
+
+    def test_repair_command_fixes_drift(self):
+        self._create_trip(self.alice)
+        Traveler.objects.filter(pk=self.alice.pk).update(trip_count=7)
+
+        out = StringIO()
+        call_command("repair_trip_counts", stdout=out)
+        self.assertIn("1 traveler(s)", out.getvalue())
+        self.alice.refresh_from_db()
+        self.assertEqual(self.alice.trip_count, 1)
+
+    def test_trip_list_has_no_per_row_count_query(self):
+        for _ in range(5):
+            self._create_trip(self.alice)
+            self._create_trip(self.bob)
+
+        # Session/auth lookups are bypassed by force_authenticate: one
+        # query for the page of trips with their travelers joined.
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/trips/?expand=traveler")
+        self.assertEqual(response.data["results"][0]["traveler_detail"]["trip_count"], 5)
+
+
+class SparseFieldsetTestCase(APITestCase):
+    """Test the compact list representation and ?fields= / ?expand="""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="sparse", password="testpass123")
+        self.client.force_authenticate(user=self.user)
+
+        self.traveler = Traveler.objects.create(
+            first_name="Mia", last_name="Jones", email="mia@example.com", department="Finance"
+        )
+        self.trip = Trip.objects.create(
+            title="Audit",
+            destination="Vienna",
+            start_date=date(2025, 9, 1),
+            end_date=date(2025, 9, 4),
+            status="draft",
+            traveler=self.traveler,
+        )
+
+    def test_list_is_compact_by_default(self):
+        response = self.client.get("/api/trips/")
+        item = response.data["results"][0]
+        self.assertEqual(item["traveler_name"], "Mia Jones")
+        self.assertNotIn("traveler_detail", item)
+
+    def test_expand_traveler(self):
+        response = self.client.get("/api/trips/?expand=traveler")
+        item = response.data["results"][0]
+        self.assertEqual(item["traveler_detail"]["email"], "mia@example.com")
+
+    def test_fields_limit_output_and_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/trips/?fields=id,status,start_date,end_date")
+        self.assertEqual(
+            set(response.data["results"][0]), {"id", "status", "start_date", "end_date"}
+        )
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]["sql"]
+        self.assertNotIn("trips_traveler", sql)
+        self.assertNotIn('"title"', sql)
+
+    def test_fields_on_detail(self):
+        response = self.client.get(f"/api/trips/{self.trip.id}/?fields=id,duration_days,is_editable")
+        self.assertEqual(response.data, {"id": self.trip.id, "duration_days": 3, "is_editable": True})
+
+
+class ResultCacheTestCase(TestCase):
+    """Test the provider result cache"""
+
+    def setUp(self):
+        self.now = 1000.0
+        self.calls = 0
+        self.cache = ResultCache(
+            LocMemBackend(max_entries=2),
+            ttl=10,
+            stale_ttl=20,
+            clock=lambda: self.now,
+            spawn=lambda fn: fn(),
+        )
+
+    def compute(self):
+        self.calls += 1
+        return {"call": self.calls}
+
+    def test_hit_stale_and_expiry(self):
+        self.assertEqual(self.cache.get_or_compute("k", self.compute), {"call": 1})
+        self.assertEqual(self.cache.get_or_compute("k", self.compute), {"call": 1})
+
+        # Stale: old value is served, refresh stores the new one
+        self.now += 15
+        self.assertEqual(self.cache.get_or_compute("k", self.compute), {"call": 1})
+        self.assertEqual(self.cache.get_or_compute("k", self.compute), {"call": 2})
+
+        # Past the stale window: synchronous refetch
+        self.now += 100
+        self.assertEqual(self.cache.get_or_compute("k", self.compute), {"call": 3})
+
+        self.assertEqual(
+            self.cache.stats(),
+            {"hits": 2, "misses": 2, "stale": 1, "refreshes": 1, "refresh_errors": 0},
+        )
+
+    def test_lru_eviction_and_failures_not_cached(self):
+        for key in ("a", "b", "c"):
+            self.cache.get_or_compute(key, self.compute)
+        self.assertIsNone(self.cache.backend.get("a"))
+        self.assertEqual(len(self.cache.backend), 2)
+
+        self.assertIsNone(self.cache.get_or_compute("none", lambda: None))
+        self.assertIsNone(self.cache.backend.get("none"))
+
+    def test_django_backend_shares_entries(self):
+        shared = ResultCache(DjangoCacheBackend(key_prefix="test"), ttl=10)
+        other = ResultCache(DjangoCacheBackend(key_prefix="test"), ttl=10)
+        shared.get_or_compute("BEG:BCN:2025-01-01", self.compute)
+        self.assertEqual(other.get_or_compute("BEG:BCN:2025-01-01", self.compute), {"call": 1})
+
+    def test_flight_search_keys_are_normalized(self):
+        service = FlightService(cache=self.cache)
+        service.search_flights("beg ", "bcn", "2025-01-01")
+        service.search_flights("BEG", "BCN", "2025-01-01")
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+
+class _StandInProviderHandler(BaseHTTPRequestHandler):
+    """Local stand-in for a provider API: gzip JSON over keep-alive."""
+
+    protocol_version = "HTTP/1.1"
+    client_ports = []
+
+    def do_GET(self):
+        self.client_ports.append(self.client_address[1])
+        body = gzip.compress(json.dumps({"path": self.path}).encode())
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ProviderHTTPClientTestCase(TestCase):
+    """Test connection reuse against a local stand-in server"""
+
+    def setUp(self):
+        _StandInProviderHandler.client_ports = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInProviderHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/flights"
+        self.http = ProviderHTTPClient(pool_maxsize=2)
+
+    def tearDown(self):
+        self.http.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_are_kept_alive_and_gzip_decoded(self):
+        service = FlightService(cache=ResultCache(LocMemBackend(), ttl=0), http=self.http)
+        for _ in range(3):
+            data = service._call_api_with_retry(self.url, {"origin": "BEG"})
+            self.assertEqual(data, {"path": "/flights?origin=BEG"})
+
+        self.assertEqual(len(_StandInProviderHandler.client_ports), 3)
+        self.assertEqual(len(set(_StandInProviderHandler.client_ports)), 1)
+
+    def test_response_hooks_are_shared(self):
+        seen = []
+        self.http.add_response_hook(lambda response, *args, **kwargs: seen.append(response.status_code))
+        HotelService(http=self.http)._call_api_with_retry(self.url, {})
+        self.assertEqual(seen, [200])
+
+
+class _FailingHTTPClient:
+    """HTTP client stub that times out on every request."""
+
+    def __init__(self):
+        self.timeouts = []
+
+    def request(self, method, url, params=None, json=None, timeout=10):
+        self.timeouts.append(timeout)
+        raise requests.exceptions.Timeout()
+
+
+class CircuitBreakerTestCase(TestCase):
+    """Test the circuit breaker and the retry deadline"""
+
+    def setUp(self):
+        self.now = 0.0
+        self.breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=30, clock=lambda: self.now)
+
+    def test_open_half_open_close(self):
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.breaker.record_failure()
+        self.assertFalse(self.breaker.allow_request())
+
+        self.now += 30
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())  # one probe at a time
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+        self.now += 30
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_open_breaker_fails_fast(self):
+        http = _FailingHTTPClient()
+        service = FlightService(cache=ResultCache(LocMemBackend(), ttl=0), http=http)
+        service.breaker = self.breaker
+        service.INITIAL_BACKOFF = 0.001
+
+        with self.assertLogs("trips.services", level="WARNING"):
+            self.assertIsNone(service._call_api_with_retry("http://provider.invalid/", {}))
+        self.assertEqual(len(http.timeouts), 2)
+
+        started = time.monotonic()
+        with self.assertLogs("trips.services", level="WARNING"):
+            self.assertIsNone(service._call_api_with_retry("http://provider.invalid/", {}))
+        self.assertLess(time.monotonic() - started, 0.05)
+        self.assertEqual(len(http.timeouts), 2)
+
+    def test_deadline_caps_attempt_timeouts(self):
+        http = _FailingHTTPClient()
+        service = FlightService(cache=ResultCache(LocMemBackend(), ttl=0), http=http)
+        service.breaker = CircuitBreaker("deadline", failure_threshold=100)
+        service.INITIAL_BACKOFF = 0.001
+
+        with self.assertLogs("trips.services", level="WARNING"):
+            service._call_api_with_retry("http://provider.invalid/", {}, deadline=time.monotonic() + 0.5)
+        self.assertTrue(all(timeout <= 0.5 for timeout in http.timeouts))
+
+
+class SingleFlightTestCase(TestCase):
+    """Test coalescing of identical concurrent provider calls"""
+
+    def _run_concurrently(self, target, count):
+        threads = [threading.Thread(target=target) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+    def test_concurrent_callers_share_one_call(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def fetch():
+            calls.append(1)
+            release.wait(timeout=5)
+            return {"flights": []}
+
+        def caller():
+            results.append(flight.do("BEG:BCN:2025-01-01", fetch))
+
+        threading.Timer(0.2, release.set).start()
+        self._run_concurrently(caller, 8)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"flights": []}] * 8)
+        self.assertEqual(flight.stats()["coalesced"], 7)
+
+    def test_waiters_receive_leader_error(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        errors = []
+
+        def fetch():
+            release.wait(timeout=5)
+            raise ValueError("provider down")
+
+        def caller():
+            try:
+                flight.do("key", fetch)
+            except ValueError as exc:
+                errors.append(str(exc))
+
+        threading.Timer(0.2, release.set).start()
+        self._run_concurrently(caller, 4)
+        self.assertEqual(errors, ["provider down"] * 4)
+
+    def test_cross_process_waiter_uses_shared_result(self):
+        # Two coalescers sharing a lock cache stand in for two workers.
+        worker_a = SingleFlight("flights", lock_cache_alias="default", poll_interval=0.01)
+        worker_b = SingleFlight("flights", lock_cache_alias="default", poll_interval=0.01)
+        shared = {}
+        release = threading.Event()
+
+        def fetch_a():
+            release.wait(timeout=5)
+            shared["value"] = {"from": "a"}
+            return shared["value"]
+
+        leader = threading.Thread(target=worker_a.do, args=("key", fetch_a))
+        leader.start()
+        time.sleep(0.05)
+        threading.Timer(0.1, release.set).start()
+
+        result = worker_b.do("key", lambda: {"from": "b"}, lookup=lambda: shared.get("value"))
+        leader.join(timeout=5)
+        self.assertEqual(result, {"from": "a"})
+        self.assertEqual(worker_b.stats()["remote_waits"], 1)
+
+
+class _SlowFlightService:
+    def __init__(self, delay):
+        self.delay = delay
+
+    def search_flights(self, origin, destination, date, deadline=None):
+        time.sleep(self.delay)
+        return {"flights": [{"price": 200.0}, {"price": 150.0}], "currency": "EUR"}
+
+
+class _SlowHotelService:
+    def __init__(self, delay):
+        self.delay = delay
+
+    def search_hotels(self, city, check_in, check_out, deadline=None):
+        time.sleep(self.delay)
+        return {"hotels": [{"price_per_night": 90.0}, {"price_per_night": 120.0}]}
+
+
+class TripQuoteTestCase(APITestCase):
+    """Test the combined flight + hotel quote"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="quoter", password="testpass123")
+        self.client.force_authenticate(user=self.user)
+
+        traveler = Traveler.objects.create(
+            first_name="Lea", last_name="Novak", email="lea@example.com", department="Sales"
+        )
+        self.trip = Trip.objects.create(
+            title="Client visit",
+            destination="BCN",
+            start_date=date(2025, 4, 1),
+            end_date=date(2025, 4, 4),
+            traveler=traveler,
+        )
+
+    def test_quote_endpoint(self):
+        response = self.client.get(f"/api/trips/{self.trip.id}/quote/?origin=BEG")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data["partial"])
+        self.assertEqual(response.data["estimate"]["flight"], 180.0)
+        self.assertEqual(response.data["estimate"]["hotel"], 85.0 * 3)
+        self.assertEqual(response.data["estimate"]["total"], 435.0)
+
+    def test_providers_run_concurrently(self):
+        service = TripQuoteService(_SlowFlightService(0.3), _SlowHotelService(0.3), timeout=2)
+        started = time.monotonic()
+        quote = service.quote(self.trip, "BEG")
+        self.assertLess(time.monotonic() - started, 0.55)
+        self.assertEqual(quote["estimate"]["total"], 150.0 + 90.0 * 3)
+
+    def test_slow_provider_gives_partial_quote(self):
+        service = TripQuoteService(_SlowFlightService(0), _SlowHotelService(1), timeout=0.2)
+        quote = service.quote(self.trip, "BEG")
+        self.assertTrue(quote["partial"])
+        self.assertEqual(quote["unavailable"], {"hotels": "timed out"})
+        self.assertIsNone(quote["hotels"])
+        self.assertEqual(quote["estimate"]["total"], 150.0)
+
+    def test_quote_deadline_reaches_provider_calls(self):
+        http = _FailingHTTPClient()
+        flights = _UpstreamFlightService(cache=ResultCache(LocMemBackend(), ttl=0), http=http)
+        flights.breaker = CircuitBreaker("quote-deadline", failure_threshold=100)
+        flights.INITIAL_BACKOFF = 0.001
+        service = TripQuoteService(flights, _SlowHotelService(0), timeout=0.2)
+        started = time.monotonic()
+        with self.assertLogs("trips.services", level="WARNING"):
+            quote = service.quote(self.trip, "BEG")
+            flights.finished.wait(5)
+        # The upstream call gave up at the quote's deadline, not TOTAL_DEADLINE
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertTrue(http.timeouts)
+        self.assertTrue(all(timeout <= 0.2 for timeout in http.timeouts))
+        self.assertEqual(quote["unavailable"], {"flights": "unavailable"})
+
+
+class _UpstreamFlightService(FlightService):
+    """FlightService whose fetch calls the (stubbed) upstream API."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.finished = threading.Event()
+
+    def _search_flights(self, origin, destination, date, deadline=None):
+        try:
+            return self._call_api_with_retry("http://provider.invalid/", {}, deadline=deadline)
+        finally:
+            self.finished.set()
+
+
+class FlightBatchSearchTestCase(APITestCase):
+    """Test batch flight search and bounded concurrency"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="planner", password="testpass123")
+        self.client.force_authenticate(user=self.user)
+        reset_result_caches()
+
+    def test_batch_deduplicates_legs(self):
+        queries = [
+            {"origin": "BEG", "destination": "BCN", "date": "2025-03-01"},
+            {"origin": "beg", "destination": "bcn", "date": "2025-03-01"},
+            {"origin": "BEG", "destination": "LIS", "date": "2025-03-02"},
+        ]
+        with mock.patch.object(FlightService, "_search_flights", autospec=True,
+                               side_effect=lambda self, o, d, dt, deadline: {"route": f"{o}-{d}"}) as fetch:
+            response = self.client.post(
+                "/api/trips/search_flights/batch/", {"queries": queries}, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["index"] for item in response.data["results"]], [0, 1, 2])
+        self.assertEqual(response.data["results"][1]["result"], {"route": "BEG-BCN"})
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_batch_streams_ndjson(self):
+        response = self.client.post(
+            "/api/trips/search_flights/batch/?stream=true",
+            {"queries": [{"origin": "BEG", "destination": "BCN", "date": "2025-03-01"}]},
+            format="json",
+        )
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(json.loads(lines[0])["status"], "ok")
+
+    def test_batch_validation(self):
+        response = self.client.post("/api/trips/search_flights/batch/", {"queries": []}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_iter_bounded_limits_in_flight_calls(self):
+        lock = threading.Lock()
+        active = [0]
+        peak = [0]
+
+        def call(delay):
+            def run():
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+                time.sleep(delay)
+                with lock:
+                    active[0] -= 1
+                return delay
+            return run
+
+        calls = {f"q{i}": call(0.05) for i in range(6)}
+        calls["slow"] = call(1)
+        results = {name: (result, error) for name, result, error in iter_bounded(calls, limit=2, timeout=0.3)}
+
+        self.assertLessEqual(peak[0], 2)
+        self.assertEqual(results["q0"], (0.05, None))
+        self.assertEqual(results["slow"], (None, "timed out"))
+
+    def test_iter_bounded_timed_out_call_keeps_its_slot(self):
+        finished = []
+
+        def call(name, delay):
+            def run():
+                time.sleep(delay)
+                finished.append(name)
+                return name
+            return run
+
+        calls = {"slow": call("slow", 0.4), "next": call("next", 0)}
+        results = list(iter_bounded(calls, limit=1, timeout=0.1))
+
+        self.assertEqual(results, [("slow", None, "timed out"), ("next", "next", None)])
+        # "next" only started once the abandoned call returned
+        self.assertEqual(finished, ["slow", "next"])
+
+
+class TripExportTestCase(APITestCase):
+    """Test the streaming trip export"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="finance", password="testpass123")
+        self.client.force_authenticate(user=self.user)
+
+        finance = Traveler.objects.create(
+            first_name="Ivo", last_name="Marić", email="ivo@example.com", department="Finance"
+        )
+        sales = Traveler.objects.create(
+            first_name="Eva", last_name="Kos", email="eva@example.com", department="Sales"
+        )
+        for traveler, day, trip_status in ((finance, 5, "approved"), (finance, 20, "draft"), (sales, 6, "approved")):
+            Trip.objects.create(
+                title="Trip",
+                destination="Oslo",
+                start_date=date(2025, 2, day),
+                end_date=date(2025, 2, day + 2),
+                status=trip_status,
+                estimated_cost="99.50",
+                traveler=traveler,
+            )
+
+    def test_ndjson_export_with_filters(self):
+        response = self.client.get(
+            "/api/trips/export/?status=approved&department=Finance&start_from=2025-02-01&start_to=2025-02-10"
+        )
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["traveler_department"], "Finance")
+        self.assertEqual(rows[0]["estimated_cost"], "99.50")
+        self.assertEqual(rows[0]["start_date"], "2025-02-05")
+
+    def test_csv_export(self):
+        response = self.client.get("/api/trips/export/?output=csv")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertTrue(lines[0].startswith("id,title,destination"))
+        self.assertEqual(len(lines), 4)
+
+    def test_invalid_filters(self):
+        self.assertEqual(self.client.get("/api/trips/export/?start_from=yesterday").status_code, 400)
+        self.assertEqual(self.client.get("/api/trips/export/?status=lost").status_code, 400)
+        self.assertEqual(self.client.get("/api/trips/export/?output=xml").status_code, 400)
+
+
+class TripImportTestCase(APITestCase):
+    """Test bulk trip import"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="importer", password="testpass123")
+        self.client.force_authenticate(user=self.admin)
+
+        self.traveler = Traveler.objects.create(
+            first_name="Nina", last_name="Horvat", email="nina@example.com", department="Ops"
+        )
+
+    def test_csv_upload(self):
+        content = (
+            "title,destination,start_date,end_date,status,estimated_cost,traveler,traveler_email\n"
+            f"Old summit,Paris,2019-05-01,2019-05-03,approved,450.00,{self.traveler.id},\n"
+            "Kickoff,Rome,2019-06-01,2019-06-02,,,,NINA@example.com\n"
+            "Broken,Rome,2019-06-05,2019-06-01,,,,nina@example.com\n"
+            "Nobody,Rome,2019-06-05,2019-06-06,,,,ghost@example.com\n"
+        )
+        upload = SimpleUploadedFile("trips.csv", content.encode(), content_type="text/csv")
+        response = self.client.post("/api/trips/import/", {"file": upload}, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data["created"], response.data["failed"]), (2, 2))
+        self.assertEqual([error["row"] for error in response.data["errors"]], [4, 5])
+        self.assertIn("end_date", response.data["errors"][0]["errors"])
+        self.assertIn("traveler", response.data["errors"][1]["errors"])
+
+        self.traveler.refresh_from_db()
+        self.assertEqual(self.traveler.trip_count, 2)
+        self.assertEqual(Trip.objects.get(title="Kickoff").status, "draft")
+
+    def test_mixed_case_stored_email(self):
+        Traveler.objects.create(first_name="Ana", last_name="Kos", email="Ana@Example.com", department="Ops")
+        rows = [
+            (1, {"title": "A", "destination": "Bern", "start_date": "2018-01-01",
+                 "end_date": "2018-01-02", "traveler_email": "Ana@Example.com"}),
+            (2, {"title": "B", "destination": "Bern", "start_date": "2018-02-01",
+                 "end_date": "2018-02-02", "traveler_email": "ana@example.COM"}),
+        ]
+        report = TripImporter().run(rows)
+        self.assertEqual((report["created"], report["failed"]), (2, 0), report["errors"])
+        self.assertEqual(Trip.objects.filter(traveler__email="Ana@Example.com").count(), 2)
+
+    def test_blocking_rows_checked_for_overlaps(self):
+        existing = Trip.objects.create(
+            title="Held", destination="Oslo", start_date=date(2019, 3, 1),
+            end_date=date(2019, 3, 5), status="approved", traveler=self.traveler,
+        )
+
+        def row(number, start, end, trip_status):
+            return (number, {"title": f"T{number}", "destination": "Oslo", "start_date": start,
+                             "end_date": end, "status": trip_status, "traveler": self.traveler.id})
+
+        rows = [
+            row(1, "2019-03-04", "2019-03-06", "pending"),   # overlaps the existing trip
+            row(2, "2019-03-04", "2019-03-06", "draft"),     # drafts never block
+            row(3, "2019-04-01", "2019-04-03", "approved"),
+            row(4, "2019-04-03", "2019-04-04", "approved"),  # overlaps row 3
+            row(5, "2019-04-10", "2019-04-12", "approved"),  # next chunk
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            report = TripImporter(chunk_size=4).run(rows)
+        self.assertEqual((report["created"], report["failed"]), (3, 2))
+        self.assertEqual([error["row"] for error in report["errors"]], [1, 4])
+        self.assertIn(str(existing.id), str(report["errors"][0]["errors"]))
+        self.assertIn("row 3", str(report["errors"][1]["errors"]))
+        interval_queries = [
+            q for q in queries if q["sql"].startswith("SELECT") and '"trips_trip"."status" IN' in q["sql"]
+        ]
+        self.assertEqual(len(interval_queries), 2)
+
+    def test_dry_run_checks_overlaps_across_chunks(self):
+        rows = [
+            (n, {"title": f"T{n}", "destination": "Oslo", "start_date": "2019-05-01",
+                 "end_date": "2019-05-02", "status": "pending", "traveler": self.traveler.id})
+            for n in (1, 2)
+        ]
+        report = TripImporter(chunk_size=1, dry_run=True).run(rows)
+        self.assertEqual((report["created"], report["failed"]), (1, 1))
+
+    def test_travelers_resolved_once_per_chunk(self):
+        rows = [
+            (n, {"title": f"T{n}", "destination": "Oslo", "start_date": "2020-01-01",
+                 "end_date": "2020-01-02", "traveler_email": "nina@example.com"})
+            for n in range(1, 51)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            report = TripImporter(chunk_size=25).run(rows)
+        self.assertEqual(report["created"], 50)
+        traveler_lookups = [q for q in queries if q["sql"].startswith("SELECT") and "trips_traveler" in q["sql"]]
+        self.assertEqual(len(traveler_lookups), 2)
+
+    def test_management_command_ndjson(self):
+        lines = [
+            json.dumps({"title": "A", "destination": "Bern", "start_date": "2018-01-01",
+                        "end_date": "2018-01-02", "traveler": self.traveler.id}),
+            "not json",
+        ]
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson", delete=False) as handle:
+            handle.write("\n".join(lines) + "\n")
+        self.addCleanup(os.remove, handle.name)
+
+        out, err = StringIO(), StringIO()
+        call_command("import_trips", handle.name, stdout=out, stderr=err)
+        self.assertIn("Created 1 trip(s); 1 row(s) failed.", out.getvalue())
+        self.assertIn("row 2", err.getvalue())
+
+    def test_dry_run_writes_nothing(self):
+        rows = [(1, {"title": "A", "destination": "Bern", "start_date": "2018-01-01",
+                     "end_date": "2018-01-02", "traveler": self.traveler.id})]
+        report = TripImporter(dry_run=True).run(rows)
+        self.assertEqual(report["created"], 1)
+        self.assertFalse(Trip.objects.exists())
+
+
+class BulkTransitionTestCase(APITestCase):
+    """Test bulk workflow transitions"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="manager", password="testpass123")
+        self.client.force_authenticate(user=self.user)
+
+        # IsOwnerOrReadOnly matches the trip's traveler id to the user id
+        self.own = Traveler.objects.create(
+            id=self.user.id, first_name="Own", last_name="Er", email="own@example.com", department="IT"
+        )
+        self.other = Traveler.objects.create(
+            first_name="Oth", last_name="Er", email="other@example.com", department="IT"
+        )
+
+    def _trip(self, traveler, trip_status):
+        return Trip.objects.create(
+            title="Trip",
+            destination="Graz",
+            start_date=date(2025, 7, 1),
+            end_date=date(2025, 7, 2),
+            status=trip_status,
+            traveler=traveler,
+        )
+
+    def test_outcomes_per_id(self):
+        pending = self._trip(self.own, "pending")
+        draft = self._trip(self.own, "draft")
+        foreign = self._trip(self.other, "pending")
+
+        response = self.client.post(
+            "/api/trips/bulk_transition/",
+            {"ids": [pending.id, draft.id, foreign.id, 999999], "transition": "approve"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [result["outcome"] for result in response.data["results"]],
+            ["transitioned", "wrong_state", "forbidden", "not_found"],
+        )
+        pending.refresh_from_db()
+        foreign.refresh_from_db()
+        self.assertEqual((pending.status, foreign.status), ("approved", "pending"))
+
+    def test_single_update_for_many_trips(self):
+        trips = [self._trip(self.own, "draft") for _ in range(30)]
+        for offset, trip in enumerate(trips):
+            # Distinct dates, so the trips don't conflict with each other
+            Trip.objects.filter(pk=trip.pk).update(
+                start_date=date(2025, 8, 1) + timedelta(days=2 * offset),
+                end_date=date(2025, 8, 1) + timedelta(days=2 * offset),
+            )
+        with CaptureQueriesContext(connection) as queries:
+            results = bulk_transition([trip.id for trip in trips], "submit")
+        updates = [q for q in queries if q["sql"].startswith('UPDATE "trips_trip"')]
+        self.assertEqual(len(updates), 1)
+        self.assertTrue(all(result["outcome"] == "transitioned" for result in results))
+
+    def test_invalid_transition(self):
+        response = self.client.post(
+            "/api/trips/bulk_transition/", {"ids": [1], "transition": "archive"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_admin_action_uses_workflow(self):
+        pending = self._trip(self.other, "pending")
+        before = pending.updated_at
+        received = []
+        trip_status_changed.connect(lambda **kwargs: received.append(kwargs["target"]), weak=False,
+                                    dispatch_uid="test_admin_action")
+        self.addCleanup(trip_status_changed.disconnect, dispatch_uid="test_admin_action")
+
+        request = RequestFactory().post("/")
+        request.user = User.objects.create_superuser(username="root", password="testpass123")
+        admin_site = TripAdmin(Trip, AdminSite())
+        with mock.patch.object(admin_site, "message_user"):
+            admin_site.approve_trips(request, Trip.objects.all())
+
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, "approved")
+        self.assertGreater(pending.updated_at, before)
+        self.assertEqual(received, ["approved"])
+
+
+class WorkflowConcurrencyTestCase(APITestCase):
+    """Test compare-and-set status transitions"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="approver", password="testpass123")
+        self.client.force_authenticate(user=self.user)
+        traveler = Traveler.objects.create(
+            id=self.user.id, first_name="Tea", last_name="Lin", email="tea@example.com", department="IT"
+        )
+        self.trip = Trip.objects.create(
+            title="Summit",
+            destination="Zagreb",
+            start_date=date(2025, 8, 1),
+            end_date=date(2025, 8, 3),
+            status="pending",
+            traveler=traveler,
+        )
+
+    def test_second_transition_conflicts(self):
+        self.assertEqual(self.client.post(f"/api/trips/{self.trip.id}/approve/").status_code, 200)
+        response = self.client.post(f"/api/trips/{self.trip.id}/reject/")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.status, "approved")
+
+    def test_stale_read_cannot_overwrite(self):
+        # Another request approves the trip after this one loaded it.
+        stale = Trip.objects.get(pk=self.trip.pk)
+        self.assertTrue(transition_trip(Trip.objects.get(pk=self.trip.pk), "approve"))
+        self.assertFalse(transition_trip(stale, "reject"))
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.status, "approved")
+
+    def test_action_runs_one_read_and_one_write(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(f"/api/trips/{self.trip.id}/approve/")
+        self.assertEqual(response.data["message"], "Trip to Zagreb has been approved")
+        # Rollup maintenance (GROUP BY read, trips_departmentspend writes) aside
+        statements = [
+            q["sql"].split()[0] for q in queries
+            if '"trips_trip"' in q["sql"] and "GROUP BY" not in q["sql"]
+        ]
+        self.assertEqual(statements, ["SELECT", "UPDATE"])
+        self.assertNotIn("trips_traveler", queries[0]["sql"])
+
+
+@skipUnless(connection.vendor == "sqlite", "Plan assertions target SQLite EXPLAIN QUERY PLAN output")
+class QueryPlanTestCase(TestCase):
+    """Fail if a main list/filter/admin query falls back to a full table scan"""
+
+    @classmethod
+    def setUpTestData(cls):
+        departments = ["IT", "Sales", "Finance", "HR", "Ops"]
+        Traveler.objects.bulk_create(
+            Traveler(
+                first_name=f"First{i}",
+                last_name=f"Last{i % 40}",
+                email=f"traveler{i}@example.com",
+                department=departments[i % len(departments)],
+            )
+            for i in range(200)
+        )
+        traveler_ids = list(Traveler.objects.values_list("id", flat=True))
+        statuses = ["draft", "pending", "approved", "rejected"]
+        destinations = [f"City{i}" for i in range(50)]
+        Trip.objects.bulk_create(
+            Trip(
+                title=f"Trip {i}",
+                destination=destinations[i % len(destinations)],
+                start_date=date(2024, 1, 1) + timedelta(days=i % 365),
+                end_date=date(2024, 1, 3) + timedelta(days=i % 365),
+                status=statuses[i % len(statuses)],
+                traveler_id=traveler_ids[i % len(traveler_ids)],
+            )
+            for i in range(4000)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def assertIndexed(self, queryset, ordered=True, scans=True):
+        """
+        Fail on a full table scan, or a temp b-tree sort when ``ordered``.
+
+        A scan in index order (ORDER BY ... LIMIT) passes unless ``scans``
+        is unset, for queries that must only search a bounded range.
+        """
+        plan = queryset.explain()
+        self.assertNotRegex(plan, r"\bSCAN trips_(trip|traveler)\b(?! USING)", msg=plan)
+        if not scans:
+            self.assertNotRegex(plan, r"\bSCAN\b", msg=plan)
+        if ordered:
+            self.assertNotIn("TEMP B-TREE", plan, msg=plan)
+
+    def test_trip_list_pages(self):
+        trips = Trip.objects.select_related("traveler").order_by("-created_at", "-id")
+        self.assertIndexed(trips[:21])
+        newest = Trip.objects.order_by("-created_at").first().created_at
+        self.assertIndexed(trips.filter(created_at__lt=newest)[:21])
+
+    def test_status_filter(self):
+        self.assertIndexed(Trip.objects.filter(status="pending").order_by("-created_at", "-id")[:21])
+
+    def test_traveler_trips_by_date(self):
+        traveler = Traveler.objects.first()
+        self.assertIndexed(Trip.objects.filter(traveler=traveler).order_by("start_date"))
+
+    def test_destination_filter(self):
+        self.assertIndexed(Trip.objects.filter(destination="City7"), ordered=False)
+
+    def test_traveler_department_filter_and_order(self):
+        self.assertIndexed(
+            Traveler.objects.alias(department_lower=Lower("department"))
+            .filter(department_lower="sales"),
+            ordered=False,
+        )
+        self.assertIndexed(Traveler.objects.order_by("last_name", "first_name", "id")[:21])
+
+    def test_traveler_department_substring_filter_scans(self):
+        # Allowed scan: ?department= keeps its substring match, which no
+        # b-tree index can serve; ?department_exact= is the indexed path.
+        plan = Traveler.objects.filter(department__icontains="sal").explain()
+        self.assertRegex(plan, r"\bSCAN trips_traveler\b", msg=plan)
+
+    def test_admin_changelist_queries(self):
+        changelist = Trip.objects.select_related("traveler").order_by("-created_at", "-pk")
+        self.assertIndexed(changelist[:100])
+        self.assertIndexed(changelist.filter(status="approved")[:100])
+        self.assertIndexed(
+            changelist.filter(start_date__gte=date(2024, 3, 1), start_date__lt=date(2024, 4, 1)),
+            ordered=False,
+        )
+        self.assertIndexed(Trip.objects.values_list("destination", flat=True).distinct().order_by("destination"))
+
+    def test_overlap_queries(self):
+        traveler_id = Traveler.objects.first().id
+        conflicts = find_conflicts(traveler_id, date(2024, 3, 1), date(2024, 3, 5))
+        self.assertIndexed(conflicts, scans=False)
+        self.assertIn("trip_traveler_dates_idx (traveler_id=? AND start_date>? AND start_date<?)", conflicts.explain())
+        abroad = travelers_abroad(date(2024, 3, 1))
+        self.assertIndexed(abroad, ordered=False, scans=False)
+        self.assertIn("trip_status_dates_idx (status=? AND start_date>? AND start_date<?)", abroad.explain())
+
+
+class SQLiteProductionTestCase(SimpleTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        path = os.path.join(self.tmpdir.name, "db.sqlite3")
+        self.connections = ConnectionHandler({
+            "default": {},
+            "primary": {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": path,
+                "OPTIONS": {"init_command": SQLITE_INIT_COMMAND, "transaction_mode": "IMMEDIATE"},
+            },
+            "readonly": {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": f"file:{path}?mode=ro",
+                "OPTIONS": {"uri": True, "init_command": SQLITE_READ_PRAGMAS + "PRAGMA query_only=ON;"},
+            },
+        })
+        self.addCleanup(self.connections.close_all)
+
+    def pragma(self, alias, name):
+        with self.connections[alias].cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_on_connect(self):
+        self.assertEqual(self.pragma("primary", "journal_mode"), "wal")
+        self.assertEqual(self.pragma("primary", "synchronous"), 1)  # NORMAL
+        self.assertEqual(self.pragma("primary", "busy_timeout"), 5000)
+
+    def test_replica_is_read_only(self):
+        with self.connections["primary"].cursor() as cursor:
+            cursor.execute("CREATE TABLE t (x integer)")
+        with self.connections["readonly"].cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM t")
+            self.assertEqual(cursor.fetchone()[0], 0)
+            with self.assertRaises(Exception):
+                cursor.execute("INSERT INTO t VALUES (1)")
+
+
+class ReadReplicaRouterTestCase(SimpleTestCase):
+    router = ReadReplicaRouter()
+
+    def test_without_replica_defers_to_default(self):
+        self.assertIsNone(self.router.db_for_read(Trip))
+        self.assertEqual(self.router.db_for_write(Trip), "default")
+
+    def test_reads_go_to_replica_outside_transactions(self):
+        with mock.patch.dict("django.conf.settings.DATABASES", {"replica": {}}):
+            self.assertEqual(self.router.db_for_read(Trip), "replica")
+            with mock.patch.object(connection, "in_atomic_block", True):
+                self.assertEqual(self.router.db_for_read(Trip), "default")
+        self.assertEqual(self.router.db_for_write(Trip), "default")
+
+    def test_migrations_only_on_default(self):
+        self.assertTrue(self.router.allow_migrate("default", "trips"))
+        self.assertFalse(self.router.allow_migrate("replica", "trips"))
+
+
+class DepartmentSpendTestCase(APITestCase):
+    """Test the incrementally maintained department spend rollup"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="finance", password="testpass123")
+        self.client.force_authenticate(user=self.admin)
+        self.sales = Traveler.objects.create(
+            first_name="Sam", last_name="Seller", email="sam@example.com", department="Sales"
+        )
+        self.ops = Traveler.objects.create(
+            first_name="Olga", last_name="Ops", email="olga@example.com", department="Ops"
+        )
+
+    def _trip(self, traveler, destination="Paris", start=date(2024, 3, 10), cost="100.00", status="draft"):
+        return Trip.objects.create(
+            title="Trip", destination=destination, start_date=start,
+            end_date=start + timedelta(days=2), estimated_cost=cost, status=status, traveler=traveler,
+        )
+
+    def rollup(self):
+        return sorted(DepartmentSpend.objects.values_list(
+            "department", "destination", "month", "status", "trip_count", "total_cost"
+        ))
+
+    def assertMatchesRebuild(self):
+        incremental = self.rollup()
+        rebuild_department_spend()
+        self.assertEqual(incremental, self.rollup())
+
+    def test_create_update_delete(self):
+        trip = self._trip(self.sales)
+        self._trip(self.sales, cost=None)
+        self.assertEqual(self.rollup(), [("Sales", "Paris", date(2024, 3, 1), "draft", 2, Decimal("100.00"))])
+
+        trip.estimated_cost = "250.00"
+        trip.destination = "Rome"
+        trip.start_date = date(2024, 4, 2)
+        trip.save()
+        self.assertMatchesRebuild()
+
+        trip.traveler = self.ops
+        trip.save()
+        self.assertMatchesRebuild()
+
+        trip.delete()
+        self.assertMatchesRebuild()
+        self.assertEqual(DepartmentSpend.objects.count(), 1)
+
+    def test_department_change_and_traveler_delete(self):
+        self._trip(self.sales)
+        self._trip(self.sales, destination="Oslo", cost="80.00")
+        self.sales.department = "Marketing"
+        self.sales.save()
+        self.assertEqual({row[0] for row in self.rollup()}, {"Marketing"})
+        self.assertMatchesRebuild()
+
+        self.sales.delete()
+        self.assertFalse(DepartmentSpend.objects.exists())
+
+    def test_transitions_and_admin_actions(self):
+        trips = [self._trip(self.sales, status="pending") for _ in range(3)]
+        bulk_transition([trips[0].id, trips[1].id], "approve")
+        self.assertMatchesRebuild()
+
+        request = RequestFactory().post("/")
+        request.user = self.admin
+        with mock.patch.object(TripAdmin, "message_user"):
+            TripAdmin(Trip, AdminSite()).reject_trips(request, Trip.objects.all())
+        self.assertMatchesRebuild()
+        self.assertEqual(
+            {row[3]: row[4] for row in self.rollup()}, {"approved": 2, "rejected": 1}
+        )
+
+    def test_bulk_import(self):
+        rows = [
+            (n, {"title": f"T{n}", "destination": "Bern", "start_date": f"2020-0{n}-01",
+                 "end_date": f"2020-0{n}-02", "estimated_cost": "10.50", "traveler": self.ops.id})
+            for n in range(1, 4)
+        ]
+        TripImporter().run(rows)
+        self.assertEqual(DepartmentSpend.objects.count(), 3)
+        self.assertMatchesRebuild()
+
+    def test_report_endpoint(self):
+        self._trip(self.sales, cost="100.00", status="approved")
+        self._trip(self.sales, destination="Rome", cost="50.00", status="approved")
+        self._trip(self.ops, start=date(2024, 5, 1), cost="70.00", status="pending")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/reports/department-spend/?status=approved")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('"trips_trip"', " ".join(q["sql"] for q in queries))
+        self.assertEqual(response.data["results"], [
+            {"department": "Sales", "month": "2024-03", "trip_count": 2, "total_cost": "150.00"},
+        ])
+
+        response = self.client.get(
+            "/api/reports/department-spend/?group_by=department&month_from=2024-04&month_to=2024-05"
+        )
+        self.assertEqual(response.data["results"], [
+            {"department": "Ops", "trip_count": 1, "total_cost": "70.00"},
+        ])
+        self.assertEqual(response.data["totals"], {"trip_count": 1, "total_cost": "70.00"})
+
+        self.assertEqual(self.client.get("/api/reports/department-spend/?group_by=year").status_code, 400)
+        self.assertEqual(self.client.get("/api/reports/department-spend/?month_from=March").status_code, 400)
+
+    def test_rebuild_command(self):
+        self._trip(self.sales)
+        DepartmentSpend.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_department_spend", stdout=out)
+        self.assertIn("1 row(s)", out.getvalue())
+        self.assertEqual(DepartmentSpend.objects.get().trip_count, 1)
+
+    def test_staff_only(self):
+        self.client.force_authenticate(user=User.objects.create_user(username="u", password="p"))
+        self.assertEqual(self.client.get("/api/reports/department-spend/").status_code, 403)
+
+
+class TripOverlapTestCase(APITestCase):
+    """Test overlapping-trip detection"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="planner", password="testpass123")
+        self.client.force_authenticate(user=self.user)
+        self.traveler = Traveler.objects.create(
+            id=self.user.id, first_name="Ana", last_name="Kos", email="ana@example.com", department="IT"
+        )
+        self.start = date.today() + timedelta(days=30)
+        self.approved = self._trip(self.start, self.start + timedelta(days=4), "approved")
+
+    def _trip(self, start, end, status="draft", traveler=None):
+        return Trip.objects.create(
+            title="Trip", destination="Lyon", start_date=start, end_date=end,
+            status=status, traveler=traveler or self.traveler,
+        )
+
+    def _payload(self, start, end):
+        return {
+            "title": "Another", "destination": "Nice", "traveler": self.traveler.id,
+            "start_date": start.isoformat(), "end_date": end.isoformat(),
+        }
+
+    def test_create_rejects_overlap(self):
+        overlapping = self._payload(self.start + timedelta(days=4), self.start + timedelta(days=6))
+        response = self.client.post("/api/trips/", overlapping, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(str(self.approved.id), str(response.data["non_field_errors"]))
+
+        after = self._payload(self.start + timedelta(days=5), self.start + timedelta(days=6))
+        self.assertEqual(self.client.post("/api/trips/", after, format="json").status_code, 201)
+
+    def test_longest_trip_still_overlaps(self):
+        longest = self._trip(
+            self.start + timedelta(days=10),
+            self.start + timedelta(days=10 + Trip.MAX_DURATION_DAYS),
+            "pending",
+        )
+        day = longest.end_date
+        conflicts = find_conflicts(self.traveler.id, day, day + timedelta(days=1))
+        self.assertEqual(list(conflicts.values_list("id", flat=True)), [longest.id])
+
+        too_long = self._payload(longest.end_date + timedelta(days=1), longest.end_date + timedelta(days=92))
+        response = self.client.post("/api/trips/", too_long, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("end_date", response.data)
+
+    def test_update_rejects_overlap(self):
+        trip = self._trip(self.start + timedelta(days=10), self.start + timedelta(days=12))
+        response = self.client.patch(
+            f"/api/trips/{trip.id}/", {"start_date": (self.start + timedelta(days=2)).isoformat()}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # Editing other fields of the trip itself is not an overlap
+        response = self.client.patch(f"/api/trips/{self.approved.id}/", {"title": "Renamed"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_submit_rejects_overlap(self):
+        # Created through the ORM, so the serializer check doesn't apply
+        draft = self._trip(self.start + timedelta(days=1), self.start + timedelta(days=2))
+
+        response = self.client.post(f"/api/trips/{draft.id}/submit/")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["conflicts"], [self.approved.id])
+        self.assertEqual(
+            bulk_transition([draft.id], "submit"), [{"id": draft.id, "outcome": "conflict"}]
+        )
+        draft.refresh_from_db()
+        self.assertEqual(draft.status, "draft")
+
+    def test_bulk_submit_checks_same_batch(self):
+        first = self._trip(self.start + timedelta(days=10), self.start + timedelta(days=12))
+        second = self._trip(self.start + timedelta(days=11), self.start + timedelta(days=13))
+        # Overlaps only the trip that is refused, so it is not blocked
+        separate = self._trip(self.start + timedelta(days=13), self.start + timedelta(days=14))
+
+        results = bulk_transition([first.id, second.id, separate.id], "submit")
+        self.assertEqual(
+            [result["outcome"] for result in results], ["transitioned", "conflict", "transitioned"]
+        )
+        self.assertEqual(
+            dict(Trip.objects.filter(pk__in=[first.id, second.id, separate.id]).values_list("pk", "status")),
+            {first.id: "pending", second.id: "draft", separate.id: "pending"},
+        )
+
+    def test_conflicts_endpoint(self):
+        pending = self._trip(self.start + timedelta(days=3), self.start + timedelta(days=8))
+        Trip.objects.filter(pk=pending.pk).update(status="pending")
+        self._trip(self.start + timedelta(days=20), self.start + timedelta(days=21), "approved")
+
+        response = self.client.get(f"/api/travelers/{self.traveler.id}/conflicts/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(item["id"], item["conflicts_with"]) for item in response.data["conflicts"]],
+            [(self.approved.id, [pending.id]), (pending.id, [self.approved.id])],
+        )
+
+    def test_travelers_abroad(self):
+        other = Traveler.objects.create(
+            first_name="Bo", last_name="Li", email="bo@example.com", department="HR"
+        )
+        self._trip(self.start, self.start + timedelta(days=1), "pending", traveler=other)
+
+        day = (self.start + timedelta(days=2)).isoformat()
+        response = self.client.get(f"/api/travelers/abroad/?date={day}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([t["id"] for t in response.data["results"]], [self.traveler.id])
+
+        later = (self.start + timedelta(days=5)).isoformat()
+        response = self.client.get(f"/api/travelers/abroad/?start={later}&end={later}")
+        self.assertEqual(response.data["results"], [])
+        self.assertEqual(self.client.get("/api/travelers/abroad/?date=2024-13-01").status_code, 400)
+
+
+class FullTextSearchTestCase(APITestCase):
+    """Test FTS5-backed search on the API and admin"""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser(username="searcher", password="testpass123")
+        self.client.force_authenticate(user=self.user)
+        self.marta = Traveler.objects.create(
+            first_name="Marta", last_name="Jović", email="marta@example.com", department="Sales"
+        )
+        self.ivan = Traveler.objects.create(
+            first_name="Ivan", last_name="Barcelo", email="ivan@corp.example", department="IT"
+        )
+        start = date(2030, 5, 1)
+        self.barcelona = Trip.objects.create(
+            title="Barcelona expo", destination="Barcelona", start_date=start,
+            end_date=start + timedelta(days=2), traveler=self.marta,
+        )
+        self.ivan_trip = Trip.objects.create(
+            title="Partner visit", destination="Madrid", start_date=start,
+            end_date=start + timedelta(days=1), traveler=self.ivan,
+        )
+
+    def search_ids(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["id"] for item in response.data["results"]]
+
+    def test_trip_search_prefix_and_rank(self):
+        # "Barcelona" twice beats the traveler surname "Barcelo"
+        self.assertEqual(
+            self.search_ids("/api/trips/?q=barcel"), [self.barcelona.id, self.ivan_trip.id]
+        )
+        self.assertEqual(self.search_ids("/api/trips/?q=marta+barc"), [self.barcelona.id])
+        self.assertEqual(self.search_ids("/api/trips/?q=jovic"), [self.barcelona.id])
+        self.assertEqual(self.search_ids('/api/trips/?q="OR+NEAR('), [])
+        # No searchable terms: plain cursor-paginated list
+        self.assertIn("next", self.client.get("/api/trips/?q=+").data)
+
+    def test_index_follows_writes(self):
+        self.marta.last_name = "Kovač"
+        self.marta.save()
+        self.assertEqual(self.search_ids("/api/trips/?q=kovac"), [self.barcelona.id])
+
+        Trip.objects.filter(pk=self.ivan_trip.pk).update(destination="Lisbon")
+        self.assertEqual(self.search_ids("/api/trips/?q=lisbon"), [self.ivan_trip.id])
+
+        Trip.objects.bulk_create([Trip(
+            title="Lisbon summit", destination="Lisbon", start_date=date(2030, 6, 1),
+            end_date=date(2030, 6, 2), traveler=self.marta,
+        )])
+        self.assertEqual(len(self.search_ids("/api/trips/?q=lisbon")), 2)
+
+        self.barcelona.delete()
+        self.assertEqual(self.search_ids("/api/trips/?q=barcel"), [self.ivan_trip.id])
+
+    def test_traveler_search(self):
+        self.assertEqual(self.search_ids("/api/travelers/?q=corp"), [self.ivan.id])
+        self.assertEqual(self.search_ids("/api/travelers/?q=mar&department=sales"), [self.marta.id])
+
+    def test_admin_uses_index(self):
+        request = RequestFactory().get("/")
+        request.user = self.user
+        admin_site = TripAdmin(Trip, AdminSite())
+        with CaptureQueriesContext(connection) as queries:
+            results, may_have_duplicates = admin_site.get_search_results(
+                request, Trip.objects.all(), "madrid"
+            )
+            self.assertEqual(list(results), [self.ivan_trip])
+        self.assertFalse(may_have_duplicates)
+        self.assertIn("trips_trip_fts MATCH", queries[0]["sql"])
+        self.assertNotIn("LIKE", queries[0]["sql"])
+
+
+class ConditionalGetTestCase(APITestCase):
+    """Test ETag / Last-Modified handling on trip and traveler endpoints"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="poller", password="testpass123")
+        self.client.force_authenticate(user=self.user)
+        self.traveler = Traveler.objects.create(
+            id=self.user.id, first_name="Lea", last_name="Novak", email="lea@example.com", department="IT"
+        )
+        self.trip = Trip.objects.create(
+            title="Workshop", destination="Graz", start_date=date(2030, 2, 1),
+            end_date=date(2030, 2, 3), traveler=self.traveler,
+        )
+
+    def assertNotModified(self, url, **headers):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+        return queries
+
+    def test_detail_etag_round_trip(self):
+        url = f"/api/trips/{self.trip.id}/"
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertIn("Last-Modified", response)
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        queries = self.assertNotModified(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(len(queries), 1)  # the row lookup only
+
+        self.client.patch(url, {"title": "Workshop II"}, format="json")
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail_changes_with_traveler(self):
+        url = f"/api/trips/{self.trip.id}/"
+        etag = self.client.get(url)["ETag"]
+        self.traveler.first_name = "Leah"
+        self.traveler.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["traveler_detail"]["first_name"], "Leah")
+
+    def test_list_validators(self):
+        url = "/api/trips/?expand=traveler"
+        response = self.client.get(url)
+        etag = response["ETag"]
+        queries = self.assertNotModified(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(len(queries), 1)  # the page only, never a full scan
+        self.assertIn("LIMIT", queries[0]["sql"])
+
+        # Other variants of the list get other tags
+        self.assertNotEqual(self.client.get("/api/trips/?fields=id")["ETag"], etag)
+
+        # A delete changes the page even if no updated_at moves forward
+        other = Trip.objects.create(
+            title="Extra", destination="Linz", start_date=date(2030, 3, 1),
+            end_date=date(2030, 3, 2), traveler=self.traveler,
+        )
+        etag = self.client.get(url)["ETag"]
+        Trip.objects.filter(pk=other.pk).delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_validators_cover_other_pages(self):
+        older = Trip.objects.create(
+            title="Older", destination="Pula", start_date=date(2030, 1, 1),
+            end_date=date(2030, 1, 2), traveler=self.traveler,
+        )
+        Trip.objects.filter(pk=older.pk).update(created_at=self.trip.created_at - timedelta(days=1))
+        with mock.patch.object(TripPagination, "page_size", 1):
+            # Page numbers show the total count
+            url = "/api/trips/?pagination=page"
+            etag = self.client.get(url)["ETag"]
+            Trip.objects.filter(pk=older.pk).delete()
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+            # Cursor pages show whether a next page exists
+            etag = self.client.get("/api/trips/")["ETag"]
+            Trip.objects.create(
+                title="Oldest", destination="Zadar", start_date=date(2030, 7, 1),
+                end_date=date(2030, 7, 2), traveler=self.traveler,
+            )
+            Trip.objects.filter(title="Oldest").update(created_at=self.trip.created_at - timedelta(days=2))
+            response = self.client.get("/api/trips/", HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertIsNotNone(response.data["next"])
+
+    def test_if_modified_since(self):
+        response = self.client.get("/api/travelers/")
+        last_modified = response["Last-Modified"]
+        self.assertNotModified("/api/travelers/", HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        # Trip count changes bump the traveler's updated_at
+        before = self.client.get(f"/api/travelers/{self.traveler.id}/")["ETag"]
+        Trip.objects.create(
+            title="More", destination="Split", start_date=date(2030, 4, 1),
+            end_date=date(2030, 4, 2), traveler=self.traveler,
+        )
+        response = self.client.get(f"/api/travelers/{self.traveler.id}/", HTTP_IF_NONE_MATCH=before)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["trip_count"], 2)
+
+
+class RepresentationCacheTestCase(APITestCase):
+    """Test the cached trip detail representations"""
+
+    def setUp(self):
+        cache.clear()
+        reset_representation_caches()
+        self.user = User.objects.create_user(username="reader", password="testpass123")
+        self.client.force_authenticate(user=self.user)
+        self.traveler = Traveler.objects.create(
+            id=self.user.id, first_name="Ivo", last_name="Horvat", email="ivo@example.com", department="Sales"
+        )
+        self.trip = Trip.objects.create(
+            title="Fair", destination="Milan", start_date=date(2030, 5, 1),
+            end_date=date(2030, 5, 4), traveler=self.traveler,
+        )
+        self.url = f"/api/trips/{self.trip.id}/"
+
+    def get_uncached(self, url):
+        """GET ``url`` and return (response, whether it was serialized)."""
+        with mock.patch(
+            "trips.serializers.TripSerializer.to_representation",
+            autospec=True,
+            side_effect=TripSerializer.to_representation,
+        ) as to_representation:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, to_representation.called
+
+    def test_second_read_served_from_cache(self):
+        first, serialized = self.get_uncached(self.url)
+        self.assertTrue(serialized)
+        second, serialized = self.get_uncached(self.url)
+        self.assertFalse(serialized)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(get_representation_cache("trip").stats(), {"hits": 1, "misses": 1})
+
+    def test_writes_invalidate(self):
+        self.client.get(self.url)
+        self.client.patch(self.url, {"title": "Fair 2030"}, format="json")
+        response, serialized = self.get_uncached(self.url)
+        self.assertTrue(serialized)
+        self.assertEqual(response.data["title"], "Fair 2030")
+
+        transition_trip(self.trip, "submit")
+        response, serialized = self.get_uncached(self.url)
+        self.assertTrue(serialized)
+        self.assertEqual(response.data["status"], "pending")
+
+    def test_traveler_change_invalidates(self):
+        self.client.get(self.url)
+        self.traveler.last_name = "Horvath"
+        self.traveler.save()
+        response, serialized = self.get_uncached(self.url)
+        self.assertTrue(serialized)
+        self.assertEqual(response.data["traveler_detail"]["last_name"], "Horvath")
+
+    def test_variants_cached_separately(self):
+        full = self.client.get(self.url)
+        response, serialized = self.get_uncached(f"{self.url}?fields=id,title")
+        self.assertTrue(serialized)
+        self.assertEqual(set(response.data), {"id", "title"})
+        self.assertEqual(self.client.get(self.url).data, full.data)
+
+    def test_disabled(self):
+        with self.settings(REPRESENTATION_CACHE={"ENABLED": False}):
+            self.client.get(self.url)
+            _, serialized = self.get_uncached(self.url)
+        self.assertTrue(serialized)
+
+
+class FastListRenderingTestCase(APITestCase):
+    """Test that the values_list() fast path matches the serializers exactly"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user(username="lister", password="testpass123")
+        self.client.force_authenticate(user=self.user)
+        travelers = [
+            Traveler.objects.create(
+                first_name=f"Ana{i}", last_name="Kos", email=f"ana{i}@example.com", department="HR"
+            )
+            for i in range(3)
+        ]
+        for i in range(7):
+            Trip.objects.create(
+                title=f"Trip {i}", destination=["Oslo", "Bergen"][i % 2],
+                start_date=date(2030, 6, 1) + timedelta(days=i * 10),
+                end_date=date(2030, 6, 3) + timedelta(days=i * 11),
+                status=["draft", "pending", "approved", "rejected"][i % 4],
+                estimated_cost=Decimal("1234.50") if i % 3 else None,
+                traveler=travelers[i % 3],
+            )
+
+    def assertSameOutput(self, serializer_class, query=""):
+        request = Request(self.factory.get(f"/api/trips/{query}"))
+        queryset = Trip.objects.select_related("traveler").order_by("id")
+        context = {"request": request}
+        expected = serializer_class(queryset, many=True, context=context).data
+        rendered = render_queryset(serializer_class(context=context), queryset)
+        self.assertIsNotNone(rendered)
+        self.assertEqual(json.dumps(rendered), json.dumps(expected))
+
+    def test_trip_serializer(self):
+        self.assertSameOutput(TripSerializer)
+        self.assertSameOutput(TripSerializer, "?fields=id,duration_days,estimated_cost")
+
+    def test_trip_list_serializer(self):
+        self.assertSameOutput(TripListSerializer)
+        self.assertSameOutput(TripListSerializer, "?expand=traveler")
+        self.assertSameOutput(TripListSerializer, "?fields=status,traveler_name&expand=traveler")
+
+    def test_api_list_matches_serializer(self):
+        trips = Trip.objects.select_related("traveler")
+        for query in ("", "?expand=traveler", "?fields=id,is_editable", "?pagination=page", "?q=oslo"):
+            with self.subTest(query=query):
+                response = self.client.get(f"/api/trips/{query}")
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                context = {"request": Request(self.factory.get(f"/api/trips/{query}"))}
+                expected = {
+                    item["id"]: item
+                    for item in TripListSerializer(trips, many=True, context=context).data
+                }
+                results = response.data["results"]
+                self.assertEqual(len(results), 4 if "q=" in query else 7)
+                for item in results:
+                    self.assertEqual(item, expected[item["id"]])
+
+    def test_cursor_pages_cover_all_rows(self):
+        seen = []
+        url = "/api/trips/?fields=id"
+        with mock.patch.object(TripPagination, "page_size", 3):
+            while url:
+                response = self.client.get(url)
+                seen.extend(item["id"] for item in response.data["results"])
+                url = response.data["next"]
+        self.assertEqual(
+            seen, list(Trip.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+        )
+
+    def test_unsupported_field_falls_back(self):
+        class WithMethod(TripListSerializer):
+            label = serializers.SerializerMethodField()
+
+            class Meta(TripListSerializer.Meta):
+                fields = TripListSerializer.Meta.fields + ["label"]
+
+            def get_label(self, obj):
+                return obj.title.upper()
+
+        self.assertIsNone(RowRenderer.for_serializer(WithMethod()))
+
+
+class SeedTripsTestCase(TestCase):
+    """Test the synthetic dataset generator"""
+
+    def seed(self, *args):
+        call_command(
+            "seed_trips", "--trips", "400", "--travelers", "25", "--seed", "7",
+            "--chunk-size", "150", *args, stdout=StringIO(),
+        )
+
+    def test_seed_builds_consistent_dataset(self):
+        self.seed("--statuses", "approved:3,draft:1", "--length", "2-5")
+
+        self.assertEqual(Traveler.objects.count(), 25)
+        self.assertEqual(Trip.objects.count(), 400)
+        self.assertEqual(set(Trip.objects.values_list("status", flat=True)), {"approved", "draft"})
+        for trip in Trip.objects.all()[:50]:
+            self.assertIn(trip.duration_days, range(2, 6))
+
+        # Derived data is rebuilt
+        self.assertEqual(sum(Traveler.objects.values_list("trip_count", flat=True)), 400)
+        self.assertEqual(sum(DepartmentSpend.objects.values_list("trip_count", flat=True)), 400)
+        self.assertEqual(
+            DepartmentSpend.objects.aggregate(total=Sum("total_cost"))["total"],
+            Trip.objects.aggregate(total=Sum("estimated_cost"))["total"],
+        )
+        destination = Trip.objects.values_list("destination", flat=True).first()
+        self.assertEqual(
+            search(Trip.objects.all(), destination).count(),
+            Trip.objects.filter(destination=destination).count(),
+        )
+
+    def test_travelers_trips_do_not_overlap(self):
+        self.seed("--length", "1-14")
+        previous = {}
+        for traveler_id, start, end in Trip.objects.order_by("traveler_id", "start_date").values_list(
+            "traveler_id", "start_date", "end_date"
+        ):
+            self.assertLess(previous.get(traveler_id, date.min), start)
+            previous[traveler_id] = end
+
+    def test_rejects_trips_that_cannot_fit(self):
+        with self.assertRaisesMessage(CommandError, "without overlapping"):
+            self.seed("--span-days", "100", "--length", "1-14")
+
+    def test_indexes_and_triggers_restored(self):
+        self.seed()
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, "trips_trip")
+        indexes = {name for name, info in constraints.items() if info["index"]}
+        for index in Trip._meta.indexes:
+            self.assertIn(index.name, indexes)
+
+        # FTS triggers fire again for ordinary writes
+        traveler = Traveler.objects.first()
+        Trip.objects.create(
+            title="Kickoff", destination="Reykjavik", start_date=date(2031, 1, 1),
+            end_date=date(2031, 1, 2), traveler=traveler,
+        )
+        self.assertEqual(search(Trip.objects.all(), "reykjavik").count(), 1)
+
+    def test_same_seed_same_rows(self):
+        fields = ("title", "destination", "status", "start_date", "end_date", "estimated_cost")
+        self.seed()
+        first = list(Trip.objects.order_by("id").values_list(*fields))
+        Trip.objects.all().delete()
+        self.seed()
+        second = list(Trip.objects.order_by("id").values_list(*fields))
+        self.assertEqual(first, second)
+        self.assertEqual(Traveler.objects.count(), 50)  # appended, emails stay unique
+
+
+class RequestInstrumentationTestCase(APITestCase):
+    """Test Server-Timing headers, request logs and the slow-query log"""
+
+    def setUp(self):
+        reset_result_caches()
+        reset_representation_caches()
+        self.user = User.objects.create_user(username="timed", password="testpass123")
+        self.client.force_authenticate(user=self.user)
+        self.traveler = Traveler.objects.create(
+            id=self.user.id, first_name="Ana", last_name="Babic", email="ana@example.com", department="HR"
+        )
+        self.trip = Trip.objects.create(
+            title="Audit", destination="BCN", start_date=date(2030, 2, 1),
+            end_date=date(2030, 2, 3), traveler=self.traveler,
+        )
+
+    @staticmethod
+    def server_timing(response):
+        """Server-Timing as {name: desc or None}, checking each has a duration."""
+        metrics = {}
+        for metric in response["Server-Timing"].split(", "):
+            name, duration, *desc = metric.split(";")
+            assert duration.startswith("dur="), metric
+            metrics[name] = desc[0][len('desc="'):-1] if desc else None
+        return metrics
+
+    def test_list_header_counts_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/trips/")
+        metrics = self.server_timing(response)
+        self.assertEqual(metrics["db"], f"{len(queries)} queries")
+        self.assertEqual(metrics["serialize"], "1 call(s)")
+        self.assertIn("total", metrics)
+        self.assertNotIn("flights", metrics)
+
+    def test_provider_time_includes_pool_threads(self):
+        response = self.client.get(f"/api/trips/{self.trip.id}/quote/?origin=BEG")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        metrics = self.server_timing(response)
+        self.assertEqual(metrics["flights"], "1 call(s)")
+        self.assertEqual(metrics["hotels"], "1 call(s)")
+
+    def test_request_log_line(self):
+        with self.settings(INSTRUMENTATION={"LOG_REQUESTS": True}):
+            with self.assertLogs("trips.requests", "INFO") as logs:
+                self.client.get(f"/api/trips/{self.trip.id}/")
+        fields = logs.records[0].request_metrics
+        self.assertEqual(fields["view"], "TripViewSet.retrieve")
+        self.assertEqual(fields["status"], 200)
+        self.assertIn("serialize_ms", fields)
+        self.assertIn("view=TripViewSet.retrieve status=200", logs.output[0])
+
+    def test_request_log_off_by_default(self):
+        with mock.patch("trips.instrumentation.logger.info") as info:
+            self.client.get(f"/api/trips/{self.trip.id}/")
+        info.assert_not_called()
+
+    def test_slow_query_log(self):
+        with self.settings(INSTRUMENTATION={"SLOW_QUERY_MS": 0}):
+            with self.assertLogs("trips.slow_queries", "WARNING") as logs:
+                self.client.get(f"/api/travelers/{self.traveler.id}/")
+        queries = [record.slow_query for record in logs.records]
+        self.assertTrue(all(query["view"] == "TravelerViewSet.retrieve" for query in queries))
+        self.assertTrue(any('FROM "trips_traveler"' in query["sql"] for query in queries))
+        self.assertFalse(any(str(self.traveler.id) in query["sql"] for query in queries))
+
+    def test_disabled(self):
+        with self.settings(INSTRUMENTATION={"ENABLED": False}):
+            response = self.client.get("/api/trips/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header("Server-Timing"))
+
+    def test_normalize_sql(self):
+        self.assertEqual(
+            normalize_sql("SELECT  *\n FROM t WHERE a = 'x''y' AND b IN (%s, %s, %s) LIMIT 21"),
+            "SELECT * FROM t WHERE a = ? AND b IN (...) LIMIT ?",
+        )
+        self.assertEqual(
+            normalize_sql('INSERT INTO "t2" ("a", "b") VALUES (%s, %s), (%s, %s)'),
+            'INSERT INTO "t2" ("a", "b") VALUES (...), (...)',
+        )
+
+
+def _parse_metrics(text):
+    """Prometheus text format as {'name{labels}': value}."""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            sample, value = line.rsplit(" ", 1)
+            samples[sample] = float(value)
+    return samples
+
+
+def _record_in_child():
+    REQUESTS.inc("child", "GET", "200", amount=5)
+
+
+class MetricsTestCase(APITestCase):
+    """Test the /metrics endpoint and the shared metrics storage"""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        override = self.settings(METRICS={"DIRECTORY": directory})
+        override.enable()
+        self.addCleanup(override.disable)
+        reset_metrics()
+        self.addCleanup(reset_metrics)
+
+        reset_result_caches()
+        self.user = User.objects.create_user(username="scraper", password="testpass123")
+        self.client.force_authenticate(user=self.user)
+
+    def scrape(self, **headers):
+        response = self.client.get("/metrics", **headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        return _parse_metrics(response.content.decode())
+
+    def test_request_metrics(self):
+        self.client.get("/api/trips/")
+        self.client.get("/api/trips/")
+        self.client.get("/api/trips/0/")
+        samples = self.scrape()
+
+        list_labels = 'view="TripViewSet.list",method="GET"'
+        self.assertEqual(samples[f'trips_http_requests_total{{{list_labels},status="200"}}'], 2)
+        self.assertEqual(
+            samples['trips_http_requests_total{view="TripViewSet.retrieve",method="GET",status="404"}'], 1
+        )
+        self.assertEqual(samples[f"trips_http_request_duration_seconds_count{{{list_labels}}}"], 2)
+        self.assertEqual(samples[f'trips_http_request_duration_seconds_bucket{{{list_labels},le="+Inf"}}'], 2)
+        self.assertGreater(samples['trips_db_queries_total{view="TripViewSet.list"}'], 0)
+
+    def test_provider_metrics(self):
+        service = FlightService(cache=ResultCache(LocMemBackend(), ttl=0), http=_FailingHTTPClient())
+        service.breaker = CircuitBreaker("metrics", failure_threshold=100)
+        service.INITIAL_BACKOFF = 0.001
+        with self.assertLogs("trips.services", level="WARNING"):
+            service._call_api_with_retry("http://provider.invalid/", {})
+        samples = self.scrape()
+
+        labels = '{service="FlightService"}'
+        self.assertEqual(samples[f"trips_provider_attempts_total{labels}"], 3)
+        self.assertEqual(samples[f"trips_provider_retries_total{labels}"], 2)
+        self.assertEqual(samples[f"trips_provider_timeouts_total{labels}"], 3)
+        self.assertEqual(samples[f"trips_provider_request_duration_seconds_count{labels}"], 3)
+        self.assertEqual(
+            samples['trips_provider_failures_total{service="FlightService",reason="timeout"}'], 3
+        )
+
+    def test_aggregates_across_processes(self):
+        REQUESTS.inc("child", "GET", "200")
+        process = multiprocessing.get_context("fork").Process(target=_record_in_child)
+        process.start()
+        process.join()
+        self.assertEqual(process.exitcode, 0)
+        samples = _parse_metrics(render_metrics())
+        self.assertEqual(samples['trips_http_requests_total{view="child",method="GET",status="200"}'], 6)
+
+    def test_concurrent_threads(self):
+        def record():
+            for _ in range(1000):
+                REQUESTS.inc("threads", "GET", "200")
+
+        threads = [threading.Thread(target=record) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        samples = _parse_metrics(render_metrics())
+        self.assertEqual(samples['trips_http_requests_total{view="threads",method="GET",status="200"}'], 8000)
+
+    def test_exited_threads_hand_back_their_shard(self):
+        for _ in range(20):
+            thread = threading.Thread(target=REQUESTS.inc, args=("reuse", "GET", "200"))
+            thread.start()
+            thread.join()
+        samples = _parse_metrics(render_metrics())
+        self.assertEqual(samples['trips_http_requests_total{view="reuse",method="GET",status="200"}'], 20)
+        self.assertEqual(len(os.listdir(get_metrics_settings()["DIRECTORY"])), 1)
+
+    def test_shard_file_grows(self):
+        for number in range(3000):
+            REQUESTS.inc(f"view{number}", "GET", "200", amount=number)
+        samples = _parse_metrics(render_metrics())
+        self.assertEqual(samples['trips_http_requests_total{view="view2999",method="GET",status="200"}'], 2999)
+        self.assertEqual(len([name for name in samples if name.startswith('trips_http_requests_total{view="view')]), 3000)
+
+    def test_token(self):
+        with self.settings(METRICS={"TOKEN": "s3cret"}):
+            reset_metrics()
+            self.assertEqual(self.client.get("/metrics").status_code, status.HTTP_401_UNAUTHORIZED)
+            self.scrape(HTTP_AUTHORIZATION="Bearer s3cret")
+
+    def test_disabled(self):
+        with self.settings(METRICS={"ENABLED": False}):
+            reset_metrics()
+            self.client.get("/api/trips/")
+            self.assertEqual(self.client.get("/metrics").status_code, status.HTTP_404_NOT_FOUND)
@@ -1,10 +1,13 @@
+import hmac
 import json
 from datetime import datetime
 
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404
 from django.views import View
+from django.views.decorators.http import require_GET
 
+from .metrics import CONTENT_TYPE, get_metrics_settings, get_storage, render_metrics
 from .models import Trip
 
 
@@ -93,3 +96,21 @@ class TripCreateView(View):
             "duration_days": trip.duration_days,
         }
         return JsonResponse(data)
+
+
+@require_GET
+def metrics(request):
+    """
+    GET /metrics - Prometheus metrics summed over all worker processes.
+
+    See trips.metrics. Needs "Authorization: Bearer <METRICS TOKEN>" when
+    a token is configured.
+    """
+    if get_storage() is None:
+        raise Http404
+    token = get_metrics_settings()["TOKEN"]
+    if token and not hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponse(status=401)
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE)
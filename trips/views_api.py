@@ -1,51 +1,210 @@
+import json
+
+from django.db.models.functions import Lower
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import NotAuthenticated, PermissionDenied
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
+from .cache import cache_stats
+from .conditional import ConditionalGetMixin
+from .concurrency import get_concurrency_settings, single_flight_stats
+from .exports import (
+    EXPORT_FORMATS,
+    export_rows,
+    filter_export_queryset,
+    iter_csv,
+    iter_ndjson,
+)
+from .imports import IMPORT_FORMATS, TripImporter, detect_format, parse_rows
 from .models import Traveler, Trip
+from .pagination import TravelerPagination, TripPagination
 from .permissions import IsOwnerOrReadOnly
-from .serializers import TravelerSerializer, TripSerializer
-from .services import FlightService
+from .rendering import FastListMixin
+from .reporting import spend_report
+from .representations import representation_cache_stats
+from .scheduling import traveler_conflicts, travelers_abroad
+from .search import search, search_terms
+from .resilience import breaker_stats
+from .serializers import (
+    BulkTransitionSerializer,
+    FlightSearchBatchSerializer,
+    TravelerSerializer,
+    TripListSerializer,
+    TripSerializer,
+)
+from .services import FlightService, TripQuoteService
+from .workflow import TRANSITIONS, bulk_transition, submit_trip, transition_trip
+
+
+def apply_search(queryset, request, paginator):
+    """
+    Apply ?q= full-text search, ordered by relevance.
+
+    The paginator's ordering breaks ties between equally ranked rows.
+    """
+    text = request.query_params.get('q')
+    if not search_terms(text):
+        return queryset
+    return search(queryset, text).order_by('search_rank', *paginator.ordering)
 
 
-class TravelerViewSet(viewsets.ModelViewSet):
+class TravelerViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing travelers.
 
     Provides CRUD operations for traveler records.
+    List and detail responses carry ETag/Last-Modified and answer
+    conditional requests with 304.
     """
     queryset = Traveler.objects.all()
     serializer_class = TravelerSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = TravelerPagination
 
     def get_queryset(self):
         """
-        Optionally filter travelers by department.
+        Optionally filter travelers by department and search text.
+
+        ?department= matches part of the department name (a table scan);
+        ?department_exact= matches the whole name, ignoring case, through
+        the lower(department) index. ?q= searches name and email.
         """
         queryset = Traveler.objects.all()
         department = self.request.query_params.get('department')
         if department:
             queryset = queryset.filter(department__icontains=department)
+        department_exact = self.request.query_params.get('department_exact')
+        if department_exact:
+            queryset = queryset.alias(
+                department_lower=Lower('department')
+            ).filter(department_lower=department_exact.strip().lower())
+        if self.action == 'list':
+            queryset = apply_search(queryset, self.request, self.paginator)
         return queryset
 
+    @action(detail=True, methods=["get"])
+    def conflicts(self, request, pk=None):
+        """
+        Pending or approved trips of this traveler whose dates overlap.
 
-class TripViewSet(viewsets.ModelViewSet):
+        GET /api/travelers/{id}/conflicts/
+        """
+        traveler = self.get_object()
+        return Response({
+            "traveler_id": traveler.id,
+            "conflicts": [
+                {
+                    "id": trip.id,
+                    "title": trip.title,
+                    "destination": trip.destination,
+                    "start_date": trip.start_date,
+                    "end_date": trip.end_date,
+                    "status": trip.status,
+                    "conflicts_with": overlaps,
+                }
+                for trip, overlaps in traveler_conflicts(traveler.id)
+            ],
+        })
+
+    @action(detail=False, methods=["get"])
+    def abroad(self, request):
+        """
+        Travelers with an approved trip on a date or within a date range.
+
+        GET /api/travelers/abroad/?date=2024-03-01
+        GET /api/travelers/abroad/?start=2024-03-01&end=2024-03-31
+        """
+        start = request.query_params.get("start") or request.query_params.get("date")
+        end = request.query_params.get("end") or start
+        try:
+            start_date, end_date = parse_date(start or ""), parse_date(end or "")
+        except ValueError:
+            start_date = end_date = None
+        if start_date is None or end_date is None or end_date < start_date:
+            return Response(
+                {"error": "Pass date=YYYY-MM-DD or start and end (YYYY-MM-DD, start <= end)"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = travelers_abroad(start_date, end_date)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class TripViewSet(FastListMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing business trips.
 
     Provides CRUD operations plus approval workflow actions.
+    Workflow actions are atomic compare-and-set updates and return 409
+    if the trip is no longer in the required status.
     Uses select_related to prevent N+1 queries on traveler lookups.
+    Lists are cursor-paginated; pass ?pagination=page for page numbers.
+
+    Lists use the compact TripListSerializer. Reads accept ?fields= and
+    ?expand=traveler, and only the columns needed for the requested
+    fields are fetched. Lists accept ?q= for a ranked full-text search
+    over title, destination and traveler name/email.
+
+    List and detail responses carry ETag/Last-Modified validators taken
+    from updated_at; conditional requests get a 304 without serializing.
+    Detail representations are cached under their ETag. List pages are
+    rendered from values_list() rows without building model instances.
     """
     serializer_class = TripSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
+    pagination_class = TripPagination
+    representation_cache_name = 'trip'
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return TripListSerializer
+        return super().get_serializer_class()
 
     def get_queryset(self):
         """
         Returns trips with traveler data pre-fetched.
         Uses select_related to prevent N+1 query problem.
         """
-        return Trip.objects.select_related('traveler').all()
+        if self.action in TRANSITIONS:
+            # Workflow actions only need the row for permissions, the
+            # overlap check and the response message; the status check
+            # happens in the UPDATE.
+            return Trip.objects.only('id', 'destination', 'traveler_id', 'start_date', 'end_date')
+
+        queryset = Trip.objects.select_related('traveler').all()
+        if self.action in ('list', 'retrieve'):
+            queryset = self.restrict_columns(queryset)
+        if self.action == 'list':
+            queryset = apply_search(queryset, self.request, self.paginator)
+        return queryset
+
+    def restrict_columns(self, queryset):
+        """
+        Limit the SELECT to the columns the serializer will render.
+
+        Drops the traveler join entirely when no traveler field is
+        requested. Pagination ordering fields are always loaded so the
+        cursor can be built without extra queries.
+        """
+        paths = self.get_serializer().get_queryset_fields()
+        if paths is None:
+            return queryset
+        if self.action == 'list':
+            paths.update(self.paginator.ordering)
+        paths = {path.lstrip('-') for path in paths}
+        paths.add('updated_at')  # conditional GET validator
+        if not any(path.startswith('traveler__') for path in paths):
+            queryset = queryset.select_related(None)
+        else:
+            paths.add('traveler__updated_at')
+        return queryset.only(*paths)
 
     @action(detail=True, methods=["post"])
     def approve(self, request, pk=None):
@@ -55,13 +214,11 @@ class TripViewSet(viewsets.ModelViewSet):
         POST /api/trips/{id}/approve/
         """
         trip = self.get_object()
-        if trip.status != "pending":
+        if not transition_trip(trip, "approve"):
             return Response(
                 {"error": "Only pending trips can be approved"},
-                status=status.HTTP_400_BAD_REQUEST
+                status=status.HTTP_409_CONFLICT
             )
-        trip.status = "approved"
-        trip.save()
         return Response({
             "status": "approved",
             "trip_id": trip.id,
@@ -76,13 +233,11 @@ class TripViewSet(viewsets.ModelViewSet):
         POST /api/trips/{id}/reject/
         """
         trip = self.get_object()
-        if trip.status != "pending":
+        if not transition_trip(trip, "reject"):
             return Response(
                 {"error": "Only pending trips can be rejected"},
-                status=status.HTTP_400_BAD_REQUEST
+                status=status.HTTP_409_CONFLICT
             )
-        trip.status = "rejected"
-        trip.save()
         return Response({
             "status": "rejected",
             "trip_id": trip.id,
@@ -97,19 +252,120 @@ class TripViewSet(viewsets.ModelViewSet):
         POST /api/trips/{id}/submit/
         """
         trip = self.get_object()
-        if trip.status != "draft":
+        submitted, conflicts = submit_trip(trip)
+        if conflicts:
+            return Response(
+                {
+                    "error": "Trip dates overlap another pending or approved trip",
+                    "conflicts": conflicts,
+                },
+                status=status.HTTP_409_CONFLICT
+            )
+        if not submitted:
             return Response(
                 {"error": "Only draft trips can be submitted"},
-                status=status.HTTP_400_BAD_REQUEST
+                status=status.HTTP_409_CONFLICT
             )
-        trip.status = "pending"
-        trip.save()
         return Response({
             "status": "pending",
             "trip_id": trip.id,
             "message": "Trip submitted for approval"
         })
 
+    @action(detail=False, methods=["post"])
+    def bulk_transition(self, request):
+        """
+        Submit, approve or reject many trips in one call.
+
+        POST /api/trips/bulk_transition/
+        {"ids": [1, 2, 3], "transition": "approve"}
+
+        Applies the same rules as the single-trip actions and returns an
+        outcome per id: transitioned, wrong_state, not_found, forbidden or
+        conflict (submit only: dates overlap a pending or approved trip).
+        """
+        serializer = BulkTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        def is_allowed(trip):
+            try:
+                self.check_object_permissions(request, trip)
+            except (PermissionDenied, NotAuthenticated):
+                return False
+            return True
+
+        results = bulk_transition(
+            serializer.validated_data["ids"],
+            serializer.validated_data["transition"],
+            is_allowed=is_allowed,
+        )
+        return Response({
+            "transition": serializer.validated_data["transition"],
+            "results": results,
+        })
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Stream all matching trips as NDJSON (default) or CSV.
+
+        GET /api/trips/export/?output=csv&status=approved&start_from=2024-01-01
+            &start_to=2024-01-31&department=Finance
+
+        Rows are streamed from a chunked database cursor, so memory use
+        does not grow with the number of trips exported.
+        """
+        output = request.query_params.get("output", "ndjson")
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {"error": f"output must be one of: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = filter_export_queryset(Trip.objects.all(), request.query_params)
+        encode = iter_csv if output == "csv" else iter_ndjson
+        response = StreamingHttpResponse(
+            encode(export_rows(queryset)),
+            content_type=EXPORT_FORMATS[output],
+        )
+        response["Content-Disposition"] = f'attachment; filename="trips.{output}"'
+        return response
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        parser_classes=[MultiPartParser],
+        permission_classes=[IsAdminUser],
+    )
+    def import_trips(self, request):
+        """
+        Bulk import trips from an uploaded CSV or NDJSON file (staff only).
+
+        POST /api/trips/import/  (multipart: file=<upload>, input=csv|ndjson,
+        dry_run=true)
+
+        Each row needs title, destination, start_date, end_date and either
+        traveler (id) or traveler_email; status and estimated_cost are
+        optional. Returns created/failed counts and per-row errors.
+        """
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"error": "Upload the file as multipart field 'file'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        fmt = request.data.get("input") or detect_format(upload.name)
+        if fmt not in IMPORT_FORMATS:
+            return Response(
+                {"error": f"input must be one of: {', '.join(IMPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        importer = TripImporter(dry_run=request.data.get("dry_run") in ("1", "true"))
+        report = importer.run(parse_rows(upload.file, fmt))
+        return Response(report)
+
     @action(detail=False, methods=["get"])
     def search_flights(self, request):
         """
@@ -130,3 +386,105 @@ class TripViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_503_SERVICE_UNAVAILABLE
             )
         return Response(flights)
+
+    @action(detail=False, methods=["post"], url_path="search_flights/batch")
+    def search_flights_batch(self, request):
+        """
+        Search many routes in one call.
+
+        POST /api/trips/search_flights/batch/
+        {"queries": [{"origin": "BEG", "destination": "BCN", "date": "2024-03-01"}, ...],
+         "timeout": 5}
+
+        Identical legs are searched once. Add ?stream=true to receive one
+        NDJSON line per query as results complete instead of one JSON body.
+        """
+        config = get_concurrency_settings()
+        serializer = FlightSearchBatchSerializer(
+            data=request.data,
+            context={"max_queries": config["BATCH_MAX_QUERIES"]},
+        )
+        serializer.is_valid(raise_exception=True)
+        queries = [
+            {**query, "date": query["date"].isoformat()}
+            for query in serializer.validated_data["queries"]
+        ]
+        timeout = serializer.validated_data.get("timeout", config["BATCH_TIMEOUT"])
+
+        def results():
+            batch = FlightService().search_flights_batch(
+                queries, concurrency=config["BATCH_CONCURRENCY"], timeout=timeout
+            )
+            for indexes, flights, error in batch:
+                for index in indexes:
+                    yield {
+                        "index": index,
+                        **queries[index],
+                        "status": "error" if error else "ok",
+                        "error": error,
+                        "result": flights,
+                    }
+
+        if request.query_params.get("stream") in ("1", "true"):
+            lines = (json.dumps(item) + "\n" for item in results())
+            return StreamingHttpResponse(lines, content_type="application/x-ndjson")
+
+        return Response({
+            "results": sorted(results(), key=lambda item: item["index"]),
+        })
+
+    @action(detail=True, methods=["get"])
+    def quote(self, request, pk=None):
+        """
+        Combined flight + hotel quote for a trip.
+
+        GET /api/trips/{id}/quote/?origin=BEG
+
+        Searches both providers concurrently; if one is slow or down the
+        response is marked partial and lists it under "unavailable".
+        """
+        trip = self.get_object()
+        origin = request.query_params.get("origin", "BEG")
+
+        quote = TripQuoteService().quote(trip, origin)
+
+        if quote is None:
+            return Response(
+                {"error": "Flight and hotel search temporarily unavailable"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        return Response(quote)
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAdminUser])
+    def provider_stats(self, request):
+        """
+        Provider cache, coalescing and circuit breaker counters (staff only).
+
+        GET /api/trips/provider_stats/
+        """
+        return Response({
+            "cache": cache_stats(),
+            "coalescing": single_flight_stats(),
+            "circuit_breakers": breaker_stats(),
+            "representations": representation_cache_stats(),
+        })
+
+
+class ReportViewSet(viewsets.ViewSet):
+    """
+    Reporting endpoints (staff only).
+
+    Reports read pre-aggregated rollup tables, never the full trips table.
+    """
+    permission_classes = [IsAdminUser]
+
+    @action(detail=False, methods=["get"], url_path="department-spend")
+    def department_spend(self, request):
+        """
+        Trip count and estimated cost from the department spend rollup.
+
+        GET /api/reports/department-spend/?group_by=department,month
+            &status=approved&month_from=2024-01&month_to=2024-12
+            &department=Finance&destination=Paris
+        """
+        return Response(spend_report(request.query_params))
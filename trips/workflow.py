@@ -0,0 +1,212 @@
+"""
+Trip approval workflow.
+
+Status transitions are conditional UPDATEs: a trip only moves to the
+target status if it is still in the source status when the UPDATE runs,
+and only ``status`` and ``updated_at`` are written. Every path that
+changes status in bulk (the API, the admin actions) goes through here,
+so ``trip_status_changed`` is sent for all of them.
+
+Submitting a trip is refused while its dates overlap another pending or
+approved trip of the same traveler (see trips.scheduling), or another
+trip of the traveler submitted earlier in the same batch. Submits lock
+the traveler rows first, so two concurrent submits for one traveler
+cannot both pass the overlap check.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Trip
+from .scheduling import find_conflicts, has_conflict, lock_travelers
+from .signals import trip_status_changed
+
+# transition name -> (source status, target status)
+TRANSITIONS = {
+    "submit": ("draft", "pending"),
+    "approve": ("pending", "approved"),
+    "reject": ("pending", "rejected"),
+}
+
+TRANSITIONED = "transitioned"
+WRONG_STATE = "wrong_state"
+NOT_FOUND = "not_found"
+FORBIDDEN = "forbidden"
+CONFLICT = "conflict"
+
+# Transitions that put a trip into a blocking status and so must not
+# create an overlap.
+CHECK_OVERLAP = {"submit"}
+
+
+def transition_ids(trip_ids, transition):
+    """
+    Move the given trips through ``transition`` with one UPDATE.
+
+    Trips no longer in the source status are left untouched.
+
+    Returns:
+        List of the trip ids that were transitioned
+    """
+    source, target = TRANSITIONS[transition]
+    trip_ids = list(trip_ids)
+    if not trip_ids:
+        return []
+    now = timezone.now()
+    with transaction.atomic():
+        updated = Trip.objects.filter(pk__in=trip_ids, status=source).update(
+            status=target, updated_at=now
+        )
+        if updated == len(trip_ids):
+            changed = trip_ids
+        elif updated:
+            # Some trips moved concurrently; our rows carry our timestamp.
+            changed = list(
+                Trip.objects.filter(pk__in=trip_ids, status=target, updated_at=now)
+                .values_list("pk", flat=True)
+            )
+        else:
+            changed = []
+        if changed:
+            trip_status_changed.send(
+                sender=Trip, trip_ids=changed, source=source, target=target
+            )
+    return changed
+
+
+def transition_trip(trip, transition):
+    """
+    Compare-and-set the status of a single trip.
+
+    Runs one ``UPDATE ... WHERE id = %s AND status = <source>``, so two
+    concurrent requests can never both move the same trip. On success
+    ``trip.status`` is updated in memory too.
+
+    Returns:
+        True if this call performed the transition
+    """
+    if not transition_ids([trip.pk], transition):
+        return False
+    trip.status = TRANSITIONS[transition][1]
+    return True
+
+
+def submit_conflicts(trip):
+    """
+    Ids of the traveler's blocking trips overlapping ``trip``.
+
+    ``trip`` needs traveler_id, start_date and end_date loaded.
+    """
+    return list(
+        find_conflicts(trip.traveler_id, trip.start_date, trip.end_date, exclude_id=trip.pk)
+        .values_list("pk", flat=True)
+    )
+
+
+def submit_trip(trip):
+    """
+    Submit a draft trip unless its dates overlap a blocking trip.
+
+    The overlap check and the compare-and-set run in one transaction
+    with the traveler's row locked.
+
+    Returns:
+        (submitted, conflicts): whether this call moved the trip to
+        pending, and the ids of the overlapping trips that prevented it
+    """
+    with transaction.atomic():
+        lock_travelers([trip.traveler_id])
+        conflicts = submit_conflicts(trip)
+        if conflicts:
+            return False, conflicts
+        return transition_trip(trip, "submit"), []
+
+
+def apply_transition(queryset, transition):
+    """
+    Transition every trip in ``queryset`` that is in the source status.
+
+    Returns:
+        Number of trips transitioned
+    """
+    source, _ = TRANSITIONS[transition]
+    trip_ids = queryset.filter(status=source).values_list("pk", flat=True)
+    return len(transition_ids(trip_ids, transition))
+
+
+def bulk_transition(trip_ids, transition, is_allowed=lambda trip: True):
+    """
+    Transition many trips and report an outcome for each id.
+
+    Args:
+        trip_ids: Trip primary keys, in the order to report them
+        transition: Key of TRANSITIONS
+        is_allowed: Callable(trip) -> bool applying the caller's
+            permission rules; trips are loaded with id, status,
+            traveler_id and their dates only
+
+    Returns:
+        List of {"id": ..., "outcome": ...} in the order of ``trip_ids``,
+        with outcome one of TRANSITIONED, WRONG_STATE, NOT_FOUND,
+        FORBIDDEN or CONFLICT (dates overlap a blocking trip, or a trip
+        of the same traveler earlier in ``trip_ids``)
+    """
+    source, _ = TRANSITIONS[transition]
+    check_overlap = transition in CHECK_OVERLAP
+    with transaction.atomic():
+        queryset = Trip.objects.select_for_update().filter(pk__in=trip_ids)
+        if check_overlap:
+            lock_travelers(Trip.objects.filter(pk__in=trip_ids).values("traveler_id"))
+            queryset = queryset.annotate(conflicting=has_conflict())
+        trips = {
+            trip.pk: trip
+            for trip in queryset.only("id", "status", "traveler_id", "start_date", "end_date")
+        }
+
+        outcomes = {}
+        eligible = []
+        for pk in trip_ids:
+            trip = trips.get(pk)
+            if trip is None:
+                outcomes[pk] = NOT_FOUND
+            elif not is_allowed(trip):
+                outcomes[pk] = FORBIDDEN
+            elif trip.status != source:
+                outcomes[pk] = WRONG_STATE
+            elif getattr(trip, "conflicting", False):
+                outcomes[pk] = CONFLICT
+            else:
+                eligible.append(pk)
+                outcomes[pk] = TRANSITIONED
+
+        if check_overlap:
+            eligible = _without_batch_overlaps(eligible, trips, outcomes)
+
+        # On backends without row locks a concurrent writer may still
+        # move a trip first; report those as wrong_state.
+        changed = set(transition_ids(eligible, transition))
+        for pk in eligible:
+            if pk not in changed:
+                outcomes[pk] = WRONG_STATE
+
+    return [{"id": pk, "outcome": outcomes[pk]} for pk in dict.fromkeys(trip_ids)]
+
+
+def _without_batch_overlaps(eligible, trips, outcomes):
+    """
+    Drop trips overlapping an earlier eligible trip of the same traveler
+    (marking them CONFLICT), since both would become blocking together.
+    """
+    accepted = {}  # traveler_id -> trips kept so far
+    kept = []
+    for pk in eligible:
+        trip = trips[pk]
+        earlier = accepted.setdefault(trip.traveler_id, [])
+        if any(
+            other.start_date <= trip.end_date and other.end_date >= trip.start_date
+            for other in earlier
+        ):
+            outcomes[pk] = CONFLICT
+            continue
+        earlier.append(trip)
+        kept.append(pk)
+    return kept